@@ -0,0 +1,65 @@
+"""
+Mide el tiempo de importación de ``src.config`` con ``python -X importtime``.
+
+Uso:
+    python -m benchmarks.bench_import_time [--module src.config] [--output importtime.log]
+"""
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Formato de cada línea: "import time:  self [us] | cumulative | imported package"
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times(statement):
+    """Ejecuta ``statement`` en un intérprete nuevo y retorna (módulo, propio, acumulado, nivel) en µs"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            rows.append((module, int(own), int(cumulative), (len(indent) - 1) // 2))
+    return rows, result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="src.config")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más costosos a mostrar")
+    parser.add_argument("--output", help="Archivo donde guardar la salida cruda de -X importtime")
+    args = parser.parse_args()
+
+    rows, raw = import_times(f"import {args.module}")
+    if args.output:
+        Path(args.output).write_text(raw, encoding="utf-8")
+
+    total = next((cumulative for module, _, cumulative, _ in rows if module == args.module), 0)
+    print(f"import {args.module}: {total / 1000:.1f} ms acumulados")
+    print(f"{'módulo':50} {'propio ms':>10} {'acum. ms':>10}")
+    for module, own, cumulative, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{module:50} {own / 1000:10.1f} {cumulative / 1000:10.1f}")
+
+    # Costo diferido: el primer acceso a un logger crea archivos y handlers
+    first_use, _ = import_times(f"import {args.module}; {args.module}.log.app")
+    imported = {module for module, _, _, _ in rows}
+    deferred = [(module, own) for module, own, _, _ in first_use if module not in imported]
+    print(
+        f"Diferido al primer uso de log.app: {len(deferred)} módulos, "
+        f"{sum(own for _, own in deferred) / 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Micro-benchmark de los formateadores JSON de logs.
+
+Uso:
+    python -m benchmarks.bench_json_formatter [--records N]
+"""
+import argparse
+import logging
+import time
+
+from src.config.formatters.fast_json_formatter import FastJsonLogFormatter
+from src.config.formatters.json_formatter import JsonLogFormatter
+
+
+def _records(count):
+    """Genera registros similares a los de un ciclo de procesamiento por fila"""
+    records = []
+    for i in range(count):
+        record = logging.LogRecord("excel", logging.DEBUG, __file__, 10, "Fila procesada", (), None)
+        record.props = {"row": i, "file": "transacciones.xlsx", "amount": i * 1.5, "status": "ok"}
+        records.append(record)
+    return records
+
+
+def measure(formatter, records, repeat=3):
+    """Retorna registros por segundo formateando ``records`` (mejor de ``repeat`` corridas)"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for record in records:
+            formatter.format(record)
+        best = min(best, time.perf_counter() - started)
+    return len(records) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    records = _records(args.records)
+    baseline = measure(JsonLogFormatter(), records)
+    fast = measure(FastJsonLogFormatter(), records)
+    print(f"JsonLogFormatter:     {baseline:12,.0f} registros/s")
+    print(f"FastJsonLogFormatter: {fast:12,.0f} registros/s")
+    print(f"Mejora:               {fast / baseline:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Mide el rendimiento de generar plantillas en paralelo con una configuración compartida.
+
+Compara crear un ``ExcelConfigProvider`` por solicitud contra compartir uno
+solo entre todos los hilos. La caché de plantillas se omite para medir la
+construcción completa del libro.
+
+Uso:
+    python -m benchmarks.bench_template_parallel [--requests 64] [--threads 1 2 4 8] [--proveedores 2000]
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src.excel.excel_config import ExcelConfigProvider
+from src.excel.template.generate_template import ExcelTemplateGenerator
+from src.excel.template.template_cache import TemplateCache
+
+
+class _QuietLogger:
+    def info(self, message, **kwargs):
+        pass
+
+    debug = warning = error = info
+
+
+def _generate(directory, index, config_factory):
+    """Genera una plantilla sin caché con la configuración que entrega ``config_factory``"""
+    generator = ExcelTemplateGenerator(logger=_QuietLogger(), config=config_factory(), cache=TemplateCache())
+    generator.create_excel_template(str(Path(directory) / f"{index}.xlsx"))
+
+
+def measure(requests, threads, config_factory):
+    """Retorna plantillas por segundo generando ``requests`` plantillas con ``threads`` hilos"""
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda index: _generate(directory, index, config_factory), range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--proveedores", type=int, default=2000)
+    args = parser.parse_args()
+
+    proveedores = [f"Tercero {i:05d}" for i in range(args.proveedores)]
+    shared = ExcelConfigProvider(proveedores)
+
+    print(f"{'hilos':>6} {'por solicitud/s':>16} {'compartida/s':>13}")
+    for threads in args.threads:
+        per_request = measure(args.requests, threads, lambda: ExcelConfigProvider(proveedores))
+        reused = measure(args.requests, threads, lambda: shared)
+        print(f"{threads:>6} {per_request:>16.1f} {reused:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
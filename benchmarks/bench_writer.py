@@ -0,0 +1,70 @@
+"""
+Compara memoria y tiempo de escritura entre un Workbook normal y el escritor en streaming.
+
+Uso:
+    python -m benchmarks.bench_writer [--rows 1000 10000 50000]
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from src.excel.excel_config import ExcelConfigProvider
+from src.excel.writer import TransactionWorkbookWriter
+
+
+class _QuietLogger:
+    def info(self, message, **kwargs):
+        pass
+
+    debug = warning = error = info
+
+
+def _rows(count):
+    for i in range(count):
+        yield [f"T{i:06d}", datetime(2023, 1, 1 + i % 28), "Detalle", "Proveedor1", 10.5, None, 10.5 * i, "Ventas", "No"]
+
+
+def _write_normal(path, count):
+    wb = Workbook()
+    sheet = wb.active
+    sheet.append(ExcelConfigProvider().headers_transacciones)
+    for row in _rows(count):
+        sheet.append(row)
+    wb.save(path)
+
+
+def _write_streaming(path, count):
+    TransactionWorkbookWriter(logger=_QuietLogger()).write(path, _rows(count))
+
+
+def measure(function, path, count):
+    """Retorna (segundos, pico de memoria en MB) de escribir ``count`` filas"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        function(path, count)
+        return time.perf_counter() - started, tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>8} {'normal MB':>10} {'streaming MB':>13} {'normal s':>9} {'streaming s':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.rows:
+            normal = measure(_write_normal, Path(directory) / "normal.xlsx", count)
+            streaming = measure(_write_streaming, Path(directory) / "streaming.xlsx", count)
+            print(f"{count:>8} {normal[1]:>10.1f} {streaming[1]:>13.1f} {normal[0]:>9.2f} {streaming[0]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
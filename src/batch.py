@@ -0,0 +1,495 @@
+"""
+Procesamiento por lotes de varias plantillas de transacciones en paralelo.
+
+Uso:
+    python -m src.batch <directorio> [--movements movimientos.csv] [--workers N]
+    python -m src.batch <directorio> --pattern "*.csv" --statement-format formato.json
+"""
+import argparse
+import copy
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from logging.handlers import QueueHandler, QueueListener
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from .config import log
+from .excel.balance import BalanceCheckpoint, BalanceChecker
+from .excel.column_cache import ColumnCache
+from .excel.excel_config import ExcelConfigProvider
+from .excel.reader import DEFAULT_CHUNK_SIZE, TransactionReader, coerce_transactions
+from .excel.statement_reader import StatementFormat, StatementReader, is_statement
+from .excel.validator import TransactionValidator, ValidationResult
+from .reconciliation.matcher import MATCH_NONE, ReconciliationMatcher
+from .reconciliation.state import ReconciliationState, RowDelta
+from .siigo.master_data import load_counterparty_names
+from .utils.instrumentation import metrics
+
+# Tipos de logger de la fachada que se redirigen desde los procesos hijos
+LOGGER_TYPES = ("app", "error", "excel", "siigo")
+
+# Estado de cada proceso hijo, creado una sola vez por ``_init_worker``
+_worker_matcher: Optional[ReconciliationMatcher] = None
+_worker_config: Optional[ExcelConfigProvider] = None
+_worker_cache: Optional[ColumnCache] = None
+_worker_state: Optional[ReconciliationState] = None
+_worker_statement_format: Optional[StatementFormat] = None
+_worker_instrumented = False
+
+
+@dataclass
+class WorkbookSummary:
+    """Resultado del procesamiento de un archivo"""
+    path: str
+    rows: int = 0
+    invalid_rows: int = 0
+    error_counts: Dict[str, int] = field(default_factory=dict)
+    balance_drift_row: Optional[int] = None
+    matches: Dict[str, int] = field(default_factory=dict)
+    # Filas sin cambios desde la ejecución anterior que no se validaron ni conciliaron
+    skipped_rows: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    # Métricas acumuladas en el proceso hijo; el proceso principal las absorbe
+    metrics: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class BatchSummary:
+    """Resumen combinado de todos los archivos procesados"""
+    workbooks: List[WorkbookSummary] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def totals(self) -> Dict[str, Any]:
+        """Totales agregados de todos los archivos"""
+        error_counts: Dict[str, int] = {}
+        matches: Dict[str, int] = {}
+        for workbook in self.workbooks:
+            for rule, count in workbook.error_counts.items():
+                error_counts[rule] = error_counts.get(rule, 0) + count
+            for kind, count in workbook.matches.items():
+                matches[kind] = matches.get(kind, 0) + count
+        return {
+            "files": len(self.workbooks),
+            "failed_files": sum(1 for workbook in self.workbooks if workbook.error),
+            "rows": sum(workbook.rows for workbook in self.workbooks),
+            "invalid_rows": sum(workbook.invalid_rows for workbook in self.workbooks),
+            "skipped_rows": sum(workbook.skipped_rows for workbook in self.workbooks),
+            "balance_drifts": sum(1 for workbook in self.workbooks if workbook.balance_drift_row is not None),
+            "error_counts": error_counts,
+            "matches": matches,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa el resumen completo"""
+        workbooks = []
+        for workbook in self.workbooks:
+            data = asdict(workbook)
+            data.pop("metrics")
+            workbooks.append(data)
+        return {"totals": self.totals, "workbooks": workbooks}
+
+
+class _WorkerQueueHandler(QueueHandler):
+    """
+    QueueHandler que conserva el mensaje y la traza por separado.
+
+    El QueueHandler estándar mezcla la traza en el mensaje; aquí se deja en
+    ``exc_text`` para que el formateador JSON del proceso principal la escriba
+    en su propio campo.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _DispatchHandler(logging.Handler):
+    """Entrega cada registro recibido de un hijo al logger homónimo del proceso principal"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+
+def _route_logs_to_queue(queue: Any) -> None:
+    """
+    Reemplaza los handlers de la fachada ``log`` por un QueueHandler.
+
+    Así solo el proceso principal escribe en los archivos rotativos y los
+    registros de distintos procesos no se intercalan ni corrompen la rotación.
+    """
+    for logger_type in LOGGER_TYPES:
+        logger = getattr(log, logger_type).logger
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+        logger.addHandler(_WorkerQueueHandler(queue))
+        logger.propagate = False
+
+
+def _init_worker(
+    queue: Any,
+    movements: Optional[pd.DataFrame],
+    matcher_options: Dict[str, Any],
+    instrumented: bool = False,
+    column_cache: Optional[str] = None,
+    state: Optional[str] = None,
+    statement_format: Optional[StatementFormat] = None,
+    proveedores: Optional[List[str]] = None
+) -> None:
+    """Inicializa un proceso hijo: logging por cola, instrumentación, cachés, estado e índice de movimientos"""
+    global _worker_matcher, _worker_config, _worker_cache, _worker_state, _worker_instrumented
+    global _worker_statement_format
+    _route_logs_to_queue(queue)
+    if instrumented:
+        # Los resúmenes periódicos los publica solo el proceso principal
+        metrics.enable()
+        _worker_instrumented = True
+    _worker_config = ExcelConfigProvider(proveedores=proveedores)
+    if column_cache is not None:
+        _worker_cache = ColumnCache(column_cache or None, config=_worker_config, logger=log.excel)
+    if state is not None:
+        _worker_state = ReconciliationState(state or None)
+    _worker_statement_format = statement_format
+    _worker_matcher = ReconciliationMatcher(movements, **matcher_options) if movements is not None else None
+
+
+def _validate(validator: TransactionValidator, chunk: pd.DataFrame, delta: Optional[RowDelta]) -> ValidationResult:
+    """Valida un lote; con ``delta`` solo las filas modificadas y las demás toman su resultado guardado"""
+    if delta is None:
+        with metrics.stage("validate", rows=len(chunk)):
+            return validator.validate(chunk)
+    bitmap = delta.errors.astype(validator.bitmap_dtype)
+    changed = int(np.count_nonzero(delta.changed))
+    if changed:
+        with metrics.stage("validate", rows=changed):
+            bitmap[delta.changed] = validator.validate(chunk[delta.changed]).bitmap
+    return ValidationResult.from_bitmap(validator.rules, chunk.index.to_numpy(dtype="int64"), bitmap)
+
+
+def _match(
+    matcher: ReconciliationMatcher,
+    typed: pd.DataFrame,
+    used: np.ndarray,
+    delta: Optional[RowDelta]
+) -> pd.DataFrame:
+    """
+    Concilia un lote; con ``delta`` solo las filas pendientes y las demás toman su resultado guardado.
+
+    Los movimientos de las filas que conservan su resultado se reservan al
+    llegar a su lote, así los de filas borradas del archivo quedan libres. Si
+    el movimiento ya no existe o lo tomó otra fila, la fila se concilia de nuevo.
+    """
+    if delta is None:
+        with metrics.stage("match", rows=len(typed)):
+            return matcher.match(typed, used)
+    kept = ~delta.pending & np.fromiter((isinstance(value, str) for value in delta.movement_id), bool, len(typed))
+    if kept.any():
+        lost = kept.copy()
+        lost[kept] = ~matcher.claim(used, delta.movement_id[kept])
+        delta.pending |= lost
+    matches = pd.DataFrame(
+        {
+            "match_type": pd.Series(delta.match_type, index=typed.index, dtype=object),
+            "movement_id": pd.Series(delta.movement_id, index=typed.index, dtype=object),
+            "confidence": pd.Series(delta.confidence, index=typed.index, dtype="float64"),
+        }
+    )
+    pending = int(np.count_nonzero(delta.pending))
+    if pending:
+        with metrics.stage("match", rows=pending):
+            matches.loc[delta.pending] = matcher.match(typed[delta.pending], used)
+    matches["match_type"] = matches["match_type"].fillna(MATCH_NONE)
+    return matches
+
+
+def process_workbook(
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    config: Optional[ExcelConfigProvider] = None,
+    matcher: Optional[ReconciliationMatcher] = None,
+    progress: Optional[Callable[[int], None]] = None,
+    cache: Optional[ColumnCache] = None,
+    statement_format: Optional[StatementFormat] = None,
+    state: Optional[ReconciliationState] = None
+) -> WorkbookSummary:
+    """
+    Lee, valida, verifica el saldo y concilia un archivo en una sola pasada.
+
+    Args:
+        path: Ruta al archivo Excel o al extracto
+        chunk_size: Filas por lote de lectura
+        config: Configuración de Excel; por defecto la del proceso
+        matcher: Emparejador con los movimientos de SIIGO; sin él se omite la conciliación
+        progress: Función que recibe las filas procesadas hasta el momento tras
+            cada lote; las excepciones que no derivan de ``Exception`` (como la
+            cancelación de un trabajo de la interfaz) detienen el procesamiento
+        cache: Caché de columnas; si se indica, el archivo se lee con openpyxl
+            solo la primera vez y después desde la caché
+        statement_format: Formato de los extractos CSV o de ancho fijo; los
+            archivos .csv, .txt y .prn se leen con ``StatementReader``
+        state: Estado de la ejecución anterior; si se indica, solo se validan
+            y concilian las filas nuevas o modificadas, y las demás toman el
+            resultado guardado, así que los totales no cambian
+
+    Returns:
+        WorkbookSummary: Resultado del archivo; los errores quedan en ``error``
+    """
+    config = config or _worker_config or ExcelConfigProvider()
+    matcher = matcher or _worker_matcher
+    cache = cache or _worker_cache
+    state = state or _worker_state
+    statement_format = statement_format or _worker_statement_format
+    summary = WorkbookSummary(path=str(path))
+    started = time.perf_counter()
+    try:
+        if is_statement(path):
+            chunks = StatementReader(
+                path, config=config, chunk_size=chunk_size, statement_format=statement_format, logger=log.excel
+            ).iter_chunks(typed=False)
+        elif cache is not None:
+            chunks = cache.iter_chunks(path, chunk_size, raw=True)
+        else:
+            chunks = TransactionReader(path, config=config, chunk_size=chunk_size, logger=log.excel).iter_chunks(typed=False)
+        validator = TransactionValidator(config)
+        checker = BalanceChecker()
+        checkpoint: Optional[BalanceCheckpoint] = None
+        used = matcher.new_session() if matcher is not None else None
+        summary.error_counts = {rule.column: 0 for rule in validator.rules}
+
+        session = None
+        if state is not None:
+            # Cambiar la ventana o la tolerancia de la conciliación descarta el estado guardado
+            options = matcher.options_hash() if matcher is not None else "-"
+            session = state.session(path, f"{config.content_hash()}:{options}")
+
+        for chunk in chunks:
+            with metrics.stage("coerce", rows=len(chunk)):
+                typed = coerce_transactions(chunk.copy(), config)
+            delta = session.diff(typed, chunk) if session is not None else None
+
+            validation = _validate(validator, chunk, delta)
+            summary.rows += len(chunk)
+            summary.invalid_rows += validation.error_count
+            for rule, count in validation.counts.items():
+                summary.error_counts[rule] += count
+
+            if summary.balance_drift_row is None:
+                with metrics.stage("balance", rows=len(typed)):
+                    balance = checker.verify(typed, checkpoint)
+                summary.balance_drift_row = balance.first_drift_row
+                checkpoint = balance.checkpoint
+
+            matches = None
+            if matcher is not None:
+                matches = _match(matcher, typed, used, delta)
+                counts = matcher.summarize(matches)
+                for kind, count in counts.items():
+                    summary.matches[kind] = summary.matches.get(kind, 0) + count
+
+            if delta is not None:
+                summary.skipped_rows += delta.skipped
+                session.record(typed, delta, validation.bitmap, matches)
+
+            if progress is not None:
+                progress(summary.rows)
+
+        if session is not None:
+            session.commit()
+        summary.elapsed = round(time.perf_counter() - started, 3)
+        log.excel.info(
+            "Archivo procesado",
+            file=str(path),
+            rows=summary.rows,
+            invalid_rows=summary.invalid_rows,
+            balance_drift_row=summary.balance_drift_row,
+            matches=summary.matches,
+            skipped_rows=summary.skipped_rows,
+            elapsed=summary.elapsed
+        )
+    except Exception as e:
+        summary.error = str(e)
+        summary.elapsed = round(time.perf_counter() - started, 3)
+        log.error.error(f"Error al procesar {path}: {e}", exc_info=True, file=str(path))
+    if _worker_instrumented:
+        summary.metrics = metrics.drain()
+    return summary
+
+
+def load_movements(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    Carga los movimientos de SIIGO exportados a CSV o Excel.
+
+    El archivo debe tener las columnas ``id``, ``date``, ``amount`` y ``counterparty``.
+    """
+    path = Path(path)
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        movements = pd.read_excel(path)
+    else:
+        movements = pd.read_csv(path)
+    movements["date"] = pd.to_datetime(movements["date"], errors="coerce")
+    return movements
+
+
+def run_batch(
+    directory: Union[str, Path],
+    movements: Optional[pd.DataFrame] = None,
+    pattern: str = "*.xlsx",
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    matcher_options: Optional[Dict[str, Any]] = None,
+    column_cache: Optional[Union[str, Path]] = None,
+    state: Optional[Union[str, Path]] = None,
+    statement_format: Optional[StatementFormat] = None,
+    proveedores: Optional[Sequence[str]] = None
+) -> BatchSummary:
+    """
+    Procesa en paralelo todos los archivos de un directorio.
+
+    Cada proceso hijo construye el índice de movimientos una sola vez y envía
+    sus registros de log por una cola al proceso principal, que es el único
+    que escribe en los archivos de log.
+
+    Args:
+        directory: Directorio con las plantillas diligenciadas
+        movements: Movimientos de SIIGO para conciliar; opcional
+        pattern: Patrón de archivos a procesar
+        max_workers: Procesos en paralelo; por defecto el número de CPUs
+        chunk_size: Filas por lote de lectura
+        matcher_options: Argumentos para ``ReconciliationMatcher``
+        column_cache: Carpeta de la caché de columnas ('' para la carpeta por
+            defecto); None para leer siempre los archivos con openpyxl
+        state: Archivo SQLite con el estado de la ejecución anterior ('' para
+            el archivo por defecto); None para procesar todas las filas
+        statement_format: Formato de los extractos CSV o de ancho fijo del directorio
+        proveedores: Nombres válidos de "Proveedor/Cliente"; por defecto los de
+            SIIGO, consultados una vez para todos los procesos
+
+    Returns:
+        BatchSummary: Resultados por archivo y totales
+    """
+    files: Sequence[Path] = sorted(
+        path for path in Path(directory).glob(pattern) if not path.name.startswith("~$")
+    )
+    summary = BatchSummary()
+    if not files:
+        log.app.warning("No se encontraron archivos para procesar", directory=str(directory), pattern=pattern)
+        return summary
+
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(files)))
+    log.app.info("Procesamiento por lotes iniciado", directory=str(directory), files=len(files), workers=workers)
+
+    # Forzar la creación de los handlers del proceso principal antes de despachar
+    for logger_type in LOGGER_TYPES:
+        getattr(log, logger_type)
+
+    if proveedores is None:
+        proveedores = load_counterparty_names()
+
+    started = time.perf_counter()
+    context = multiprocessing.get_context()
+    queue = context.Queue()
+    listener = QueueListener(queue, _DispatchHandler())
+    listener.start()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(
+                queue, movements, matcher_options or {}, metrics.enabled,
+                None if column_cache is None else str(column_cache),
+                None if state is None else str(state),
+                statement_format,
+                None if proveedores is None else list(proveedores)
+            )
+        ) as executor:
+            summary.workbooks = list(executor.map(process_workbook, files, [chunk_size] * len(files)))
+    finally:
+        listener.stop()
+        queue.close()
+
+    for workbook in summary.workbooks:
+        if workbook.metrics:
+            metrics.merge(workbook.metrics)
+        workbook.metrics = None
+
+    summary.elapsed = time.perf_counter() - started
+    log.app.info("Procesamiento por lotes finalizado", **summary.totals)
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Procesa en paralelo un directorio de plantillas de transacciones")
+    parser.add_argument("directory", help="Directorio con los archivos Excel")
+    parser.add_argument("--movements", help="CSV o Excel con los movimientos de SIIGO (id, date, amount, counterparty)")
+    parser.add_argument("--pattern", default="*.xlsx", help="Patrón de archivos a procesar")
+    parser.add_argument("--workers", type=int, default=None, help="Número de procesos (por defecto, CPUs disponibles)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Filas por lote de lectura")
+    parser.add_argument("--date-window", type=int, default=3, help="Días de diferencia para coincidencias aproximadas")
+    parser.add_argument("--amount-tolerance", type=float, default=0.0, help="Diferencia de monto permitida")
+    parser.add_argument("--output", help="Archivo JSON donde guardar el resumen")
+    parser.add_argument("--metrics", help="Archivo donde exportar las métricas (.json o texto de Prometheus)")
+    parser.add_argument("--metrics-interval", type=float, default=0.0, help="Segundos entre resúmenes de métricas en el log")
+    parser.add_argument(
+        "--column-cache", nargs="?", const="", default=None,
+        help="Reutilizar las columnas ya leídas de cada archivo (carpeta opcional; por defecto cache/columns)"
+    )
+    parser.add_argument(
+        "--incremental", nargs="?", const="", default=None, metavar="STATE",
+        help="Procesar solo las filas nuevas o modificadas desde la ejecución anterior "
+             "(archivo de estado opcional; por defecto cache/reconciliation_state.sqlite3)"
+    )
+    parser.add_argument(
+        "--statement-format", metavar="JSON",
+        help="Archivo JSON con el formato de los extractos CSV o de ancho fijo (campos de StatementFormat)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.metrics or args.metrics_interval:
+        metrics.enable(summary_interval=args.metrics_interval)
+
+    movements = load_movements(args.movements) if args.movements else None
+    summary = run_batch(
+        args.directory,
+        movements=movements,
+        pattern=args.pattern,
+        max_workers=args.workers,
+        chunk_size=args.chunk_size,
+        matcher_options={"date_window": args.date_window, "amount_tolerance": args.amount_tolerance},
+        column_cache=args.column_cache,
+        state=args.incremental,
+        statement_format=StatementFormat.load(args.statement_format) if args.statement_format else None
+    )
+
+    if metrics.enabled:
+        metrics.log_summary()
+        if args.metrics:
+            metrics.export(args.metrics)
+
+    report = json.dumps(summary.to_dict(), ensure_ascii=False, indent=2, default=str)
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+    return 1 if summary.totals["failed_files"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,6 +4,6 @@ Proporciona configuraciones centralizadas y sistema de logging.
 """
 
 from .loggers.logger_facade import log
-from .settings import Settings
+from .settings import Settings, get_settings
 
-__all__ = ['log', 'Settings']
\ No newline at end of file
+__all__ = ['log', 'Settings', 'get_settings']
\ No newline at end of file
@@ -4,7 +4,6 @@ Formateador personalizado para logs en formato JSON
 from datetime import datetime
 from pythonjsonlogger.json import JsonFormatter
 from typing import Any, Dict
-from ..settings import settings
 
 class JsonLogFormatter(JsonFormatter):
     """Formateador personalizado para logs en formato JSON"""
@@ -0,0 +1,232 @@
+"""
+Handler de archivo con rotación por tamaño o tiempo y compresión en segundo plano
+"""
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from logging.handlers import BaseRotatingHandler
+from pathlib import Path
+from typing import List, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional; sin él se comprime con gzip
+    zstandard = None
+
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+
+_EXTENSIONS = {COMPRESSION_NONE: "", COMPRESSION_GZIP: ".gz", COMPRESSION_ZSTD: ".zst"}
+
+# Intervalos de rotación por tiempo admitidos en ``rotation_when``
+_INTERVALS = {"H": 3600, "D": 86400}
+WHEN_MIDNIGHT = "MIDNIGHT"
+
+
+def _compress_gzip(source: Path, target: Path) -> None:
+    with open(source, "rb") as src, gzip.open(target, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _compress_zstd(source: Path, target: Path) -> None:
+    compressor = zstandard.ZstdCompressor(level=3)
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        compressor.copy_stream(src, dst)
+
+
+class _Archiver:
+    """Hilo que comprime los archivos rotados y aplica la retención"""
+
+    def __init__(self, handler: "CompressingRotatingFileHandler"):
+        self.handler = handler
+        self.jobs: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, path: Path) -> None:
+        # El hilo se crea con la primera rotación; los logs que nunca rotan no lo necesitan
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="log-archiver", daemon=True)
+            self._thread.start()
+        self.jobs.put(path)
+
+    def _run(self) -> None:
+        while True:
+            path = self.jobs.get()
+            try:
+                if path is None:
+                    return
+                self.handler.archive(path)
+            except Exception:
+                # Igual que en emit: un fallo al archivar no debe detener la aplicación
+                self.handler.handleError(logging.makeLogRecord({"msg": f"Error al archivar {path}"}))
+            finally:
+                self.jobs.task_done()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.jobs.put(None)
+            self._thread.join()
+
+
+class CompressingRotatingFileHandler(BaseRotatingHandler):
+    """
+    Rota el archivo de log por tamaño o por tiempo y comprime los archivos rotados.
+
+    El hilo que registra solo cierra y renombra el archivo actual; la
+    compresión (gzip, o zstd si ``zstandard`` está instalado) y la limpieza de
+    archivos antiguos se hacen en un hilo aparte. Los archivos rotados se
+    nombran con la fecha y hora de la rotación, por ejemplo
+    ``app.20240131-235959.log.gz``.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        backup_count: int = 0,
+        when: str = "",
+        compression: str = COMPRESSION_GZIP,
+        max_total_size: int = 0,
+        encoding: Optional[str] = "utf-8",
+        delay: bool = False
+    ):
+        """
+        Inicializa el handler.
+
+        Args:
+            filename: Ruta al archivo de log
+            max_bytes: Tamaño que dispara la rotación (0 = sin rotación por tamaño)
+            backup_count: Máximo de archivos rotados a conservar (0 = sin límite)
+            when: 'H' (cada hora), 'D' (cada día), 'midnight' o '' para no rotar por tiempo
+            compression: 'gzip', 'zstd' o 'none'
+            max_total_size: Bytes máximos que pueden ocupar los archivos rotados (0 = sin límite)
+            encoding: Codificación del archivo
+            delay: Abrir el archivo en la primera escritura
+        """
+        compression = (compression or COMPRESSION_NONE).lower()
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Compresión desconocida: {compression}")
+        if compression == COMPRESSION_ZSTD and zstandard is None:
+            compression = COMPRESSION_GZIP
+        when = (when or "").upper()
+        if when and when not in _INTERVALS and when != WHEN_MIDNIGHT:
+            raise ValueError(f"Intervalo de rotación desconocido: {when}")
+
+        super().__init__(filename, "a", encoding=encoding, delay=delay)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.when = when
+        self.compression = compression
+        self.max_total_size = max_total_size
+        self.rollover_at = self._next_rollover(time.time())
+        self._archiver = _Archiver(self)
+
+    def _next_rollover(self, now: float) -> Optional[float]:
+        """Calcula el instante de la próxima rotación por tiempo"""
+        if not self.when:
+            return None
+        if self.when == WHEN_MIDNIGHT:
+            local = time.localtime(now)
+            return time.mktime((local.tm_year, local.tm_mon, local.tm_mday + 1, 0, 0, 0, 0, 0, -1))
+        interval = _INTERVALS[self.when]
+        return now - now % interval + interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """
+        Indica si hay que rotar antes de escribir el registro.
+
+        A diferencia de ``RotatingFileHandler`` no formatea el registro para
+        medirlo: se rota cuando el archivo ya alcanzó ``max_bytes``, así que
+        puede excederlo en a lo sumo un registro.
+        """
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            return self.stream.tell() >= self.max_bytes
+        return False
+
+    def doRollover(self) -> None:
+        """Renombra el archivo actual y encarga su compresión al hilo de archivo"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        source = Path(self.baseFilename)
+        if source.exists() and source.stat().st_size > 0:
+            target = self._rotated_name(source)
+            os.replace(source, target)
+            self._archiver.submit(target)
+        self.rollover_at = self._next_rollover(time.time())
+        if not self.delay:
+            self.stream = self._open()
+
+    def _rotated_name(self, source: Path) -> Path:
+        """Nombre con fecha y hora para el archivo rotado, sin pisar uno existente"""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        extension = _EXTENSIONS[self.compression]
+        candidate = source.with_name(f"{source.stem}.{stamp}{source.suffix}")
+        counter = 1
+        while candidate.exists() or Path(f"{candidate}{extension}").exists():
+            candidate = source.with_name(f"{source.stem}.{stamp}_{counter}{source.suffix}")
+            counter += 1
+        return candidate
+
+    def archives(self) -> List[Path]:
+        """Archivos rotados de este log, del más antiguo al más reciente"""
+        source = Path(self.baseFilename)
+        return sorted(
+            path for path in source.parent.glob(f"{source.stem}.*{source.suffix}*")
+            if path != source and not path.name.endswith(".tmp")
+        )
+
+    def archive(self, path: Path) -> None:
+        """
+        Comprime un archivo rotado y aplica la retención.
+
+        Se ejecuta en el hilo de archivo; la compresión escribe primero un
+        temporal para no dejar archivos comprimidos a medias.
+        """
+        if self.compression != COMPRESSION_NONE and path.exists():
+            target = Path(f"{path}{_EXTENSIONS[self.compression]}")
+            temporary = Path(f"{target}.tmp")
+            if self.compression == COMPRESSION_ZSTD:
+                _compress_zstd(path, temporary)
+            else:
+                _compress_gzip(path, temporary)
+            os.replace(temporary, target)
+            path.unlink()
+        self.apply_retention()
+
+    def apply_retention(self) -> None:
+        """Elimina los archivos rotados más antiguos que excedan la cantidad o el tamaño total"""
+        archives = self.archives()
+        if self.backup_count > 0:
+            for path in archives[:-self.backup_count]:
+                path.unlink(missing_ok=True)
+            archives = archives[-self.backup_count:]
+        if self.max_total_size > 0:
+            sizes = [path.stat().st_size for path in archives]
+            total = sum(sizes)
+            for path, size in zip(archives, sizes):
+                if total <= self.max_total_size:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+
+    def wait(self) -> None:
+        """Espera a que el hilo de archivo termine los trabajos pendientes"""
+        if self._archiver is not None:
+            self._archiver.jobs.join()
+
+    def close(self) -> None:
+        """Cierra el archivo y espera a que se compriman los archivos ya rotados"""
+        archiver, self._archiver = getattr(self, "_archiver", None), None
+        if archiver is not None:
+            archiver.stop()
+        super().close()
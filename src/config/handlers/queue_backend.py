@@ -0,0 +1,205 @@
+"""
+Backend de logging asíncrono basado en QueueHandler/QueueListener
+"""
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional
+
+POLICY_BLOCK = "block"
+POLICY_DROP = "drop"
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    QueueHandler que aplica la política configurada cuando la cola está llena.
+
+    Con la política ``drop`` se descartan los registros DEBUG e INFO; los
+    WARNING y superiores siempre esperan lugar en la cola para no perderse.
+    """
+
+    def __init__(self, log_queue: queue.Queue, backend: "AsyncLogBackend"):
+        super().__init__(log_queue)
+        self.backend = backend
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Fija el mensaje en el hilo que registra.
+
+        El listener vive en el mismo proceso, así que ``exc_info`` se conserva
+        para que el formateador lo serialice como hasta ahora.
+        """
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.backend.policy == POLICY_BLOCK or record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.backend.record_drop()
+
+
+class _RoutingListener(QueueListener):
+    """QueueListener que entrega cada registro a los handlers del logger que lo emitió"""
+
+    def __init__(self, log_queue: queue.Queue, backend: "AsyncLogBackend"):
+        super().__init__(log_queue, respect_handler_level=True)
+        self.backend = backend
+
+    def handle(self, record: logging.LogRecord) -> None:
+        with self.backend.lock:
+            for handler in self.backend.routes.get(record.name, ()):
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # La cola puede estar llena; esperar lugar en vez de fallar
+        self.queue.put(self._sentinel)
+
+
+class AsyncLogBackend:
+    """
+    Desacopla la escritura de logs del hilo que los genera.
+
+    Los loggers asociados solo encolan registros; un único hilo listener hace
+    el formateo JSON, la escritura en archivo y la rotación.
+    """
+
+    def __init__(self, queue_size: int = 10000, policy: str = POLICY_BLOCK):
+        """
+        Inicializa el backend.
+
+        Args:
+            queue_size: Capacidad máxima de la cola (0 = ilimitada)
+            policy: 'block' para esperar cuando la cola esté llena o 'drop'
+                para descartar registros de baja severidad
+        """
+        if policy not in (POLICY_BLOCK, POLICY_DROP):
+            raise ValueError(f"Política de cola desconocida: {policy}")
+        self.policy = policy
+        self.queue: queue.Queue = queue.Queue(maxsize=max(queue_size, 0))
+        self.routes: Dict[str, List[logging.Handler]] = {}
+        self.lock = threading.RLock()
+        self.dropped = 0
+        self._listener: Optional[_RoutingListener] = None
+
+    def attach(self, logger: logging.Logger) -> None:
+        """
+        Mueve los handlers actuales del logger al listener y deja solo el QueueHandler.
+
+        Si el logger ya estaba asociado, sus handlers anteriores se cierran.
+
+        Args:
+            logger: Logger ya configurado con sus handlers de archivo y consola
+        """
+        handlers = [h for h in logger.handlers if not isinstance(h, BoundedQueueHandler)]
+        for handler in logger.handlers[:]:
+            logger.removeHandler(handler)
+        with self.lock:
+            previous = self.routes.get(logger.name, [])
+            self.routes[logger.name] = handlers
+        for handler in previous:
+            if handler not in handlers:
+                handler.close()
+        logger.addHandler(BoundedQueueHandler(self.queue, self))
+        self.start()
+
+    def detach(self, logger: logging.Logger, close: bool = True) -> None:
+        """
+        Quita el QueueHandler del logger y deja de enrutarle registros.
+
+        Los registros ya encolados se escriben antes de soltar los handlers.
+
+        Args:
+            logger: Logger asociado con ``attach``
+            close: Cerrar los handlers que tenía el listener; con False se
+                devuelven al logger, como estaban antes de ``attach``
+        """
+        for handler in logger.handlers[:]:
+            if isinstance(handler, BoundedQueueHandler) and handler.backend is self:
+                logger.removeHandler(handler)
+        self.flush()
+        with self.lock:
+            handlers = self.routes.pop(logger.name, [])
+        for handler in handlers:
+            if close:
+                handler.close()
+            else:
+                logger.addHandler(handler)
+
+    def start(self) -> None:
+        """Inicia el hilo listener si no está corriendo"""
+        with self.lock:
+            if self._listener is None:
+                self._listener = _RoutingListener(self.queue, self)
+                self._listener.start()
+
+    def flush(self) -> None:
+        """Espera a que se escriban todos los registros encolados"""
+        if self._listener is not None:
+            self.queue.join()
+        with self.lock:
+            for handlers in self.routes.values():
+                for handler in handlers:
+                    handler.flush()
+
+    def stop(self) -> None:
+        """Procesa los registros pendientes y detiene el listener"""
+        with self.lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+        self.flush()
+
+    def matches(self, queue_size: int, policy: str) -> bool:
+        """True si el backend fue creado con esta capacidad y política"""
+        return self.queue.maxsize == max(queue_size, 0) and self.policy == policy
+
+    def record_drop(self) -> None:
+        """Contabiliza un registro descartado por cola llena"""
+        with self.lock:
+            self.dropped += 1
+
+
+_backend: Optional[AsyncLogBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_async_backend(queue_size: int = 10000, policy: str = POLICY_BLOCK) -> AsyncLogBackend:
+    """
+    Retorna el backend asíncrono del proceso, creándolo en la primera llamada.
+
+    Si la capacidad o la política cambiaron en la configuración, el backend
+    anterior escribe sus registros pendientes, se detiene y sus loggers pasan
+    a uno nuevo. El backend se detiene al salir del intérprete para no perder
+    registros.
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None and not _backend.matches(queue_size, policy):
+            previous = _backend
+            loggers = [logging.getLogger(name) for name in list(previous.routes)]
+            for logger in loggers:
+                previous.detach(logger, close=False)
+            previous.stop()
+            atexit.unregister(previous.stop)
+            _backend = AsyncLogBackend(queue_size=queue_size, policy=policy)
+            atexit.register(_backend.stop)
+            for logger in loggers:
+                _backend.attach(logger)
+        if _backend is None:
+            _backend = AsyncLogBackend(queue_size=queue_size, policy=policy)
+            atexit.register(_backend.stop)
+        return _backend
+
+
+def current_async_backend() -> Optional[AsyncLogBackend]:
+    """Retorna el backend asíncrono del proceso sin crearlo, o None si nunca se usó"""
+    return _backend
@@ -1,9 +1,7 @@
 import os
 import logging
-from datetime import datetime
 from pathlib import Path
-from pythonjsonlogger import jsonlogger
-import coloredlogs
+from .formatters.fast_json_formatter import FastJsonLogFormatter
 
 # Definir constantes para los paths de logs
 BASE_DIR = Path(__file__).parent.parent.parent
@@ -13,26 +11,22 @@ ERROR_LOGS = LOGS_DIR / 'errors'
 EXCEL_LOGS = LOGS_DIR / 'excel'
 SIIGO_LOGS = LOGS_DIR / 'siigo'
 
-# Asegurar que los directorios de logs existan
-for dir_path in [APP_LOGS, ERROR_LOGS, EXCEL_LOGS, SIIGO_LOGS]:
-    dir_path.mkdir(parents=True, exist_ok=True)
-
-class CustomJsonFormatter(jsonlogger.JsonFormatter):
-    def add_fields(self, log_record, record, message_dict):
-        super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
-        log_record['timestamp'] = datetime.utcnow().isoformat()
-        log_record['level'] = record.levelname
-        log_record['module'] = record.module
+class CustomJsonFormatter(FastJsonLogFormatter):
+    """Formateador JSON de los loggers de este módulo; el nombre del logger va en 'name'"""
+    logger_field = 'name'
 
 def setup_logger(name, log_file, level=logging.INFO):
     """Configura un logger específico con manejo de archivos y formato JSON"""
+    import coloredlogs
+
     logger = logging.getLogger(name)
     logger.setLevel(level)
     
     # Manejador de archivo
+    Path(log_file).parent.mkdir(parents=True, exist_ok=True)
     file_handler = logging.FileHandler(log_file)
     file_handler.setLevel(level)
-    formatter = CustomJsonFormatter('%(timestamp)s %(level)s %(name)s %(module)s %(message)s')
+    formatter = CustomJsonFormatter()
     file_handler.setFormatter(formatter)
     
     # Manejador de consola con colores
@@ -45,8 +39,18 @@ def setup_logger(name, log_file, level=logging.INFO):
     
     return logger
 
-# Configurar loggers específicos
-app_logger = setup_logger('app', APP_LOGS / 'app.log')
-error_logger = setup_logger('error', ERROR_LOGS / 'error.log', level=logging.ERROR)
-excel_logger = setup_logger('excel', EXCEL_LOGS / 'excel.log')
-siigo_logger = setup_logger('siigo', SIIGO_LOGS / 'siigo.log')
+# Loggers específicos; cada uno se configura la primera vez que se usa
+_LOGGERS = {
+    'app_logger': ('app', APP_LOGS / 'app.log', logging.INFO),
+    'error_logger': ('error', ERROR_LOGS / 'error.log', logging.ERROR),
+    'excel_logger': ('excel', EXCEL_LOGS / 'excel.log', logging.INFO),
+    'siigo_logger': ('siigo', SIIGO_LOGS / 'siigo.log', logging.INFO),
+}
+
+def __getattr__(name):
+    if name in _LOGGERS:
+        logger_name, log_file, level = _LOGGERS[name]
+        logger = setup_logger(logger_name, log_file, level=level)
+        globals()[name] = logger
+        return logger
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
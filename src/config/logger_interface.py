@@ -1,25 +1,26 @@
-from .log_config import app_logger, error_logger, excel_logger, siigo_logger
+# Los loggers de log_config se crean al primer uso
+from . import log_config
 
 class Logger:
     @staticmethod
     def app(message, level='info'):
         """Log mensajes generales de la aplicación"""
-        getattr(app_logger, level.lower())(message)
+        getattr(log_config.app_logger, level.lower())(message)
 
     @staticmethod
     def error(message, exc_info=None):
         """Log errores críticos"""
-        error_logger.error(message, exc_info=exc_info)
+        log_config.error_logger.error(message, exc_info=exc_info)
 
     @staticmethod
     def excel(message, level='info'):
         """Log operaciones relacionadas con Excel"""
-        getattr(excel_logger, level.lower())(message)
+        getattr(log_config.excel_logger, level.lower())(message)
 
     @staticmethod
     def siigo(message, level='info'):
         """Log operaciones relacionadas con SIIGO"""
-        getattr(siigo_logger, level.lower())(message)
+        getattr(log_config.siigo_logger, level.lower())(message)
 
 # Crear una instancia global para uso fácil
 log = Logger()
@@ -2,12 +2,35 @@
 Implementación base del logger
 """
 import logging
-from logging.handlers import RotatingFileHandler
 from typing import Any, Optional
-import coloredlogs
 from ..interfaces.logger_interface import ILogger
-from ..formatters.json_formatter import JsonLogFormatter
-from ..settings import settings
+from ..formatters.fast_json_formatter import FastJsonLogFormatter
+from ..handlers.compressing_handler import CompressingRotatingFileHandler
+from ..handlers.queue_backend import current_async_backend, get_async_backend
+from ..settings import get_settings
+
+_SIZE_UNITS = {
+    'B': 1,
+    'KB': 1024,
+    'MB': 1024 * 1024,
+    'GB': 1024 * 1024 * 1024
+}
+
+def parse_size(size_str: str) -> int:
+    """
+    Convierte una cadena de tamaño (ej: '1 MB') a bytes.
+    
+    Args:
+        size_str: Cadena que representa el tamaño (ej: '1 MB', '500 KB'); sin
+            unidad se interpreta en bytes
+        
+    Returns:
+        int: Tamaño en bytes
+    """
+    parts = size_str.split()
+    size = int(parts[0])
+    unit = parts[1].upper() if len(parts) > 1 else 'B'
+    return size * _SIZE_UNITS.get(unit, 1)
 
 class BaseLogger(ILogger):
     """Implementación base del logger que cumple con la interfaz ILogger"""
@@ -23,27 +46,53 @@ class BaseLogger(ILogger):
         self.name = name
         self.log_file = log_file
         self.logger = self._setup_logger()
+
+    def reconfigure(self, log_file: str) -> None:
+        """
+        Vuelve a crear los handlers con la configuración actual.
+        
+        Args:
+            log_file: Ruta al archivo de log
+        """
+        self.log_file = log_file
+        self.logger = self._setup_logger()
     
     def _setup_logger(self) -> logging.Logger:
         """Configura y retorna un logger con rotación de archivos"""
+        # coloredlogs es costoso de importar; solo se carga al crear el primer logger
+        import coloredlogs
+
+        settings = get_settings()
         logger = logging.getLogger(self.name)
 
         # Configurar nivel DEBUG para el logger principal
         level = logging.DEBUG
         logger.setLevel(level)
 
-        # Eliminar handlers existentes
+        # Si el modo asíncrono se desactivó, escribir lo pendiente y cerrar
+        # los handlers que el listener tenía para este logger
+        if not settings.logging.async_enabled:
+            backend = current_async_backend()
+            if backend is not None:
+                backend.detach(logger)
+
+        # Eliminar y cerrar los handlers existentes para no dejar archivos abiertos
         for handler in logger.handlers[:]:
             logger.removeHandler(handler)
+            handler.close()
 
-        # Handler de archivo con rotación
-        file_handler = RotatingFileHandler(
+        # Handler de archivo con rotación; la compresión de los archivos
+        # rotados se hace en segundo plano
+        file_handler = CompressingRotatingFileHandler(
             self.log_file,
-            maxBytes=self._parse_size(settings.logging.rotation_size),
-            backupCount=settings.logging.backup_count
+            max_bytes=parse_size(settings.logging.rotation_size),
+            backup_count=settings.logging.backup_count,
+            when=settings.logging.rotation_when,
+            compression=settings.logging.compression,
+            max_total_size=parse_size(settings.logging.max_total_size)
         )
         file_handler.setLevel(level)
-        file_handler.setFormatter(JsonLogFormatter())
+        file_handler.setFormatter(FastJsonLogFormatter())
         logger.addHandler(file_handler)
 
         # Handler de consola con colores
@@ -52,29 +101,16 @@ class BaseLogger(ILogger):
         coloredlogs.install(level=level, logger=logger)
         logger.addHandler(console_handler)
 
+        # En modo asíncrono el formateo y la escritura pasan al hilo del listener
+        if settings.logging.async_enabled:
+            backend = get_async_backend(settings.logging.queue_size, settings.logging.queue_full_policy)
+            backend.attach(logger)
+
         return logger
     
     def _parse_size(self, size_str: str) -> int:
-        """
-        Convierte una cadena de tamaño (ej: '1 MB') a bytes.
-        
-        Args:
-            size_str: Cadena que representa el tamaño (ej: '1 MB', '500 KB')
-            
-        Returns:
-            int: Tamaño en bytes
-        """
-        size = int(size_str.split()[0])
-        unit = size_str.split()[1].upper()
-        
-        units = {
-            'B': 1,
-            'KB': 1024,
-            'MB': 1024 * 1024,
-            'GB': 1024 * 1024 * 1024
-        }
-        
-        return size * units.get(unit, 1)
+        """Equivalente a ``parse_size``; se conserva por compatibilidad"""
+        return parse_size(size_str)
     
     def info(self, message: str, **kwargs: Any) -> None:
         self.logger.info(message, extra={'props': kwargs})
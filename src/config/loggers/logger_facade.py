@@ -1,19 +1,48 @@
 """
 Fachada para el sistema de logging
 """
-from typing import Dict
+import threading
+from typing import Dict, Tuple
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
 from ..interfaces.logger_interface import ILogger
 from .base_logger import BaseLogger
-from ..settings import settings
+from ..settings import get_settings
 
 class LoggerFactory:
-    """Factory para crear instancias de loggers"""
+    """
+    Registro de loggers por tipo.
+
+    Cada logger se configura una sola vez y se reutiliza en las consultas
+    siguientes; sus handlers solo se reconstruyen cuando cambia la
+    configuración de logging que los define. Obtener un logger ya creado
+    solo compara la tupla de esos valores con la del logger.
+    """
     
     def __init__(self):
-        self._loggers: Dict[str, ILogger] = {}
-        self._log_dir = settings.logging.log_dir
+        self._loggers: Dict[str, BaseLogger] = {}
+        self._fingerprints: Dict[str, Tuple] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def _log_dir(self) -> Path:
+        """Directorio de logs, leído de la configuración al crear cada logger"""
+        return get_settings().logging.log_dir
+
+    @staticmethod
+    def _fingerprint() -> Tuple:
+        """Valores de configuración de los que dependen los handlers de un logger"""
+        config = get_settings().logging
+        return (
+            config.log_dir,
+            config.rotation_size,
+            config.backup_count,
+            config.rotation_when,
+            config.compression,
+            config.max_total_size,
+            config.async_enabled,
+            config.queue_size,
+            config.queue_full_policy,
+        )
         
     def get_logger(self, logger_type: str) -> ILogger:
         """
@@ -25,33 +54,52 @@ class LoggerFactory:
         Returns:
             ILogger: Instancia del logger solicitado
         """
-        if logger_type not in self._loggers:
+        fingerprint = self._fingerprint()
+        logger = self._loggers.get(logger_type)
+        if logger is not None and self._fingerprints.get(logger_type) == fingerprint:
+            return logger
+
+        with self._lock:
+            logger = self._loggers.get(logger_type)
+            if logger is not None and self._fingerprints.get(logger_type) == fingerprint:
+                return logger
             log_file = self._log_dir / logger_type / f"{logger_type}.log"
             log_file.parent.mkdir(parents=True, exist_ok=True)
-            self._loggers[logger_type] = BaseLogger(logger_type, str(log_file))
-        else:
-            # Reinicializar el logger si ya existe
-            logger = self._loggers[logger_type].logger
-            for handler in logger.handlers[:]:
-                logger.removeHandler(handler)
-            log_file = self._log_dir / logger_type / f"{logger_type}.log"
-            max_bytes = BaseLogger("temp", "temp.log")._parse_size(settings.logging.rotation_size)
-            logger.addHandler(RotatingFileHandler(
-                str(log_file),
-                maxBytes=max_bytes,
-                backupCount=settings.logging.backup_count
-            ))
-        return self._loggers[logger_type]
+            if logger is None:
+                logger = BaseLogger(logger_type, str(log_file))
+                self._loggers[logger_type] = logger
+            else:
+                # La configuración cambió: reconstruir los handlers del mismo logger
+                logger.reconfigure(str(log_file))
+            self._fingerprints[logger_type] = fingerprint
+        return logger
 
 class LoggerFacade:
-    """Fachada para acceder a todos los loggers de manera simple"""
+    """
+    Fachada para acceder a todos los loggers de manera simple.
+
+    Cada logger, con su archivo y sus handlers, se crea la primera vez que se
+    accede a él; crear la fachada no abre archivos ni lee la configuración.
+    """
     
     def __init__(self):
         self._factory = LoggerFactory()
-        self.app = self._factory.get_logger('app')
-        self.error = self._factory.get_logger('error')
-        self.excel = self._factory.get_logger('excel')
-        self.siigo = self._factory.get_logger('siigo')
+
+    @property
+    def app(self) -> ILogger:
+        return self._factory.get_logger('app')
+
+    @property
+    def error(self) -> ILogger:
+        return self._factory.get_logger('error')
+
+    @property
+    def excel(self) -> ILogger:
+        return self._factory.get_logger('excel')
+
+    @property
+    def siigo(self) -> ILogger:
+        return self._factory.get_logger('siigo')
 
 # Instancia global de la fachada
 log = LoggerFacade()
@@ -4,7 +4,8 @@ Configuración general de la aplicación
 import os
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 import configparser
 
 @dataclass
@@ -13,6 +14,17 @@ class SiigoConfig:
     api_url: str
     api_key: str
     tenant_id: str
+    auth_url: str = "https://api.siigo.com/auth"
+    pool_maxsize: int = 10
+    timeout: float = 30.0
+    rate_limit: float = 10.0
+    rate_burst: int = 10
+    min_rate: float = 1.0
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    master_data_ttl: int = 3600
+    master_data_full_sync: int = 86400
 
 @dataclass
 class LoggingConfig:
@@ -20,7 +32,13 @@ class LoggingConfig:
     level: str = "INFO"
     rotation_size: str = "1 MB"
     backup_count: int = 5
+    rotation_when: str = ""
+    compression: str = "gzip"
+    max_total_size: str = "0"
     log_dir: Optional[Path] = None
+    async_enabled: bool = False
+    queue_size: int = 10000
+    queue_full_policy: str = "block"
 
 class Settings:
     """Clase principal de configuración de la aplicación"""
@@ -39,14 +57,31 @@ class Settings:
             level=self.config.get("logging", "level", fallback="INFO"),
             rotation_size=self.config.get("logging", "rotation_size", fallback="1 MB"),
             backup_count=self.config.getint("logging", "backup_count", fallback=5),
-            log_dir=self.base_dir / "logs"
+            rotation_when=self.config.get("logging", "rotation_when", fallback=""),
+            compression=self.config.get("logging", "compression", fallback="gzip"),
+            max_total_size=self.config.get("logging", "max_total_size", fallback="0"),
+            log_dir=self.base_dir / "logs",
+            async_enabled=self.config.getboolean("logging", "async", fallback=False),
+            queue_size=self.config.getint("logging", "queue_size", fallback=10000),
+            queue_full_policy=self.config.get("logging", "queue_full_policy", fallback="block")
         )
         
         # Configuración de SIIGO con valores por defecto
         self.siigo = SiigoConfig(
             api_url=self.config.get("siigo", "api_url", fallback="https://api.siigo.com/v1"),
             api_key=self.config.get("siigo", "api_key", fallback=""),
-            tenant_id=self.config.get("siigo", "tenant_id", fallback="")
+            tenant_id=self.config.get("siigo", "tenant_id", fallback=""),
+            auth_url=self.config.get("siigo", "auth_url", fallback="https://api.siigo.com/auth"),
+            pool_maxsize=self.config.getint("siigo", "pool_maxsize", fallback=10),
+            timeout=self.config.getfloat("siigo", "timeout", fallback=30.0),
+            rate_limit=self.config.getfloat("siigo", "rate_limit", fallback=10.0),
+            rate_burst=self.config.getint("siigo", "rate_burst", fallback=10),
+            min_rate=self.config.getfloat("siigo", "min_rate", fallback=1.0),
+            max_retries=self.config.getint("siigo", "max_retries", fallback=5),
+            backoff_base=self.config.getfloat("siigo", "backoff_base", fallback=0.5),
+            backoff_max=self.config.getfloat("siigo", "backoff_max", fallback=30.0),
+            master_data_ttl=self.config.getint("siigo", "master_data_ttl", fallback=3600),
+            master_data_full_sync=self.config.getint("siigo", "master_data_full_sync", fallback=86400)
         )
     
     def _load_config(self) -> None:
@@ -61,13 +96,30 @@ class Settings:
         self.config["logging"] = {
             "level": "INFO",
             "rotation_size": "1 MB",
-            "backup_count": "5"
+            "backup_count": "5",
+            "rotation_when": "",
+            "compression": "gzip",
+            "max_total_size": "0",
+            "async": "false",
+            "queue_size": "10000",
+            "queue_full_policy": "block"
         }
         
         self.config["siigo"] = {
             "api_url": "https://api.siigo.com/v1",
             "api_key": "",
-            "tenant_id": ""
+            "tenant_id": "",
+            "auth_url": "https://api.siigo.com/auth",
+            "pool_maxsize": "10",
+            "timeout": "30",
+            "rate_limit": "10",
+            "rate_burst": "10",
+            "min_rate": "1",
+            "max_retries": "5",
+            "backoff_base": "0.5",
+            "backoff_max": "30",
+            "master_data_ttl": "3600",
+            "master_data_full_sync": "86400"
         }
         
         with open(self.config_file, "w") as f:
@@ -77,5 +129,20 @@ class Settings:
         """Devuelve la configuración cargada."""
         return self.config
 
-# Instancia global de configuración
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Retorna la configuración global, leyéndola (o creándola) en la primera llamada.
+
+    Importar este módulo no toca el disco; el archivo .ini se procesa una
+    sola vez cuando alguien necesita la configuración.
+    """
+    return Settings()
+
+
+def __getattr__(name: str) -> Any:
+    # Compatibilidad con ``from .settings import settings``: la instancia
+    # global se construye al accederla por primera vez
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,167 @@
+"""
+Recalculo vectorizado del saldo acumulado (Saldo = Saldo anterior + Entró + Salió).
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class BalanceCheckpoint:
+    """Última fila verificada y su saldo, desde donde se puede reanudar la verificación"""
+    row: int
+    saldo: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializa el punto de control para guardarlo entre ejecuciones"""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BalanceCheckpoint":
+        """Reconstruye un punto de control serializado con ``to_dict``"""
+        return cls(row=int(data["row"]), saldo=float(data["saldo"]))
+
+
+@dataclass
+class BalanceReport:
+    """Resultado de verificar el saldo de un conjunto de filas"""
+    rows_checked: int
+    first_drift_row: Optional[int]
+    expected_saldo: Optional[float]
+    stored_saldo: Optional[float]
+    checkpoint: Optional[BalanceCheckpoint]
+
+    @property
+    def is_consistent(self) -> bool:
+        """True si ninguna fila supera la tolerancia"""
+        return self.first_drift_row is None
+
+
+class BalanceChecker:
+    """
+    Recalcula la columna Saldo con una suma acumulada y detecta desviaciones.
+
+    El recalculo usa el saldo esperado, no el almacenado, de modo que un error
+    en una fila se reporta en esa fila y no se arrastra a las siguientes.
+    """
+
+    def __init__(
+        self,
+        tolerance: float = 0.01,
+        opening_balance: float = 0.0,
+        entro_column: str = "Entró",
+        salio_column: str = "Salió",
+        saldo_column: str = "Saldo"
+    ):
+        """
+        Inicializa el verificador.
+
+        Args:
+            tolerance: Diferencia absoluta máxima permitida entre saldo almacenado y calculado
+            opening_balance: Saldo antes de la primera transacción
+            entro_column: Nombre de la columna de ingresos
+            salio_column: Nombre de la columna de egresos
+            saldo_column: Nombre de la columna de saldo
+        """
+        if tolerance < 0:
+            raise ValueError("La tolerancia no puede ser negativa")
+        self.tolerance = tolerance
+        self.opening_balance = opening_balance
+        self.entro_column = entro_column
+        self.salio_column = salio_column
+        self.saldo_column = saldo_column
+
+    def recompute(self, frame: pd.DataFrame, opening_balance: Optional[float] = None) -> pd.Series:
+        """
+        Calcula el saldo esperado de cada fila en una sola pasada.
+
+        Los montos vacíos cuentan como cero.
+
+        Args:
+            frame: Lote con las columnas Entró y Salió
+            opening_balance: Saldo inicial; por defecto el configurado
+
+        Returns:
+            pd.Series: Saldo esperado con el mismo índice que ``frame``
+        """
+        start = self.opening_balance if opening_balance is None else opening_balance
+        entro = pd.to_numeric(frame[self.entro_column], errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+        salio = pd.to_numeric(frame[self.salio_column], errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+        movement = entro + salio
+        return pd.Series(start + np.cumsum(movement), index=frame.index, name=self.saldo_column)
+
+    def verify(self, frame: pd.DataFrame, checkpoint: Optional[BalanceCheckpoint] = None) -> BalanceReport:
+        """
+        Verifica el saldo almacenado contra el calculado.
+
+        Si se indica un punto de control, solo se revisan las filas posteriores
+        a él y el cálculo parte de su saldo. Para no releer el historial, el
+        lector puede iniciar en ``checkpoint.row + 1``.
+
+        Args:
+            frame: Transacciones indexadas por número de fila
+            checkpoint: Última fila verificada en una ejecución anterior
+
+        Returns:
+            BalanceReport: Primera fila desviada y nuevo punto de control
+        """
+        return self.verify_chunks([frame], checkpoint)
+
+    def verify_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        checkpoint: Optional[BalanceCheckpoint] = None
+    ) -> BalanceReport:
+        """
+        Verifica el saldo a lo largo de varios lotes, arrastrando el saldo entre ellos.
+
+        La verificación se detiene en la primera desviación; el punto de control
+        retornado apunta a la última fila correcta antes de ella.
+
+        Args:
+            chunks: Lotes en orden de fila, como los entrega ``TransactionReader``
+            checkpoint: Última fila verificada en una ejecución anterior
+
+        Returns:
+            BalanceReport: Resultado de la verificación
+        """
+        saldo = checkpoint.saldo if checkpoint else self.opening_balance
+        last_row = checkpoint.row if checkpoint else None
+        checked = 0
+
+        for chunk in chunks:
+            if last_row is not None:
+                chunk = chunk[chunk.index > last_row]
+            if chunk.empty:
+                continue
+
+            expected = self.recompute(chunk, opening_balance=saldo).to_numpy()
+            stored = pd.to_numeric(chunk[self.saldo_column], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            drift = np.isnan(stored) | (np.abs(stored - expected) > self.tolerance)
+
+            if drift.any():
+                position = int(np.argmax(drift))
+                checked += position + 1
+                if position:
+                    last_row, saldo = int(chunk.index[position - 1]), float(expected[position - 1])
+                return BalanceReport(
+                    rows_checked=checked,
+                    first_drift_row=int(chunk.index[position]),
+                    expected_saldo=float(expected[position]),
+                    stored_saldo=None if np.isnan(stored[position]) else float(stored[position]),
+                    checkpoint=BalanceCheckpoint(last_row, saldo) if last_row is not None else None
+                )
+
+            checked += len(chunk)
+            saldo = float(expected[-1])
+            last_row = int(chunk.index[-1])
+
+        return BalanceReport(
+            rows_checked=checked,
+            first_drift_row=None,
+            expected_saldo=None,
+            stored_saldo=None,
+            checkpoint=BalanceCheckpoint(last_row, saldo) if last_row is not None else checkpoint
+        )
@@ -0,0 +1,451 @@
+"""
+Caché en disco de la hoja "Transacciones" ya leída, en columnas binarias.
+
+Leer un .xlsx con openpyxl es la etapa más lenta; cuando el mismo archivo se
+valida o concilia varias veces, la segunda lectura se hace desde esta caché:
+los montos y las fechas se abren con ``np.memmap`` sin copiarlos y el texto
+se guarda como códigos sobre una lista de valores distintos.
+
+Cada entrada se identifica por el hash del contenido del archivo y el de las
+columnas de ``ExcelConfigProvider`` (``schema_hash``), así que cambiar el
+archivo o el esquema produce otra entrada y la anterior no vuelve a usarse.
+Los extractos CSV o de ancho fijo se leen con ``StatementReader`` y su
+entrada incluye además el hash de su ``StatementFormat``.
+
+Estructura de una entrada (``<directorio>/<hash archivo>-<hash esquema>/``):
+
+* ``meta.json``: filas, columnas, tipos y valores que no se pudieron convertir
+* ``index.bin``: número de fila en Excel (int64)
+* ``<n>.bin``: columna ``n`` como float64, datetime64[ns] o códigos int32
+* ``<n>.labels.json``: valores distintos de las columnas de texto
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..utils.instrumentation import iter_timed, metrics
+from .excel_config import ExcelConfigProvider
+from .reader import DEFAULT_CHUNK_SIZE, TransactionReader, coerce_transactions
+from .statement_reader import StatementFormat, StatementReader, is_statement
+
+# Se incrementa cuando cambia el formato de las entradas; forma parte de su nombre
+CACHE_VERSION = 1
+
+# Tipo en disco de cada tipo de columna de la configuración
+_DTYPES = {"decimal": "float64", "date": "datetime64[ns]"}
+_CODES_DTYPE = "int32"
+
+
+def file_hash(path: Union[str, Path], block_size: int = 1024 * 1024) -> str:
+    """
+    Hash SHA-256 del contenido de un archivo, leído por bloques.
+
+    Args:
+        path: Archivo a resumir
+        block_size: Bytes por lectura
+
+    Returns:
+        str: Hash en hexadecimal
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def format_hash(statement_format: StatementFormat) -> str:
+    """Hash corto de un formato de extracto, para distinguir sus entradas"""
+    data = json.dumps(asdict(statement_format), sort_keys=True, ensure_ascii=False, default=list)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+class _EntryWriter:
+    """Escribe una entrada de la caché lote por lote, sin acumular las filas en memoria"""
+
+    def __init__(self, directory: Path, config: ExcelConfigProvider):
+        self.directory = directory
+        self.config = config
+        self.columns = list(config.headers_transacciones)
+        self.kinds = [config.column_types_transacciones.get(column, "text") for column in self.columns]
+        self.rows = 0
+        self.labels: List[Dict[str, int]] = [{} for _ in self.columns]
+        # Valores crudos que no se pudieron convertir, por columna: {posición: texto}
+        self.unparsed: Dict[str, Dict[str, str]] = {}
+        self._files = {"index": open(directory / "index.bin", "wb")}
+        for position in range(len(self.columns)):
+            self._files[position] = open(directory / f"{position}.bin", "wb")
+
+    def append(self, raw: pd.DataFrame) -> None:
+        typed = coerce_transactions(raw.copy(), self.config)
+        self._files["index"].write(raw.index.to_numpy(dtype="int64").tobytes())
+        for position, (column, kind) in enumerate(zip(self.columns, self.kinds)):
+            values = typed[column]
+            if kind in _DTYPES:
+                array = values.to_numpy(dtype=_DTYPES[kind])
+                self._remember_unparsed(column, raw[column], values)
+            else:
+                array = self._codes(position, values)
+            self._files[position].write(array.tobytes())
+        self.rows += len(raw)
+
+    def _codes(self, position: int, values: pd.Series) -> np.ndarray:
+        """Traduce una columna de texto a códigos sobre los valores distintos acumulados"""
+        labels = self.labels[position]
+        local, uniques = pd.factorize(values, use_na_sentinel=True)
+        mapping = np.array([labels.setdefault(value, len(labels)) for value in uniques.tolist()] + [-1], dtype=_CODES_DTYPE)
+        # El código local -1 (vacío) toma el último elemento de ``mapping``
+        return mapping[local]
+
+    def _remember_unparsed(self, column: str, raw: pd.Series, typed: pd.Series) -> None:
+        """Guarda el texto original de las celdas no vacías que quedaron como NaN/NaT"""
+        failed = typed.isna().to_numpy() & raw.notna().to_numpy()
+        if not failed.any():
+            return
+        target = self.unparsed.setdefault(column, {})
+        for offset in np.flatnonzero(failed).tolist():
+            text = str(raw.iloc[offset])
+            if text.strip():
+                target[str(self.rows + offset)] = text
+
+    def finish(self) -> None:
+        for handle in self._files.values():
+            handle.close()
+        for position, kind in enumerate(self.kinds):
+            if kind not in _DTYPES:
+                ordered = sorted(self.labels[position], key=self.labels[position].get)
+                (self.directory / f"{position}.labels.json").write_text(
+                    json.dumps(ordered, ensure_ascii=False), encoding="utf-8"
+                )
+        meta = {
+            "version": CACHE_VERSION,
+            "rows": self.rows,
+            "columns": self.columns,
+            "kinds": self.kinds,
+            "unparsed": self.unparsed,
+        }
+        (self.directory / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+
+    def abort(self) -> None:
+        for handle in self._files.values():
+            handle.close()
+
+
+class CachedColumns:
+    """Entrada de la caché abierta: columnas mapeadas en memoria y metadatos"""
+
+    def __init__(self, directory: Path):
+        """
+        Args:
+            directory: Carpeta de la entrada
+        """
+        self.directory = directory
+        self.meta = json.loads((directory / "meta.json").read_text(encoding="utf-8"))
+        self.rows: int = self.meta["rows"]
+        self.columns: List[str] = self.meta["columns"]
+        self.kinds: List[str] = self.meta["kinds"]
+        self._labels: Dict[int, np.ndarray] = {}
+
+    def _map(self, name: str, dtype: str) -> np.ndarray:
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.directory / name, dtype=dtype, mode="r", shape=(self.rows,))
+
+    @property
+    def index(self) -> np.ndarray:
+        """Número de fila en Excel de cada posición"""
+        return self._map("index.bin", "int64")
+
+    def array(self, column: str) -> np.ndarray:
+        """
+        Columna tal como está en disco, sin copiarla.
+
+        Returns:
+            np.ndarray: float64 o datetime64[ns] para montos y fechas, códigos
+            int32 (-1 = vacío) para texto
+        """
+        position = self.columns.index(column)
+        kind = self.kinds[position]
+        return self._map(f"{position}.bin", _DTYPES.get(kind, _CODES_DTYPE))
+
+    def labels(self, column: str) -> np.ndarray:
+        """Valores distintos de una columna de texto, en el orden de sus códigos"""
+        position = self.columns.index(column)
+        if position not in self._labels:
+            values = json.loads((self.directory / f"{position}.labels.json").read_text(encoding="utf-8"))
+            # Un valor extra al final para que el código -1 se traduzca a None
+            self._labels[position] = np.array(values + [None], dtype=object)
+        return self._labels[position]
+
+    def frame(self, start: int = 0, stop: Optional[int] = None, raw: bool = False) -> pd.DataFrame:
+        """
+        Construye un DataFrame con las filas ``start`` a ``stop``.
+
+        Las columnas de montos y fechas comparten memoria con los archivos;
+        las de texto se reconstruyen a partir de sus códigos.
+
+        Args:
+            start: Primera posición
+            stop: Posición final (exclusiva); por defecto hasta el final
+            raw: Devolver en las celdas que no se pudieron convertir el texto
+                original en lugar de NaN/NaT, como ``iter_chunks(typed=False)``,
+                para que la validación las siga marcando como inválidas
+
+        Returns:
+            pd.DataFrame: Lote con las columnas de ``headers_transacciones``
+        """
+        stop = self.rows if stop is None else min(stop, self.rows)
+        data: Dict[str, pd.Series] = {}
+        for column, kind in zip(self.columns, self.kinds):
+            values = self.array(column)[start:stop]
+            if kind in _DTYPES:
+                unparsed = self.meta["unparsed"].get(column) if raw else None
+                if unparsed:
+                    values = self._with_unparsed(values, unparsed, start, stop)
+                data[column] = pd.Series(values, copy=False)
+            else:
+                data[column] = pd.Series(self.labels(column)[values], dtype="object")
+        frame = pd.DataFrame(data, copy=False)
+        frame.index = pd.Index(self.index[start:stop], name="fila", dtype="int64")
+        return frame
+
+    @staticmethod
+    def _with_unparsed(values: np.ndarray, unparsed: Dict[str, str], start: int, stop: int) -> np.ndarray:
+        """Copia la columna como objetos y repone el texto original de las celdas no convertidas"""
+        patched = None
+        for position, text in unparsed.items():
+            position = int(position)
+            if start <= position < stop:
+                if patched is None:
+                    patched = pd.Series(values).astype("object").to_numpy(copy=True)
+                patched[position - start] = text
+        return values if patched is None else patched
+
+    def take(self, positions: np.ndarray) -> pd.DataFrame:
+        """
+        Construye un DataFrame solo con las filas de las posiciones indicadas.
+
+        A diferencia de ``frame``, las posiciones pueden estar en cualquier
+        orden; solo se leen de disco y se traducen los códigos de esas filas.
+
+        Args:
+            positions: Posiciones dentro de la entrada
+
+        Returns:
+            pd.DataFrame: Filas tipadas, en el orden de ``positions``
+        """
+        positions = np.asarray(positions, dtype="int64")
+        data: Dict[str, pd.Series] = {}
+        for column, kind in zip(self.columns, self.kinds):
+            values = self.array(column)[positions]
+            if kind in _DTYPES:
+                data[column] = pd.Series(values)
+            else:
+                data[column] = pd.Series(self.labels(column)[values], dtype="object")
+        frame = pd.DataFrame(data, copy=False)
+        frame.index = pd.Index(self.index[positions], name="fila", dtype="int64")
+        return frame
+
+    def iter_chunks(self, chunk_size: int = DEFAULT_CHUNK_SIZE, raw: bool = False) -> Iterator[pd.DataFrame]:
+        """Recorre la entrada en lotes, igual que ``TransactionReader.iter_chunks``"""
+        for start in range(0, self.rows, chunk_size):
+            yield self.frame(start, start + chunk_size, raw=raw)
+
+
+class ColumnCache:
+    """
+    Caché de hojas "Transacciones" leídas, por hash de archivo y de esquema.
+
+    Uso:
+        cache = ColumnCache()
+        for chunk in cache.iter_chunks("cuenta.xlsx", raw=True):
+            ...
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        config: Optional[ExcelConfigProvider] = None,
+        max_entries: int = 16,
+        logger: Any = None
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            directory: Carpeta de la caché; por defecto ``cache/columns`` en el proyecto
+            config: Configuración de Excel que define las columnas
+            max_entries: Entradas que se conservan (las usadas hace más tiempo se eliminan)
+            logger: Logger con la interfaz ILogger; por defecto ``log.excel``
+        """
+        if directory is None:
+            from ..config.settings import get_settings
+            directory = get_settings().base_dir / "cache" / "columns"
+        if logger is None:
+            from ..config import log
+            logger = log.excel
+        self.directory = Path(directory)
+        self.config = config or ExcelConfigProvider()
+        self.max_entries = max_entries
+        self.logger = logger
+        self._schema = hashlib.sha256(f"{CACHE_VERSION}:{self.config.schema_hash()}".encode()).hexdigest()[:16]
+        # Hashes ya calculados en este proceso, por (ruta, tamaño, fecha de modificación)
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def key(self, path: Union[str, Path], statement_format: Optional[StatementFormat] = None) -> str:
+        """
+        Nombre de la entrada de un archivo: hash del contenido y del esquema.
+
+        Los extractos agregan el hash de su formato, ya que el mismo archivo
+        leído con otro formato da otras columnas.
+        """
+        path = Path(path)
+        stat = path.stat()
+        memo = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        digest = self._hashes.get(memo)
+        if digest is None:
+            digest = self._hashes[memo] = file_hash(path)
+        if is_statement(path):
+            return f"{digest}-{self._schema}-{format_hash(statement_format or StatementFormat())}"
+        return f"{digest}-{self._schema}"
+
+    def load(self, path: Union[str, Path], statement_format: Optional[StatementFormat] = None) -> Optional[CachedColumns]:
+        """
+        Abre la entrada de un archivo si existe.
+
+        Returns:
+            Optional[CachedColumns]: La entrada, o None si el archivo no está en caché
+        """
+        entry = self.directory / self.key(path, statement_format)
+        if not (entry / "meta.json").exists():
+            return None
+        os.utime(entry)
+        return CachedColumns(entry)
+
+    def read_chunks(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        statement_format: Optional[StatementFormat] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Lotes crudos del archivo, leídos con ``TransactionReader`` o ``StatementReader``"""
+        if is_statement(path):
+            reader = StatementReader(
+                path, config=self.config, chunk_size=chunk_size, statement_format=statement_format, logger=self.logger
+            )
+        else:
+            reader = TransactionReader(path, config=self.config, chunk_size=chunk_size, logger=self.logger)
+        return reader.iter_chunks(typed=False)
+
+    def open(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        statement_format: Optional[StatementFormat] = None
+    ) -> CachedColumns:
+        """
+        Abre la entrada de un archivo, leyéndolo si no está en caché.
+
+        Args:
+            path: Archivo Excel o extracto
+            chunk_size: Filas por lote al leer el archivo
+            statement_format: Formato del extracto, si el archivo es CSV o de ancho fijo
+
+        Returns:
+            CachedColumns: Entrada lista para consultar
+        """
+        cached = self.load(path, statement_format)
+        if cached is not None:
+            self.logger.debug("Columnas leídas de la caché", file=str(path), rows=cached.rows)
+            return cached
+        with self._lock:
+            cached = self.load(path, statement_format)
+            if cached is None:
+                cached = self.store(path, self.read_chunks(path, chunk_size, statement_format), statement_format)
+        return cached
+
+    def store(
+        self,
+        path: Union[str, Path],
+        chunks: Iterable[pd.DataFrame],
+        statement_format: Optional[StatementFormat] = None
+    ) -> CachedColumns:
+        """
+        Guarda los lotes crudos de un archivo como una entrada nueva.
+
+        La entrada se escribe en una carpeta temporal y se publica al final
+        con un renombrado, así que nunca queda una entrada a medias.
+
+        Args:
+            path: Archivo del que provienen los lotes
+            chunks: Lotes de ``read_chunks`` (``iter_chunks(typed=False)`` del lector)
+            statement_format: Formato del extracto con que se leyeron los lotes
+
+        Returns:
+            CachedColumns: La entrada guardada
+        """
+        key = self.key(path, statement_format)
+        target = self.directory / key
+        temporary = self.directory / f"{key}.tmp-{os.getpid()}-{threading.get_ident()}"
+        temporary.mkdir(parents=True, exist_ok=True)
+        writer = _EntryWriter(temporary, self.config)
+        try:
+            with metrics.stage("excel.cache_store") as timer:
+                for chunk in chunks:
+                    writer.append(chunk)
+                writer.finish()
+                timer.add(rows=writer.rows)
+            try:
+                os.replace(temporary, target)
+            except OSError:
+                # Otro proceso publicó la misma entrada mientras se escribía esta
+                if not (target / "meta.json").exists():
+                    raise
+                shutil.rmtree(temporary, ignore_errors=True)
+        except BaseException:
+            writer.abort()
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+        self.logger.info("Columnas guardadas en caché", file=str(path), rows=writer.rows, entry=key)
+        self._prune()
+        return CachedColumns(target)
+
+    def iter_chunks(
+        self,
+        path: Union[str, Path],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        raw: bool = False
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Recorre un archivo en lotes desde la caché, creando la entrada si hace falta.
+
+        Reemplaza a ``TransactionReader.iter_chunks``; con ``raw=True`` los
+        lotes sirven para ``TransactionValidator`` igual que los crudos.
+        """
+        cached = self.open(path, chunk_size)
+        yield from iter_timed("excel.cache_read", cached.iter_chunks(chunk_size, raw=raw))
+
+    def _prune(self) -> None:
+        """Elimina las entradas usadas hace más tiempo por encima de ``max_entries``"""
+        if self.max_entries <= 0:
+            return
+        entries = sorted(
+            (entry for entry in self.directory.iterdir() if (entry / "meta.json").exists()),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries[:-self.max_entries]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Elimina todas las entradas"""
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
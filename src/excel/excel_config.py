@@ -1,12 +1,80 @@
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from openpyxl.styles import Font, Alignment, NamedStyle, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
 
+# Lista usada cuando no se dispone del catálogo de terceros de SIIGO
+DEFAULT_PROVEEDORES = ["Proveedor1", "Proveedor2", "Proveedor3"]
+
+# Nombre del estilo compartido de los encabezados
+HEADER_STYLE = "encabezado"
+
+# Hoja oculta con los catálogos de las listas desplegables y nombre definido
+# que apunta a los proveedores; Excel limita las listas en línea a 255 caracteres
+LISTS_SHEET = "Listas"
+PROVEEDORES_RANGE = "Proveedores"
+
+# Última fila a la que se aplican las validaciones
+LAST_ROW = 1048576
+
+# Se incrementa cuando cambia la forma en que se genera la plantilla, para
+# invalidar las plantillas guardadas en caché con versiones anteriores
+TEMPLATE_VERSION = 2
+
+@dataclass(frozen=True)
+class ValidationSpec:
+    """
+    Regla de validación de una columna, independiente de cualquier libro.
+
+    Es inmutable, así que una misma configuración puede compartirse entre
+    hilos; ``build`` crea el ``DataValidation`` de openpyxl para cada libro.
+    """
+    type: str
+    error_title: str
+    error: str
+    operator: Optional[str] = None
+    formula1: Optional[str] = None
+    formula2: Optional[str] = None
+    allow_blank: bool = True
+    # Opciones de una lista que apunta a un rango en lugar de llevarlas en línea
+    options: Optional[Tuple[str, ...]] = None
+
+    def build(self, sqref: str) -> DataValidation:
+        """
+        Crea la validación de openpyxl para un libro.
+
+        :param sqref: Rango al que se aplica, por ejemplo ``E2:E1048576``.
+        :return: Objeto ``DataValidation`` nuevo.
+        """
+        return DataValidation(
+            type=self.type,
+            operator=self.operator,
+            formula1=self.formula1,
+            formula2=self.formula2,
+            allow_blank=self.allow_blank,
+            showErrorMessage=True,
+            errorTitle=self.error_title,
+            error=self.error,
+            sqref=sqref
+        )
+
+
 class ExcelConfigProvider:
     """
     Configuration class for Excel file handling.
     """
 
-    def __init__(self):
+    def __init__(self, proveedores: Optional[Iterable[str]] = None):
+        """
+        :param proveedores: Nombres válidos para la columna "Proveedor/Cliente",
+            normalmente obtenidos de SIIGO. Si no se indican se usa una lista de ejemplo.
+        """
+
+        # Lista de proveedores/clientes válidos
+        self.proveedores = list(proveedores) if proveedores is not None else list(DEFAULT_PROVEEDORES)
 
         # Definición de los encabezados de la hoja "Transacciones"
         self.headers_transacciones = [
@@ -34,6 +102,25 @@ class ExcelConfigProvider:
             "I": 25   # Conciliado en SIIGO
         }
 
+        # Tipo de dato esperado para cada columna de la hoja "Transacciones"
+        self.column_types_transacciones = {
+            "ID": "text",
+            "Fecha": "date",
+            "Detalle": "text",
+            "Proveedor/Cliente": "text",
+            "Entró": "decimal",
+            "Salió": "decimal",
+            "Saldo": "decimal",
+            "Categoría": "text",
+            "Conciliado en SIIGO": "text"
+        }
+
+        # Formato de número de las celdas de datos según su tipo
+        self.number_formats = {
+            "date": "DD/MM/YYYY",
+            "decimal": "#,##0.00"
+        }
+
         # Definición de los encabezados de la hoja "Instrucciones"
         self.headers_instrucciones = [
             "Nombre de la columna", 
@@ -75,32 +162,118 @@ class ExcelConfigProvider:
             bottom=sideEncabezado
             )
         
-        # Validaciones de datos
-        self.validations = {
-    "Entró": {
-        "validation": DataValidation(type="decimal", operator="greaterThanOrEqual", formula1="0", allow_blank=True, showErrorMessage = True),
-        "errorTitle": "Valor inválido",
-        "error": "El valor debe ser un número positivo."
-    },
-    "Salió": {
-        "validation": DataValidation(type="decimal", operator="lessThanOrEqual", formula1="0", allow_blank=True, showErrorMessage = True),
-        "errorTitle": "Valor inválido",
-        "error": "El valor debe ser un número negativo."
-    },
-    "Saldo": {
-        "validation": DataValidation(type="decimal", allow_blank=True, showErrorMessage = True),
-        "errorTitle": "Valor inválido",
-        "error": "El valor debe ser un número decimal."
-    },
-    "Fecha": {
-        "validation": DataValidation(type="date", allow_blank=True, showErrorMessage = True),
-        "errorTitle": "Fecha inválida",
-        "error": "Debe ingresar una fecha válida."
-    },
-    "Proveedor/Cliente": {
-        "validation": DataValidation(type="list", formula1='"Proveedor1,Proveedor2,Proveedor3"', allow_blank=True, showErrorMessage = True),
-        "errorTitle": "Valor inválido",
-        "error": "Debe seleccionar un valor de la lista."
-    }
-}
-    
\ No newline at end of file
+        # Validaciones de datos: especificaciones inmutables que se compilan
+        # en objetos DataValidation nuevos para cada libro
+        self.validations: Dict[str, ValidationSpec] = {
+            "Entró": ValidationSpec(
+                type="decimal", operator="greaterThanOrEqual", formula1="0",
+                error_title="Valor inválido", error="El valor debe ser un número positivo."
+            ),
+            "Salió": ValidationSpec(
+                type="decimal", operator="lessThanOrEqual", formula1="0",
+                error_title="Valor inválido", error="El valor debe ser un número negativo."
+            ),
+            "Saldo": ValidationSpec(
+                type="decimal",
+                error_title="Valor inválido", error="El valor debe ser un número decimal."
+            ),
+            "Fecha": ValidationSpec(
+                type="date",
+                error_title="Fecha inválida", error="Debe ingresar una fecha válida."
+            ),
+            "Proveedor/Cliente": ValidationSpec(
+                type="list", formula1=PROVEEDORES_RANGE, options=tuple(self.proveedores),
+                error_title="Valor inválido", error="Debe seleccionar un valor de la lista."
+            ),
+        }
+
+    def column_letters(self) -> Dict[str, str]:
+        """Letra de columna de cada encabezado de la hoja Transacciones"""
+        return {header: get_column_letter(i) for i, header in enumerate(self.headers_transacciones, start=1)}
+
+    def build_validations(self, last_row: int = LAST_ROW) -> List[DataValidation]:
+        """
+        Compila las validaciones para la hoja "Transacciones" de un libro.
+
+        Cada llamada crea objetos nuevos; la configuración no se modifica.
+
+        :param last_row: Última fila a la que se aplican las validaciones.
+        :return: Una validación por columna, desde la fila 2.
+        """
+        letters = self.column_letters()
+        return [
+            spec.build(f"{letters[column]}2:{letters[column]}{last_row}")
+            for column, spec in self.validations.items()
+        ]
+
+    def proveedores_reference(self) -> str:
+        """
+        Rango de la hoja oculta donde se escriben los proveedores.
+
+        :return: Referencia absoluta, por ejemplo ``'Listas'!$A$1:$A$3``.
+        """
+        last_row = max(len(self.proveedores), 1)
+        return f"'{LISTS_SHEET}'!$A$1:$A${last_row}"
+
+    def build_named_styles(self) -> List[NamedStyle]:
+        """
+        Crea los estilos con nombre que comparten todas las celdas de un libro.
+
+        Se crean objetos nuevos en cada llamada porque openpyxl asocia cada
+        NamedStyle al libro en el que se registra.
+
+        :return: Estilo de encabezado y un estilo por cada tipo de ``number_formats``.
+        """
+        styles = [NamedStyle(
+            name=HEADER_STYLE,
+            font=self.fontEncabezado,
+            alignment=self.alignmentEncabezado,
+            fill=self.fillfontEncabezado,
+            border=self.borderEncabezado
+        )]
+        for column_type, number_format in self.number_formats.items():
+            styles.append(NamedStyle(name=column_type, number_format=number_format))
+        return styles
+
+    def schema_hash(self) -> str:
+        """
+        Huella de las columnas de la hoja "Transacciones" y sus tipos.
+
+        A diferencia de ``content_hash`` no depende de estilos, instrucciones
+        ni proveedores, solo de lo que determina cómo se leen los datos.
+
+        :return: Hash SHA-256 en hexadecimal.
+        """
+        content = {
+            "headers_transacciones": self.headers_transacciones,
+            "column_types_transacciones": self.column_types_transacciones,
+        }
+        encoded = json.dumps(content, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def content_hash(self) -> str:
+        """
+        Huella del contenido que determina la plantilla generada.
+
+        Cambia si cambian los encabezados, anchos, instrucciones, estilos,
+        validaciones o la lista de proveedores.
+
+        :return: Hash SHA-256 en hexadecimal.
+        """
+        content = {
+            "version": TEMPLATE_VERSION,
+            "headers_transacciones": self.headers_transacciones,
+            "column_widths_transacciones": self.column_widths_transacciones,
+            "column_types_transacciones": self.column_types_transacciones,
+            "number_formats": self.number_formats,
+            "headers_instrucciones": self.headers_instrucciones,
+            "column_widths_instrucciones": self.column_widths_instrucciones,
+            "instructions": self.instructions,
+            "proveedores": self.proveedores,
+            "validations": {column: asdict(spec) for column, spec in self.validations.items()},
+            "styles": [repr(style) for style in (
+                self.fontEncabezado, self.alignmentEncabezado, self.fillfontEncabezado, self.borderEncabezado
+            )],
+        }
+        encoded = json.dumps(content, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
@@ -0,0 +1,214 @@
+"""
+Lector en streaming de la hoja "Transacciones" generada por ExcelTemplateGenerator.
+"""
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from ..utils.instrumentation import metrics
+from .excel_config import ExcelConfigProvider
+
+DEFAULT_SHEET = "Transacciones"
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def coerce_transactions(frame: pd.DataFrame, config: ExcelConfigProvider) -> pd.DataFrame:
+    """
+    Convierte las columnas de un lote a los tipos declarados en la configuración.
+
+    Los valores que no se pueden convertir quedan como NaN/NaT.
+
+    Args:
+        frame: Lote con los valores tal como vienen de la fuente
+        config: Configuración de Excel con los tipos por columna
+
+    Returns:
+        pd.DataFrame: Lote con columnas tipadas
+    """
+    for column, kind in config.column_types_transacciones.items():
+        if column not in frame.columns:
+            continue
+        values = frame[column]
+        if kind == "decimal":
+            frame[column] = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif kind == "date":
+            frame[column] = parse_dates(values)
+        else:
+            frame[column] = values.map(_to_text, na_action="ignore").astype("object")
+    return frame
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Convierte una columna a datetime64 aceptando fechas de Excel y texto DD/MM/AAAA.
+
+    Las celdas de fecha se convierten en bloque; solo el texto pasa por el
+    análisis de formato mixto, que es mucho más lento.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("datetime64[ns]")
+    is_text = (values.map(type).to_numpy() == str)
+    parsed = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    if not is_text.all():
+        parsed[~is_text] = pd.to_datetime(values[~is_text], errors="coerce")
+    if is_text.any():
+        parsed[is_text] = pd.to_datetime(values[is_text], errors="coerce", format="mixed", dayfirst=True)
+    return parsed
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """Normaliza un valor de celda a texto sin espacios sobrantes"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text or None
+
+
+class TransactionReader:
+    """
+    Lee la hoja "Transacciones" en modo solo lectura y entrega lotes tipados.
+
+    El libro se abre con ``read_only=True`` y las filas se consumen de forma
+    perezosa, por lo que la memoria depende del tamaño del lote y no del archivo.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        config: Optional[ExcelConfigProvider] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        sheet_name: str = DEFAULT_SHEET,
+        logger: Any = None
+    ):
+        """
+        Inicializa el lector.
+
+        Args:
+            path: Ruta al archivo Excel
+            config: Configuración de Excel; se crea una por defecto si no se indica
+            chunk_size: Número de filas por lote
+            sheet_name: Nombre de la hoja a leer
+            logger: Logger para registrar eventos; por defecto ``log.excel``
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size debe ser mayor que cero")
+        self.path = Path(path)
+        self.config = config or ExcelConfigProvider()
+        self.chunk_size = chunk_size
+        self.sheet_name = sheet_name
+        if logger is None:
+            from ..config import log
+            logger = log.excel
+        self.logger = logger
+
+    @property
+    def columns(self) -> List[str]:
+        """Columnas de los lotes, en el orden de ``headers_transacciones``"""
+        return list(self.config.headers_transacciones)
+
+    def iter_chunks(self, typed: bool = True, start_row: int = 2) -> Iterator[pd.DataFrame]:
+        """
+        Recorre la hoja y entrega lotes de hasta ``chunk_size`` filas.
+
+        El índice de cada lote es el número de fila en Excel, lo que permite
+        reportar errores en términos que el usuario reconoce.
+
+        Args:
+            typed: Si es False, entrega los valores crudos sin convertir
+            start_row: Primera fila de datos a leer (la fila 1 es el encabezado)
+
+        Returns:
+            Iterator[pd.DataFrame]: Lotes con las columnas de ``headers_transacciones``
+        """
+        started = time.perf_counter()
+        # Los bytes del archivo se atribuyen al primer lote en la instrumentación
+        pending_bytes = Path(self.path).stat().st_size if metrics.enabled else 0
+        wb = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            if self.sheet_name not in wb.sheetnames:
+                raise ValueError(f"El archivo {self.path} no contiene la hoja '{self.sheet_name}'")
+            sheet = wb[self.sheet_name]
+            positions = self._map_columns(sheet)
+            self.logger.debug(
+                "Lectura de transacciones iniciada",
+                file=str(self.path),
+                chunk_size=self.chunk_size,
+                start_row=start_row
+            )
+
+            total = 0
+            rows: List[Tuple[Any, ...]] = []
+            index: List[int] = []
+            row_number = max(start_row, 2) - 1
+            for values in sheet.iter_rows(min_row=max(start_row, 2), values_only=True):
+                row_number += 1
+                picked = tuple(values[i] if i < len(values) else None for i in positions)
+                if all(value is None or value == "" for value in picked):
+                    continue
+                rows.append(picked)
+                index.append(row_number)
+                if len(rows) >= self.chunk_size:
+                    total += len(rows)
+                    chunk = self._build_chunk(rows, index, typed)
+                    metrics.record("excel.read", time.perf_counter() - started, rows=len(chunk), bytes=pending_bytes)
+                    pending_bytes = 0
+                    yield chunk
+                    # El tiempo del consumidor entre lotes no cuenta como lectura
+                    started = time.perf_counter()
+                    rows, index = [], []
+            if rows:
+                total += len(rows)
+                chunk = self._build_chunk(rows, index, typed)
+                metrics.record("excel.read", time.perf_counter() - started, rows=len(chunk), bytes=pending_bytes)
+                yield chunk
+
+            self.logger.debug("Lectura de transacciones finalizada", file=str(self.path), rows=total)
+        finally:
+            wb.close()
+
+    def read(self, typed: bool = True) -> pd.DataFrame:
+        """
+        Lee la hoja completa en un único DataFrame.
+
+        Solo se recomienda para archivos pequeños; para archivos grandes usar
+        ``iter_chunks``.
+        """
+        chunks = list(self.iter_chunks(typed=typed))
+        if not chunks:
+            return self._build_chunk([], [], typed)
+        return pd.concat(chunks)
+
+    def _map_columns(self, sheet) -> List[int]:
+        """
+        Ubica la posición de cada encabezado esperado en la primera fila.
+
+        Returns:
+            List[int]: Índice de columna para cada encabezado de ``headers_transacciones``
+        """
+        header_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        found: Dict[str, int] = {}
+        for position, value in enumerate(header_row):
+            if value is not None:
+                found.setdefault(str(value).strip(), position)
+
+        missing = [header for header in self.config.headers_transacciones if header not in found]
+        if missing:
+            raise ValueError(f"Faltan columnas en la hoja '{self.sheet_name}': {', '.join(missing)}")
+        return [found[header] for header in self.config.headers_transacciones]
+
+    def _build_chunk(self, rows: List[Tuple[Any, ...]], index: List[int], typed: bool) -> pd.DataFrame:
+        """Construye un lote a partir de las filas acumuladas"""
+        frame = pd.DataFrame.from_records(
+            rows,
+            columns=self.config.headers_transacciones,
+            index=pd.Index(index, name="fila", dtype="int64"),
+            coerce_float=False
+        )
+        if frame.empty:
+            frame = frame.astype("object")
+        if typed:
+            frame = coerce_transactions(frame, self.config)
+        return frame
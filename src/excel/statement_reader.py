@@ -0,0 +1,357 @@
+"""
+Lector en streaming de extractos bancarios en CSV o de ancho fijo.
+
+Los extractos se llevan al esquema de ``headers_transacciones`` y se entregan
+en los mismos lotes que ``TransactionReader``: mismas columnas, índice
+``fila`` con el número de línea del archivo y, con ``typed=True``, los mismos
+tipos. Así el resto del procesamiento no distingue el origen de los datos.
+
+Uso:
+    formato = StatementFormat(
+        columns={"Fecha Mov": "Fecha", "Descripción": "Detalle", "Saldo": "Saldo"},
+        amount_column="Valor",
+        decimal=",",
+        thousands=".",
+    )
+    for chunk in StatementReader("extracto.csv", statement_format=formato).iter_chunks():
+        ...
+
+El formato también puede guardarse en un archivo JSON con los mismos campos
+(``StatementFormat.load``), que es lo que reciben ``python -m src.batch
+--statement-format`` y la ventana principal.
+"""
+import csv
+import json
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ..utils.instrumentation import metrics
+from .excel_config import ExcelConfigProvider
+from .reader import DEFAULT_CHUNK_SIZE, coerce_transactions
+
+# Extensiones que se leen con StatementReader en lugar de TransactionReader
+STATEMENT_SUFFIXES = (".csv", ".txt", ".prn")
+
+# Separadores que se prueban cuando el formato no indica uno
+SNIFF_DELIMITERS = ",;\t|"
+
+# Bytes iniciales del archivo que se usan para detectar el separador
+SNIFF_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class StatementFormat:
+    """
+    Describe cómo llevar un extracto bancario a las columnas de la plantilla.
+
+    Attributes:
+        columns: Columna del extracto -> encabezado de la plantilla; vacío si
+            el extracto ya usa los encabezados de la plantilla
+        amount_column: Columna con el valor firmado del movimiento; los valores
+            positivos van a "Entró" y los negativos a "Salió"
+        colspecs: Campo -> (inicio, fin) de cada columna en archivos de ancho
+            fijo; si se indica, el archivo no tiene fila de encabezado
+        delimiter: Separador del CSV; None para detectarlo
+        encoding: Codificación del archivo
+        decimal: Separador decimal de los valores
+        thousands: Separador de miles de los valores, si lo hay
+        date_format: Formato de las fechas (por ejemplo ``%d/%m/%Y``); None
+            para aceptar el mismo texto que en Excel
+        skiprows: Líneas a omitir antes del encabezado o de los datos
+    """
+    columns: Mapping[str, str] = field(default_factory=dict)
+    amount_column: Optional[str] = None
+    colspecs: Optional[Mapping[str, Tuple[int, int]]] = None
+    delimiter: Optional[str] = None
+    encoding: str = "utf-8-sig"
+    decimal: str = "."
+    thousands: Optional[str] = None
+    date_format: Optional[str] = None
+    skiprows: int = 0
+
+    @property
+    def fixed_width(self) -> bool:
+        """True si el archivo es de ancho fijo"""
+        return self.colspecs is not None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "StatementFormat":
+        """
+        Crea el formato a partir de un diccionario con los nombres de sus campos.
+
+        Raises:
+            ValueError: Si el diccionario tiene campos desconocidos
+        """
+        unknown = set(data) - {item.name for item in fields(cls)}
+        if unknown:
+            raise ValueError(f"Campos desconocidos en el formato del extracto: {', '.join(sorted(unknown))}")
+        values = dict(data)
+        if values.get("colspecs") is not None:
+            values["colspecs"] = {name: tuple(span) for name, span in values["colspecs"].items()}
+        return cls(**values)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "StatementFormat":
+        """Lee el formato de un archivo JSON"""
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def is_statement(path: Union[str, Path]) -> bool:
+    """True si el archivo se lee con ``StatementReader`` según su extensión"""
+    return Path(path).suffix.lower() in STATEMENT_SUFFIXES
+
+
+def normalize_numbers(values: pd.Series, decimal: str = ".", thousands: Optional[str] = None) -> pd.Series:
+    """
+    Lleva texto numérico de un extracto a la notación que entiende ``pd.to_numeric``.
+
+    Quita espacios, el símbolo ``$`` y el separador de miles, cambia el
+    separador decimal por punto y convierte ``(1.234,00)`` en ``-1234.00``.
+    El texto que no es un número se conserva para que la validación lo reporte.
+
+    Args:
+        values: Columna de texto
+        decimal: Separador decimal del extracto
+        thousands: Separador de miles del extracto, si lo hay
+
+    Returns:
+        pd.Series: Columna de texto normalizada; las celdas vacías quedan como NaN
+    """
+    text = values.str.replace(r"[\s$]", "", regex=True)
+    negative = text.str.startswith("(") & text.str.endswith(")")
+    text = text.str.strip("()")
+    if thousands:
+        text = text.str.replace(thousands, "", regex=False)
+    if decimal != ".":
+        text = text.str.replace(decimal, ".", regex=False)
+    text = text.where(~negative.fillna(False).astype(bool), "-" + text)
+    return text.where(text != "")
+
+
+class StatementReader:
+    """
+    Lee un extracto en CSV o de ancho fijo y entrega lotes con el esquema de la plantilla.
+
+    El archivo se lee con ``pandas.read_csv``/``read_fwf`` en bloques de
+    ``chunk_size`` filas y con todas las columnas como texto, así ningún
+    valor se interpreta antes de tiempo; luego cada lote pasa por la misma
+    conversión que los lotes de Excel.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        config: Optional[ExcelConfigProvider] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        statement_format: Optional[StatementFormat] = None,
+        logger: Any = None
+    ):
+        """
+        Inicializa el lector.
+
+        Args:
+            path: Ruta al extracto
+            config: Configuración de Excel; se crea una por defecto si no se indica
+            chunk_size: Número de filas por lote
+            statement_format: Formato del extracto; por defecto un CSV con los
+                encabezados de la plantilla
+            logger: Logger para registrar eventos; por defecto ``log.excel``
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size debe ser mayor que cero")
+        self.path = Path(path)
+        self.config = config or ExcelConfigProvider()
+        self.chunk_size = chunk_size
+        self.format = statement_format or StatementFormat()
+        if logger is None:
+            from ..config import log
+            logger = log.excel
+        self.logger = logger
+
+    @property
+    def columns(self) -> List[str]:
+        """Columnas de los lotes, en el orden de ``headers_transacciones``"""
+        return list(self.config.headers_transacciones)
+
+    def _mapping(self) -> Dict[str, str]:
+        """Columna del extracto -> encabezado de la plantilla"""
+        if self.format.columns:
+            return dict(self.format.columns)
+        source = self.format.colspecs or {}
+        return {header: header for header in self.config.headers_transacciones if not source or header in source}
+
+    def _source_columns(self) -> List[str]:
+        """Columnas del extracto que hay que leer"""
+        names = list(self._mapping())
+        if self.format.amount_column and self.format.amount_column not in names:
+            names.append(self.format.amount_column)
+        return names
+
+    def _sniff_delimiter(self) -> str:
+        """Detecta el separador del CSV a partir del inicio del archivo"""
+        with open(self.path, encoding=self.format.encoding, errors="replace", newline="") as handle:
+            lines = handle.read(SNIFF_BYTES).splitlines()[self.format.skiprows:]
+        sample = "\n".join(lines[:50])
+        try:
+            return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+        except csv.Error:
+            return ","
+
+    def _open(self):
+        """Abre el lector por bloques de pandas"""
+        names = self._source_columns()
+        options: Dict[str, Any] = dict(
+            dtype=str,
+            chunksize=self.chunk_size,
+            encoding=self.format.encoding,
+            keep_default_na=False,
+            na_values=[""],
+            skip_blank_lines=False,
+            skiprows=self.format.skiprows,
+        )
+        if self.format.fixed_width:
+            specs = self.format.colspecs
+            return pd.read_fwf(
+                self.path, colspecs=[specs[name] for name in names], names=names, header=None, **options
+            )
+
+        delimiter = self.format.delimiter or self._sniff_delimiter()
+        header = pd.read_csv(self.path, sep=delimiter, nrows=0, encoding=self.format.encoding,
+                             skiprows=self.format.skiprows)
+        found = [str(column).strip() for column in header.columns]
+        missing = [name for name in names if name not in found]
+        if missing:
+            raise ValueError(f"Faltan columnas en el extracto {self.path}: {', '.join(missing)}")
+        usecols = [position for position, column in enumerate(found) if column in names]
+        # Los nombres se fijan por posición para ignorar espacios en el encabezado
+        return pd.read_csv(
+            self.path, sep=delimiter, header=0, usecols=usecols,
+            names=[found[position] for position in usecols], **options
+        )
+
+    def iter_chunks(self, typed: bool = True, start_row: int = 1) -> Iterator[pd.DataFrame]:
+        """
+        Recorre el extracto y entrega lotes de hasta ``chunk_size`` filas.
+
+        El índice de cada lote es el número de línea en el archivo. Las líneas
+        vacías se omiten, como las filas vacías de Excel.
+
+        Args:
+            typed: Si es False, entrega el texto del extracto (con los números
+                normalizados) sin convertir
+            start_row: Primera línea del archivo a entregar; las anteriores se
+                leen pero se descartan, ya que un CSV no permite saltar a una línea
+
+        Returns:
+            Iterator[pd.DataFrame]: Lotes con las columnas de ``headers_transacciones``
+        """
+        started = time.perf_counter()
+        pending_bytes = self.path.stat().st_size if metrics.enabled else 0
+        # Número de línea de la primera fila de datos
+        first_line = self.format.skiprows + (1 if self.format.fixed_width else 2)
+        self.logger.debug(
+            "Lectura de extracto iniciada",
+            file=str(self.path),
+            chunk_size=self.chunk_size,
+            fixed_width=self.format.fixed_width
+        )
+
+        total = 0
+        position = 0
+        # Los bloques de pandas pierden filas al omitir las líneas vacías, así
+        # que se acumulan para entregar lotes completos de ``chunk_size`` filas
+        pending: List[pd.DataFrame] = []
+        buffered = 0
+        with self._open() as blocks:
+            for raw in blocks:
+                index = pd.RangeIndex(position, position + len(raw)) + first_line
+                position += len(raw)
+                if index[-1] < start_row:
+                    continue
+                frame = self._build_chunk(raw[index >= start_row], index[index >= start_row])
+                if frame.empty:
+                    continue
+                pending.append(frame)
+                buffered += len(frame)
+                while buffered >= self.chunk_size:
+                    batch = pd.concat(pending) if len(pending) > 1 else pending[0]
+                    chunk, rest = batch.iloc[:self.chunk_size], batch.iloc[self.chunk_size:]
+                    pending, buffered = ([rest] if len(rest) else []), len(rest)
+                    total += len(chunk)
+                    yield self._finish_chunk(chunk, typed, started, pending_bytes)
+                    pending_bytes = 0
+                    started = time.perf_counter()
+            if pending:
+                chunk = pd.concat(pending) if len(pending) > 1 else pending[0]
+                total += len(chunk)
+                yield self._finish_chunk(chunk, typed, started, pending_bytes)
+
+        self.logger.debug("Lectura de extracto finalizada", file=str(self.path), rows=total)
+
+    def read(self, typed: bool = True) -> pd.DataFrame:
+        """Lee el extracto completo en un único DataFrame; solo para archivos pequeños"""
+        chunks = list(self.iter_chunks(typed=typed))
+        if not chunks:
+            empty = pd.DataFrame(columns=self.columns, index=pd.Index([], name="fila", dtype="int64"), dtype="object")
+            return coerce_transactions(empty, self.config) if typed else empty
+        return pd.concat(chunks)
+
+    def _finish_chunk(self, chunk: pd.DataFrame, typed: bool, started: float, pending_bytes: int) -> pd.DataFrame:
+        """Convierte un lote completo y registra su lectura en la instrumentación"""
+        if typed:
+            chunk = coerce_transactions(chunk, self.config)
+        metrics.record("excel.read", time.perf_counter() - started, rows=len(chunk), bytes=pending_bytes)
+        return chunk
+
+    def _build_chunk(self, raw: pd.DataFrame, index: pd.Index) -> pd.DataFrame:
+        """Lleva un bloque del extracto a las columnas de la plantilla, sin convertir tipos"""
+        raw = raw.set_axis(pd.Index(index, name="fila", dtype="int64"))
+        raw = raw.apply(lambda values: values.str.strip()).replace("", np.nan)
+        raw = raw[raw.notna().any(axis=1)]
+
+        frame = pd.DataFrame(index=raw.index, columns=self.config.headers_transacciones, dtype="object")
+        for source, header in self._mapping().items():
+            frame[header] = raw[source].astype("object")
+
+        decimals = [
+            header for header, kind in self.config.column_types_transacciones.items() if kind == "decimal"
+        ]
+        for header in decimals:
+            frame[header] = normalize_numbers(frame[header].astype("string"), self.format.decimal,
+                                              self.format.thousands).astype("object")
+        if self.format.amount_column:
+            self._split_amount(frame, raw[self.format.amount_column])
+        if self.format.date_format:
+            self._parse_dates(frame)
+        return frame
+
+    def _parse_dates(self, frame: pd.DataFrame) -> None:
+        """
+        Convierte las fechas con ``date_format``, como llegan las celdas de fecha de Excel.
+
+        El texto que no cumple el formato se conserva para que la validación lo reporte.
+        """
+        for header, kind in self.config.column_types_transacciones.items():
+            if kind != "date":
+                continue
+            parsed = pd.to_datetime(frame[header], format=self.format.date_format, errors="coerce")
+            frame[header] = parsed.astype("object").where(parsed.notna(), frame[header])
+
+    def _split_amount(self, frame: pd.DataFrame, amount: pd.Series) -> None:
+        """
+        Reparte un valor firmado entre "Entró" (positivos) y "Salió" (negativos).
+
+        El texto que no es un número queda en "Entró" para que la validación
+        lo reporte en lugar de perderse.
+        """
+        text = normalize_numbers(amount.astype("string"), self.format.decimal, self.format.thousands)
+        numbers = pd.to_numeric(text, errors="coerce")
+        outgoing = (numbers < 0).fillna(False).to_numpy(dtype=bool)
+        text = text.astype("object")
+        frame["Entró"] = text.where(~outgoing)
+        frame["Salió"] = text.where(outgoing)
@@ -1,46 +1,76 @@
 from openpyxl import Workbook
-from openpyxl.worksheet.datavalidation import DataValidation
 import os
 import logging
+from pathlib import Path
+from ...siigo.master_data import load_counterparty_names
 from ..excel_config import ExcelConfigProvider
+from ..writer import TransactionWorkbookWriter, add_lists_sheet
+from .template_cache import get_template_cache
 
 class ExcelTemplateGenerator:
     """
     Clase para generar plantillas de Excel.
     Esta clase utiliza la biblioteca openpyxl para crear un archivo Excel con una hoja de cálculo básica.
     """
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, config=None, cache=None):
         """
         Inicializa la clase ExcelTemplateGenerator.
         
         :param logger: Instancia de logger para registrar eventos.
+        :param config: Configuración de Excel; por defecto una nueva ``ExcelConfigProvider``
+            con los clientes y proveedores de SIIGO (o los de ejemplo si SIIGO no está disponible).
+        :param cache: ``TemplateCache`` donde se guardan las plantillas generadas;
+            por defecto la caché del proceso en ``cache/templates``.
         """
         self.logger = logger
         self.logger.debug("ExcelTemplateGenerator inicializado.")
-        self.config = ExcelConfigProvider()
+        self.config = config or ExcelConfigProvider(proveedores=load_counterparty_names())
+        self.cache = cache if cache is not None else get_template_cache()
         self.logger.debug("Configuración de Excel cargada.")    
 
 
 
-    def create_excel_template(self, output_path):
+    def create_excel_template(self, output_path, rows=None):
         """
         Crea la plantilla de Excel y la guarda en la ruta especificada.
         :param output_path: Ruta donde se guardará el archivo Excel.
+        :param rows: Filas para prellenar la hoja "Transacciones". Si se indican,
+            el libro se escribe en streaming con ``TransactionWorkbookWriter``.
         """
+        if rows is not None:
+            TransactionWorkbookWriter(self.config, self.logger).write(output_path, rows)
+            return
         try:
-            # Crear un nuevo libro de trabajo
-            wb = Workbook()
-
-            # Configurar las hojas y validaciones
-            self._configure_sheets(wb)
-
-            # Guardar el archivo
-            wb.save(output_path)
+            # La plantilla vacía solo depende de la configuración: se copian
+            # los bytes de la caché y el libro se construye una vez por versión
+            Path(output_path).write_bytes(self.template_bytes())
             self.logger.info(f"Plantilla creada exitosamente en: {output_path}")
         except Exception as e:
             self.logger.error(f"Error al crear la plantilla de Excel: {e}", exc_info=True)
             raise
 
+    def template_bytes(self):
+        """
+        Retorna el contenido de la plantilla vacía, generándola solo si no está en caché.
+        :return: Bytes del archivo .xlsx.
+        """
+        return self.cache.get(self.config.content_hash(), self._build_template)
+
+    def _build_template(self, output_path):
+        """
+        Construye la plantilla con openpyxl y la guarda en la ruta indicada.
+        :param output_path: Ruta donde se guardará el archivo Excel.
+        """
+        # Crear un nuevo libro de trabajo
+        wb = Workbook()
+
+        # Configurar las hojas y validaciones
+        self._configure_sheets(wb)
+
+        # Guardar el archivo
+        wb.save(output_path)
+        self.logger.debug(f"Plantilla generada en: {output_path}")
+
     def _configure_sheets(self, wb):
         """
         Configura las hojas de cálculo y las validaciones necesarias.
@@ -64,22 +94,8 @@ class ExcelTemplateGenerator:
         for col, width in self.config.column_widths_transacciones.items():
             sheet_transacciones.column_dimensions[col].width = width
         
-        # Validaciones
-        
-        column_mapping = {
-            "Entró": "E",
-            "Salió": "F",
-            "Saldo": "G",
-            "Fecha": "B",
-            "Proveedor/Cliente": "D"
-        }
-        
-        # Definir las validaciones de datos
-        for key, configVa in self.config.validations.items():
-            validation = configVa["validation"]
-            validation.errorTitle = configVa["errorTitle"]
-            validation.error = configVa["error"]
-            validation.sqref = f"{column_mapping[key]}2:{column_mapping[key]}1048576"
+        # Definir las validaciones de datos (objetos nuevos para este libro)
+        for validation in self.config.build_validations():
             sheet_transacciones.add_data_validation(validation)
 
 
@@ -104,6 +120,9 @@ class ExcelTemplateGenerator:
         for row in self.config.instructions:
             sheet_instrucciones.append(row)
 
+        # Catálogo de proveedores en una hoja oculta, referenciado por nombre
+        add_lists_sheet(wb, self.config)
+
         # Aquí puedes agregar la lógica para configurar las hojas de cálculo y las validaciones necesarias.
         self.logger.debug("Hojas de cálculo configuradas y validaciones aplicadas.")
 
@@ -0,0 +1,168 @@
+"""
+Caché en memoria y en disco de las plantillas de Excel ya generadas.
+"""
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+# Nombre de una plantilla publicada: hash de la configuración en hexadecimal.
+# Los temporales en construcción terminan en ``.xlsx.tmp`` y no coinciden
+_ENTRY_NAME = re.compile(r"[0-9a-f]+\.xlsx")
+
+
+class TemplateCache:
+    """
+    Guarda los bytes de cada plantilla generada, identificada por el hash de su configuración.
+
+    Una plantilla se construye una sola vez por hash, aun con varios hilos
+    pidiéndola al mismo tiempo; las siguientes solicitudes solo copian bytes.
+    Como la clave es el contenido de la configuración, un cambio en los
+    encabezados, instrucciones o proveedores produce otra clave y la entrada
+    anterior deja de usarse sin invalidación explícita.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = None,
+        max_memory_entries: int = 8,
+        max_disk_entries: int = 32
+    ):
+        """
+        Inicializa la caché.
+
+        Args:
+            directory: Carpeta para guardar las plantillas en disco; None para usar solo memoria
+            max_memory_entries: Plantillas que se mantienen en memoria (las menos usadas salen primero)
+            max_disk_entries: Plantillas que se conservan en disco (las más antiguas se eliminan)
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.directory / f"{key}.xlsx" if self.directory is not None else None
+
+    def _remember(self, key: str, content: bytes) -> None:
+        with self._lock:
+            self._memory[key] = content
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+        path = self._path(key)
+        if path is not None and path.exists():
+            content = path.read_bytes()
+            self._remember(key, content)
+            return content
+        return None
+
+    def get(self, key: str, build: Callable[[Path], None]) -> bytes:
+        """
+        Retorna los bytes de la plantilla, construyéndola si no está en caché.
+
+        Args:
+            key: Hash de la configuración (``ExcelConfigProvider.content_hash``)
+            build: Función que genera la plantilla en la ruta recibida
+
+        Returns:
+            bytes: Contenido del archivo .xlsx
+        """
+        content = self._lookup(key)
+        if content is not None:
+            return content
+
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            # Otro hilo pudo haberla construido mientras se esperaba
+            content = self._lookup(key)
+            if content is not None:
+                return content
+            content = self._build(key, build)
+            self._remember(key, content)
+        with self._lock:
+            self._building.pop(key, None)
+        return content
+
+    def _build(self, key: str, build: Callable[[Path], None]) -> bytes:
+        """Genera la plantilla en un temporal y la publica de forma atómica en disco"""
+        directory = self.directory
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+        handle, temporary = tempfile.mkstemp(suffix=".xlsx.tmp", dir=directory)
+        os.close(handle)
+        temporary_path = Path(temporary)
+        try:
+            build(temporary_path)
+            content = temporary_path.read_bytes()
+            path = self._path(key)
+            if path is not None:
+                os.replace(temporary_path, path)
+                self._prune_disk()
+        finally:
+            temporary_path.unlink(missing_ok=True)
+        return content
+
+    def _entries(self) -> List[Path]:
+        """
+        Plantillas publicadas en disco, de la más antigua a la más reciente.
+
+        Otro hilo o proceso puede borrar una entrada mientras se recorre la
+        carpeta; esas entradas se omiten.
+        """
+        if self.directory is None or not self.directory.exists():
+            return []
+        entries = []
+        for path in self.directory.iterdir():
+            if not _ENTRY_NAME.fullmatch(path.name):
+                continue
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        return [path for _, path in sorted(entries)]
+
+    def _prune_disk(self) -> None:
+        """Elimina las plantillas más antiguas del disco por encima del límite"""
+        if self.max_disk_entries <= 0:
+            return
+        for path in self._entries()[:-self.max_disk_entries]:
+            path.unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Vacía la caché en memoria y en disco; las plantillas en construcción no se tocan"""
+        with self._lock:
+            self._memory.clear()
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+
+
+_default_cache: Optional[TemplateCache] = None
+_default_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateCache:
+    """
+    Retorna la caché de plantillas del proceso, creándola en la primera llamada.
+
+    Las plantillas se guardan en ``cache/templates`` dentro del proyecto.
+    """
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            from ...config.settings import get_settings
+            _default_cache = TemplateCache(get_settings().base_dir / "cache" / "templates")
+        return _default_cache
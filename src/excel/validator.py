@@ -0,0 +1,287 @@
+"""
+Validación vectorizada de transacciones a partir de las reglas de ExcelConfigProvider.
+"""
+import operator
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .excel_config import ExcelConfigProvider, ValidationSpec
+from .reader import parse_dates
+
+# Operadores de DataValidation de Excel traducidos a comparaciones de NumPy
+_COMPARISONS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "equal": operator.eq,
+    "notEqual": operator.ne,
+    "greaterThan": operator.gt,
+    "greaterThanOrEqual": operator.ge,
+    "lessThan": operator.lt,
+    "lessThanOrEqual": operator.le,
+}
+
+
+def _bitmap_dtype(rule_count: int) -> np.dtype:
+    """Retorna el entero sin signo más pequeño que alcanza para ``rule_count`` bits"""
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if rule_count <= np.iinfo(dtype).bits:
+            return np.dtype(dtype)
+    raise ValueError("No se soportan más de 64 reglas de validación")
+
+
+@dataclass
+class CompiledRule:
+    """Regla de validación lista para evaluarse sobre una columna completa"""
+    column: str
+    kind: str
+    allow_blank: bool
+    error_title: str
+    error: str
+    operator: Optional[str] = None
+    formula1: Optional[float] = None
+    formula2: Optional[float] = None
+    options: Optional[frozenset] = None
+
+    def evaluate(self, values: pd.Series) -> np.ndarray:
+        """
+        Evalúa la regla sobre una columna.
+
+        Args:
+            values: Columna cruda o tipada
+
+        Returns:
+            np.ndarray: Máscara booleana con True en las filas inválidas
+        """
+        blank = _blank_mask(values)
+        if self.kind in ("decimal", "whole"):
+            numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            invalid = ~blank & np.isnan(numbers)
+            if self.kind == "whole":
+                invalid |= ~np.isnan(numbers) & (np.floor(numbers) != numbers)
+            invalid |= self._compare(numbers)
+        elif self.kind == "date":
+            invalid = ~blank & parse_dates(values).isna().to_numpy()
+        elif self.kind == "list":
+            text = values.astype("string").str.strip()
+            invalid = ~blank & ~text.isin(self.options or ()).to_numpy(dtype=bool, na_value=False)
+        else:
+            invalid = np.zeros(len(values), dtype=bool)
+
+        if not self.allow_blank:
+            invalid |= blank
+        return invalid
+
+    def _compare(self, numbers: np.ndarray) -> np.ndarray:
+        """Marca los números que no cumplen el operador configurado"""
+        if self.formula1 is None:
+            return np.zeros(len(numbers), dtype=bool)
+        present = ~np.isnan(numbers)
+        with np.errstate(invalid="ignore"):
+            if self.operator in _COMPARISONS:
+                passed = _COMPARISONS[self.operator](numbers, self.formula1)
+            else:
+                low, high = self.formula1, self.formula2 if self.formula2 is not None else self.formula1
+                passed = (numbers >= low) & (numbers <= high)
+                if self.operator == "notBetween":
+                    passed = ~passed
+        return present & ~passed
+
+
+def _blank_mask(values: pd.Series) -> np.ndarray:
+    """Retorna True para celdas vacías (None, NaN o texto en blanco)"""
+    blank = values.isna().to_numpy().copy()
+    if values.dtype == object:
+        is_text = values.map(type).to_numpy() == str
+        if is_text.any():
+            blank[is_text] = (values[is_text].str.strip() == "").to_numpy(dtype=bool)
+    return blank
+
+
+def _parse_number(formula: Optional[str]) -> Optional[float]:
+    """Convierte una fórmula numérica literal a float"""
+    if formula is None:
+        return None
+    try:
+        return float(str(formula).strip().lstrip("="))
+    except ValueError:
+        return None
+
+
+def _parse_list(formula: Optional[str]) -> frozenset:
+    """Convierte una lista en línea de Excel (``"a,b,c"``) en un conjunto"""
+    if not formula:
+        return frozenset()
+    return frozenset(item.strip() for item in str(formula).strip().strip('"').split(",") if item.strip())
+
+
+def _list_options(spec: ValidationSpec) -> frozenset:
+    """
+    Opciones válidas de una validación de lista.
+
+    Las listas que apuntan a un rango (como el catálogo de proveedores de la
+    hoja oculta) traen sus opciones en ``spec.options``; las demás se leen de
+    la lista en línea de ``formula1``.
+    """
+    if spec.options is not None:
+        return frozenset(str(option).strip() for option in spec.options if str(option).strip())
+    return _parse_list(spec.formula1)
+
+
+@dataclass
+class ValidationResult:
+    """Resultado de validar un conjunto de filas"""
+    rules: Tuple[CompiledRule, ...]
+    rows: np.ndarray
+    bitmap: np.ndarray
+    counts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def is_valid(self) -> bool:
+        """True si ninguna fila tiene errores"""
+        return not self.bitmap.any()
+
+    @property
+    def error_count(self) -> int:
+        """Número de filas con al menos un error"""
+        return int(np.count_nonzero(self.bitmap))
+
+    def invalid_rows(self) -> np.ndarray:
+        """Números de fila (en Excel) con al menos un error"""
+        return self.rows[self.bitmap != 0]
+
+    def errors_for(self, row: int) -> List[str]:
+        """
+        Retorna los mensajes de error de una fila.
+
+        Args:
+            row: Número de fila en Excel
+
+        Returns:
+            List[str]: Mensajes de las reglas incumplidas
+        """
+        positions = np.flatnonzero(self.rows == row)
+        if not len(positions):
+            return []
+        mask = int(self.bitmap[positions[0]])
+        return [
+            f"{rule.column}: {rule.error}"
+            for bit, rule in enumerate(self.rules)
+            if mask & (1 << bit)
+        ]
+
+    @classmethod
+    def from_bitmap(cls, rules: Tuple[CompiledRule, ...], rows: np.ndarray, bitmap: np.ndarray) -> "ValidationResult":
+        """
+        Reconstruye un resultado a partir de un mapa de errores ya calculado.
+
+        Args:
+            rules: Reglas en el orden de sus bits
+            rows: Números de fila en Excel
+            bitmap: Mapa de errores por fila
+
+        Returns:
+            ValidationResult: Resultado con el conteo por regla recalculado
+        """
+        counts = {
+            rule.column: int(np.count_nonzero(bitmap & bitmap.dtype.type(1 << bit)))
+            for bit, rule in enumerate(rules)
+        }
+        return cls(rules=rules, rows=rows, bitmap=bitmap, counts=counts)
+
+    def merge(self, other: "ValidationResult") -> "ValidationResult":
+        """Combina este resultado con el de otro lote"""
+        counts = {column: self.counts.get(column, 0) + other.counts.get(column, 0) for column in self.counts}
+        return ValidationResult(
+            rules=self.rules,
+            rows=np.concatenate([self.rows, other.rows]),
+            bitmap=np.concatenate([self.bitmap, other.bitmap]),
+            counts=counts
+        )
+
+
+class TransactionValidator:
+    """
+    Compila ``ExcelConfigProvider.validations`` en chequeos vectorizados.
+
+    Cada regla ocupa un bit en el mapa de errores, en el mismo orden en que
+    aparece en la configuración.
+    """
+
+    def __init__(self, config: Optional[ExcelConfigProvider] = None):
+        """
+        Inicializa el validador.
+
+        Args:
+            config: Configuración de Excel; se crea una por defecto si no se indica
+        """
+        self.config = config or ExcelConfigProvider()
+        self.rules = self._compile(self.config)
+        self.bitmap_dtype = _bitmap_dtype(len(self.rules))
+
+    @staticmethod
+    def _compile(config: ExcelConfigProvider) -> Tuple[CompiledRule, ...]:
+        """Traduce las validaciones de Excel a reglas compiladas"""
+        rules = []
+        for column, spec in config.validations.items():
+            kind = spec.type
+            rules.append(CompiledRule(
+                column=column,
+                kind=kind,
+                allow_blank=spec.allow_blank,
+                error_title=spec.error_title,
+                error=spec.error,
+                operator=spec.operator,
+                formula1=_parse_number(spec.formula1) if kind != "list" else None,
+                formula2=_parse_number(spec.formula2) if kind != "list" else None,
+                options=_list_options(spec) if kind == "list" else None
+            ))
+        return tuple(rules)
+
+    def validate(self, frame: pd.DataFrame) -> ValidationResult:
+        """
+        Valida un lote de transacciones.
+
+        Args:
+            frame: Lote con las columnas de ``headers_transacciones``
+
+        Returns:
+            ValidationResult: Mapa de errores por fila y conteo por regla
+        """
+        bitmap = np.zeros(len(frame), dtype=self.bitmap_dtype)
+        counts: Dict[str, int] = {}
+        for bit, rule in enumerate(self.rules):
+            if rule.column not in frame.columns:
+                raise ValueError(f"La columna '{rule.column}' no está presente en el lote")
+            invalid = rule.evaluate(frame[rule.column])
+            bitmap |= invalid.astype(self.bitmap_dtype) << self.bitmap_dtype.type(bit)
+            counts[rule.column] = int(np.count_nonzero(invalid))
+        return ValidationResult(
+            rules=self.rules,
+            rows=frame.index.to_numpy(dtype="int64"),
+            bitmap=bitmap,
+            counts=counts
+        )
+
+    def validate_chunks(self, chunks: Iterable[pd.DataFrame]) -> ValidationResult:
+        """
+        Valida una secuencia de lotes, como la que entrega ``TransactionReader``.
+
+        Returns:
+            ValidationResult: Resultado acumulado de todos los lotes
+        """
+        rows: List[np.ndarray] = [np.empty(0, dtype="int64")]
+        bitmaps: List[np.ndarray] = [np.empty(0, dtype=self.bitmap_dtype)]
+        counts = {rule.column: 0 for rule in self.rules}
+        for chunk in chunks:
+            partial = self.validate(chunk)
+            rows.append(partial.rows)
+            bitmaps.append(partial.bitmap)
+            for column, count in partial.counts.items():
+                counts[column] += count
+        return ValidationResult(
+            rules=self.rules,
+            rows=np.concatenate(rows),
+            bitmap=np.concatenate(bitmaps),
+            counts=counts
+        )
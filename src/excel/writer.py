@@ -0,0 +1,177 @@
+"""
+Escritura en streaming de libros de transacciones con openpyxl en modo write_only.
+"""
+from pathlib import Path
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.utils import get_column_letter
+from openpyxl.workbook.defined_name import DefinedName
+
+from ..utils.instrumentation import metrics
+from .excel_config import HEADER_STYLE, LAST_ROW, LISTS_SHEET, PROVEEDORES_RANGE, ExcelConfigProvider
+
+# Columnas que se agregan a la hoja "Transacciones" en los libros de resultados
+RESULT_COLUMNS: List[Tuple[str, float]] = [
+    ("Tipo de coincidencia", 20),
+    ("Movimiento SIIGO", 20),
+    ("Confianza", 12),
+]
+
+
+def rows_from_frames(frames: Iterable[pd.DataFrame], columns: Sequence[str]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Convierte lotes de DataFrame en filas para ``TransactionWorkbookWriter.write``.
+
+    Los valores faltantes (NaN, NaT) se escriben como celdas vacías.
+
+    Args:
+        frames: Lotes, por ejemplo los de ``TransactionReader.iter_chunks``
+        columns: Columnas a escribir, en orden
+
+    Returns:
+        Iterator[Tuple[Any, ...]]: Una tupla por fila
+    """
+    for frame in frames:
+        values = frame.reindex(columns=list(columns)).astype(object)
+        values = values.where(values.notna(), None)
+        yield from values.itertuples(index=False, name=None)
+
+
+def add_lists_sheet(wb: Workbook, config: ExcelConfigProvider) -> None:
+    """
+    Agrega la hoja oculta con el catálogo de proveedores y su nombre definido.
+
+    La validación de "Proveedor/Cliente" apunta al nombre definido en lugar de
+    llevar la lista en línea, así que el catálogo puede tener miles de
+    entradas. Funciona tanto con libros normales como en modo write_only.
+
+    Args:
+        wb: Libro al que se agrega la hoja
+        config: Configuración con la lista de proveedores
+    """
+    sheet = wb.create_sheet(LISTS_SHEET)
+    for proveedor in config.proveedores:
+        sheet.append([proveedor])
+    sheet.sheet_state = "hidden"
+    wb.defined_names[PROVEEDORES_RANGE] = DefinedName(
+        PROVEEDORES_RANGE, attr_text=config.proveedores_reference()
+    )
+
+
+class TransactionWorkbookWriter:
+    """
+    Escribe plantillas prellenadas y libros de resultados sin mantener las celdas en memoria.
+
+    Usa ``Workbook(write_only=True)``: cada fila se serializa al disco al
+    agregarla, así que la memoria no crece con la cantidad de filas. Las hojas
+    conservan los encabezados, anchos, validaciones y las hojas "Instrucciones"
+    y "Listas" de ``ExcelTemplateGenerator``. Todas las celdas de un mismo tipo comparten
+    un único estilo con nombre tomado de ``ExcelConfigProvider``.
+    """
+
+    def __init__(self, config: Optional[ExcelConfigProvider] = None, logger: Any = None):
+        """
+        Inicializa el escritor.
+
+        Args:
+            config: Configuración de Excel; por defecto una nueva
+            logger: Logger con la interfaz ILogger; por defecto ``log.excel``
+        """
+        if logger is None:
+            from ..config import log
+            logger = log.excel
+        self.config = config or ExcelConfigProvider()
+        self.logger = logger
+
+    def write(
+        self,
+        output_path: Union[str, Path],
+        rows: Iterable[Sequence[Any]] = (),
+        extra_columns: Sequence[Tuple[str, float]] = ()
+    ) -> int:
+        """
+        Escribe el libro fila por fila.
+
+        Args:
+            output_path: Ruta del archivo a crear
+            rows: Filas con los valores de ``headers_transacciones`` y luego
+                los de ``extra_columns``; puede ser un generador
+            extra_columns: (encabezado, ancho) de columnas adicionales, por
+                ejemplo ``RESULT_COLUMNS``
+
+        Returns:
+            int: Filas de datos escritas
+        """
+        wb = Workbook(write_only=True)
+        for style in self.config.build_named_styles():
+            wb.add_named_style(style)
+
+        with metrics.stage("excel.write") as timer:
+            count = self._write_transacciones(wb, rows, extra_columns)
+            self._write_instrucciones(wb)
+            add_lists_sheet(wb, self.config)
+            wb.save(output_path)
+            timer.add(rows=count)
+        self.logger.info("Libro escrito", file=str(output_path), rows=count)
+        return count
+
+    def _header_row(self, sheet, headers: Sequence[str]) -> List[WriteOnlyCell]:
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(sheet, value=header)
+            cell.style = HEADER_STYLE
+            cells.append(cell)
+        return cells
+
+    def _write_transacciones(
+        self,
+        wb: Workbook,
+        rows: Iterable[Sequence[Any]],
+        extra_columns: Sequence[Tuple[str, float]]
+    ) -> int:
+        sheet = wb.create_sheet("Transacciones")
+        headers = list(self.config.headers_transacciones) + [header for header, _ in extra_columns]
+
+        # Anchos y validaciones deben definirse antes de escribir la primera fila
+        for column, width in self.config.column_widths_transacciones.items():
+            sheet.column_dimensions[column].width = width
+        offset = len(self.config.headers_transacciones)
+        for i, (_, width) in enumerate(extra_columns, start=offset + 1):
+            sheet.column_dimensions[get_column_letter(i)].width = width
+
+        for validation in self.config.build_validations(LAST_ROW):
+            sheet.data_validations.append(validation)
+
+        sheet.append(self._header_row(sheet, headers))
+
+        # Una celda con estilo por columna tipada, reutilizada en cada fila:
+        # openpyxl la serializa al agregar la fila, antes de la siguiente
+        styled = {}
+        for i, header in enumerate(self.config.headers_transacciones):
+            column_type = self.config.column_types_transacciones.get(header)
+            if column_type in self.config.number_formats:
+                cell = WriteOnlyCell(sheet)
+                cell.style = column_type
+                styled[i] = cell
+
+        count = 0
+        for row in rows:
+            values = list(row)
+            for i, cell in styled.items():
+                if i < len(values) and values[i] is not None and values[i] != "":
+                    cell.value = values[i]
+                    values[i] = cell
+            sheet.append(values)
+            count += 1
+        return count
+
+    def _write_instrucciones(self, wb: Workbook) -> None:
+        sheet = wb.create_sheet("Instrucciones")
+        for column, width in self.config.column_widths_instrucciones.items():
+            sheet.column_dimensions[column].width = width
+        sheet.append(self._header_row(sheet, self.config.headers_instrucciones))
+        for row in self.config.instructions:
+            sheet.append(row)
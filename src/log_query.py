@@ -0,0 +1,418 @@
+"""
+Índice y consultas sobre los archivos de log JSON.
+
+Cada archivo de log (actual o rotado, comprimido o no) tiene un índice
+SQLite en ``logs/.index`` con la posición de cada registro, su timestamp,
+nivel, logger y algunas claves de ``props``. Las consultas resuelven en el
+índice qué registros coinciden y solo leen esos registros del archivo.
+
+Uso:
+    python -m src.log_query --level ERROR --prop transaction_id=T0001 --since 7d
+"""
+import argparse
+import gzip
+import json
+import mmap
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # zstandard es opcional; sin él se omiten los archivos .zst
+    zstandard = None
+
+# Claves de ``props`` que se indexan por defecto
+DEFAULT_KEYS = ("file", "transaction_id", "kind", "status_code", "path")
+
+INDEX_DIR = ".index"
+
+# Los logs de log_config guardan el nombre del logger en 'name'
+_LOGGER_FIELDS = ("logger", "name")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS source (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    head BLOB NOT NULL,
+    keys TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS records (
+    offset INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    ts TEXT,
+    level TEXT,
+    logger TEXT
+);
+CREATE TABLE IF NOT EXISTS props (
+    offset INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS records_ts ON records (ts);
+CREATE INDEX IF NOT EXISTS records_level_ts ON records (level, ts);
+CREATE INDEX IF NOT EXISTS props_key_value ON props (key, value, offset);
+"""
+
+# Bytes del inicio del archivo guardados para detectar que fue reemplazado
+_HEAD_SIZE = 256
+
+_RELATIVE = re.compile(r"^(\d+)\s*([mhdw])$")
+_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_time(value: str, now: Optional[datetime] = None) -> str:
+    """
+    Convierte una fecha de la línea de comandos al formato de los timestamps del log.
+
+    Args:
+        value: Fecha ISO ('2024-01-31', '2024-01-31T10:00') o relativa ('30m', '12h', '7d', '2w')
+        now: Instante de referencia para fechas relativas; por defecto la hora UTC actual
+
+    Returns:
+        str: Fecha ISO 8601 en UTC comparable con el campo ``timestamp``
+    """
+    match = _RELATIVE.match(value.strip().lower())
+    if match:
+        amount, unit = match.groups()
+        moment = (now or datetime.utcnow()) - timedelta(**{_UNITS[unit]: int(amount)})
+        return moment.isoformat()
+    return datetime.fromisoformat(value.strip()).isoformat()
+
+
+def _open_decompressed(path: Path):
+    """Abre un archivo rotado comprimido como flujo binario descomprimido"""
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"Se requiere zstandard para leer {path.name}")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    raise ValueError(f"Formato de compresión no soportado: {path.name}")
+
+
+def _is_compressed(path: Path) -> bool:
+    return path.suffix in (".gz", ".zst")
+
+
+def _iter_lines(stream, start: int = 0) -> Iterator[Tuple[int, bytes]]:
+    """Recorre un flujo binario retornando (posición, línea) de cada línea completa"""
+    offset = start
+    for line in stream:
+        if not line.endswith(b"\n"):
+            # Línea a medio escribir: se indexa en la próxima actualización
+            return
+        yield offset, line
+        offset += len(line)
+
+
+class LogIndex:
+    """Índice de un único archivo de log"""
+
+    def __init__(self, source: Union[str, Path], index_path: Union[str, Path], keys: Sequence[str] = DEFAULT_KEYS):
+        """
+        Inicializa el índice, creando el archivo SQLite si no existe.
+
+        Args:
+            source: Archivo de log (.log, .log.gz o .log.zst)
+            index_path: Archivo SQLite del índice
+            keys: Claves de ``props`` a indexar
+        """
+        self.source = Path(source)
+        self.index_path = Path(index_path)
+        self.keys = tuple(keys)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(source)")}
+            if "keys" not in columns:
+                # Índice de una versión anterior: sin claves guardadas se reconstruye
+                conn.execute("ALTER TABLE source ADD COLUMN keys TEXT NOT NULL DEFAULT ''")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre una conexión con commit automático al salir sin errores"""
+        conn = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _head(self) -> bytes:
+        with open(self.source, "rb") as stream:
+            return stream.read(_HEAD_SIZE)
+
+    def update(self) -> int:
+        """
+        Indexa los registros nuevos del archivo.
+
+        Los archivos rotados no cambian y se indexan una sola vez; en el
+        archivo actual solo se recorre lo escrito desde la última
+        actualización. Si el archivo fue reemplazado (rotación) o el índice se
+        creó con otras claves de ``props``, se reindexa desde el inicio.
+
+        Returns:
+            int: Registros agregados al índice
+        """
+        stat = self.source.stat()
+        head = self._head()
+        keys = json.dumps(self.keys)
+        with self._connect() as conn:
+            row = conn.execute("SELECT size, mtime_ns, head, keys FROM source").fetchone()
+            if row is not None and row[3] != keys:
+                row = None
+            if row is not None and (row[0], row[1]) == (stat.st_size, stat.st_mtime_ns):
+                return 0
+
+            start = 0
+            if row is not None and not _is_compressed(self.source) and stat.st_size >= row[0] \
+                    and head[:len(row[2])] == row[2]:
+                start = conn.execute("SELECT COALESCE(MAX(offset + length), 0) FROM records").fetchone()[0]
+            else:
+                conn.execute("DELETE FROM records")
+                conn.execute("DELETE FROM props")
+
+            records: List[Tuple[int, int, Any, Any, Any]] = []
+            props: List[Tuple[int, str, str]] = []
+            for offset, line in self._scan(start):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                logger = next((entry[field] for field in _LOGGER_FIELDS if field in entry), None)
+                records.append((offset, len(line), entry.get("timestamp"), entry.get("level"), logger))
+                values = entry.get("props") if isinstance(entry.get("props"), dict) else entry
+                for key in self.keys:
+                    if values.get(key) is not None:
+                        props.append((offset, key, str(values[key])))
+
+            conn.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", records)
+            conn.executemany("INSERT INTO props VALUES (?, ?, ?)", props)
+            conn.execute(
+                "INSERT OR REPLACE INTO source (id, size, mtime_ns, head, keys) VALUES (1, ?, ?, ?, ?)",
+                (stat.st_size, stat.st_mtime_ns, head, keys)
+            )
+        return len(records)
+
+    def _scan(self, start: int) -> Iterator[Tuple[int, bytes]]:
+        """Recorre las líneas del archivo desde ``start`` (posición sin comprimir)"""
+        if _is_compressed(self.source):
+            with _open_decompressed(self.source) as stream:
+                yield from _iter_lines(stream)
+            return
+        with open(self.source, "rb") as stream:
+            stream.seek(start)
+            yield from _iter_lines(stream, start)
+
+    def find(
+        self,
+        level: Optional[str] = None,
+        logger: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        props: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[int, int]]:
+        """
+        Busca en el índice los registros que cumplen los filtros.
+
+        Solo se filtran en el índice las claves de ``props`` con las que se
+        construyó; las demás se aplican después, al leer los registros.
+
+        Returns:
+            List[Tuple[int, int]]: (posición, longitud) de cada registro, en orden
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        if level:
+            clauses.append("level = ?")
+            params.append(level.upper())
+        if logger:
+            clauses.append("logger = ?")
+            params.append(logger)
+        if since:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until:
+            clauses.append("ts < ?")
+            params.append(until)
+        with self._connect() as conn:
+            row = conn.execute("SELECT keys FROM source").fetchone()
+            indexed = set(json.loads(row[0])) if row and row[0] else set()
+            for key, value in (props or {}).items():
+                if key in indexed:
+                    clauses.append("offset IN (SELECT offset FROM props WHERE key = ? AND value = ?)")
+                    params.extend((key, str(value)))
+
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+            return conn.execute(f"SELECT offset, length FROM records {where} ORDER BY offset", params).fetchall()
+
+    def read(self, spans: Iterable[Tuple[int, int]]) -> Iterator[Dict[str, Any]]:
+        """
+        Lee los registros indicados por el índice.
+
+        Los archivos sin comprimir se leen con mmap, tocando solo las páginas
+        de los registros pedidos. Los comprimidos se descomprimen una sola vez
+        hacia adelante, saltando hasta cada registro en orden.
+        """
+        spans = list(spans)
+        if not spans:
+            return
+        if _is_compressed(self.source):
+            with _open_decompressed(self.source) as stream:
+                position = 0
+                for offset, length in spans:
+                    if offset > position:
+                        stream.seek(offset - position, 1)
+                    yield json.loads(stream.read(length))
+                    position = offset + length
+            return
+        with open(self.source, "rb") as stream, mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            for offset, length in spans:
+                yield json.loads(view[offset:offset + length])
+
+
+def _matches(entry: Dict[str, Any], props: Dict[str, Any]) -> bool:
+    """Verifica los filtros de ``props`` sobre el registro leído"""
+    values = entry.get("props") if isinstance(entry.get("props"), dict) else entry
+    return all(key in values and str(values[key]) == str(value) for key, value in props.items())
+
+
+class LogQuery:
+    """Consultas sobre todos los archivos de log de un directorio"""
+
+    def __init__(self, log_dir: Optional[Union[str, Path]] = None, keys: Sequence[str] = DEFAULT_KEYS):
+        """
+        Inicializa el consultor.
+
+        Args:
+            log_dir: Directorio de logs; por defecto el de la configuración
+            keys: Claves de ``props`` a indexar
+        """
+        if log_dir is None:
+            from .config.settings import get_settings
+            log_dir = get_settings().logging.log_dir
+        self.log_dir = Path(log_dir)
+        self.index_dir = self.log_dir / INDEX_DIR
+        self.keys = tuple(keys)
+
+    def files(self) -> List[Path]:
+        """Archivos de log actuales y rotados, ordenados por ruta"""
+        return sorted(
+            path for path in self.log_dir.rglob("*.log*")
+            if path.is_file() and INDEX_DIR not in path.relative_to(self.log_dir).parts
+            and not path.name.endswith(".tmp")
+        )
+
+    def index_for(self, path: Path) -> LogIndex:
+        """Índice asociado a un archivo de log"""
+        relative = path.relative_to(self.log_dir)
+        return LogIndex(path, self.index_dir / f"{relative}.sqlite3", self.keys)
+
+    def update(self) -> int:
+        """
+        Actualiza los índices de todos los archivos y elimina los de archivos borrados.
+
+        Returns:
+            int: Registros agregados
+        """
+        files = self.files()
+        added = 0
+        for path in files:
+            if path.suffix == ".zst" and zstandard is None:
+                continue
+            added += self.index_for(path).update()
+
+        expected = {self.index_dir / f"{path.relative_to(self.log_dir)}.sqlite3" for path in files}
+        if self.index_dir.exists():
+            for index_path in self.index_dir.rglob("*.sqlite3"):
+                if index_path not in expected:
+                    index_path.unlink()
+        return added
+
+    def search(
+        self,
+        level: Optional[str] = None,
+        logger: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        props: Optional[Dict[str, Any]] = None,
+        update: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Retorna los registros que cumplen todos los filtros.
+
+        Args:
+            level: Nivel exacto ('ERROR', 'INFO', ...)
+            logger: Nombre del logger ('app', 'error', 'excel', 'siigo')
+            since: Timestamp ISO mínimo (inclusive)
+            until: Timestamp ISO máximo (exclusivo)
+            props: Valores exactos de claves de ``props``
+            update: Actualizar los índices antes de consultar
+
+        Yields:
+            Dict[str, Any]: Registros de log
+        """
+        if update:
+            self.update()
+        props = props or {}
+        for path in self.files():
+            if path.suffix == ".zst" and zstandard is None:
+                continue
+            index = self.index_for(path)
+            spans = index.find(level=level, logger=logger, since=since, until=until, props=props)
+            for entry in index.read(spans):
+                if _matches(entry, props):
+                    yield entry
+
+
+def _parse_props(values: Sequence[str]) -> Dict[str, str]:
+    props = {}
+    for value in values:
+        key, separator, expected = value.partition("=")
+        if not separator:
+            raise argparse.ArgumentTypeError(f"Filtro inválido '{value}', se espera clave=valor")
+        props[key] = expected
+    return props
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Punto de entrada de la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Consulta indexada de los logs JSON")
+    parser.add_argument("--log-dir", help="Directorio de logs (por defecto, el de la configuración)")
+    parser.add_argument("--level", help="Nivel exacto, por ejemplo ERROR")
+    parser.add_argument("--logger", help="Logger: app, error, excel o siigo")
+    parser.add_argument("--since", help="Desde (ISO o relativo: 30m, 12h, 7d, 2w)")
+    parser.add_argument("--until", help="Hasta, exclusivo (ISO o relativo)")
+    parser.add_argument("--prop", action="append", default=[], help="Filtro clave=valor sobre props; repetible")
+    parser.add_argument("--key", action="append", help="Clave de props a indexar; repetible")
+    parser.add_argument("--limit", type=int, default=0, help="Máximo de registros a mostrar")
+    parser.add_argument("--index-only", action="store_true", help="Solo actualizar los índices")
+    args = parser.parse_args(argv)
+
+    query = LogQuery(args.log_dir, keys=args.key or DEFAULT_KEYS)
+    if args.index_only:
+        print(f"Registros indexados: {query.update()}")
+        return 0
+
+    results = query.search(
+        level=args.level,
+        logger=args.logger,
+        since=parse_time(args.since) if args.since else None,
+        until=parse_time(args.until) if args.until else None,
+        props=_parse_props(args.prop)
+    )
+    for count, entry in enumerate(results, start=1):
+        sys.stdout.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        if args.limit and count >= args.limit:
+            break
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
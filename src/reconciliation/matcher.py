@@ -0,0 +1,377 @@
+"""
+Conciliación indexada entre las transacciones del Excel y los movimientos de SIIGO.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+MATCH_EXACT = "exact"
+MATCH_FUZZY = "fuzzy"
+MATCH_NONE = "none"
+
+# Columnas de la hoja "Transacciones" que participan en la conciliación
+TRANSACTION_COLUMNS = {
+    "date": "Fecha",
+    "entro": "Entró",
+    "salio": "Salió",
+    "counterparty": "Proveedor/Cliente",
+}
+
+
+@dataclass
+class MovementColumns:
+    """Nombres de las columnas del DataFrame de movimientos de SIIGO"""
+    id: str = "id"
+    date: str = "date"
+    amount: str = "amount"
+    counterparty: str = "counterparty"
+
+
+def _days(values: pd.Series) -> np.ndarray:
+    """Convierte fechas a días desde la época; las fechas inválidas quedan en el mínimo de int64"""
+    dates = pd.to_datetime(values, errors="coerce").dt.normalize()
+    days = dates.to_numpy(dtype="datetime64[D]").astype("int64")
+    return np.where(dates.isna().to_numpy(), np.iinfo(np.int64).min, days)
+
+
+def _cents(values: pd.Series) -> np.ndarray:
+    """Convierte montos a centavos enteros para comparar sin errores de punto flotante"""
+    amounts = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    cents = np.round(np.nan_to_num(amounts, nan=0.0) * 100).astype("int64")
+    return np.where(np.isnan(amounts), np.iinfo(np.int64).min, cents)
+
+
+def _party(values: pd.Series) -> np.ndarray:
+    """Normaliza el tercero para compararlo sin distinguir mayúsculas ni espacios"""
+    return values.astype("string").str.strip().str.casefold().fillna("").to_numpy(dtype=object)
+
+
+class MatchSession(np.ndarray):
+    """
+    Registro de movimientos usados durante la conciliación de un archivo.
+
+    Es un arreglo booleano (True = movimiento asignado o inválido) con el
+    cursor de cada grupo de coincidencia exacta: la posición del primer
+    movimiento del grupo que aún puede estar libre.
+    """
+    cursor: Optional[np.ndarray] = None
+
+    def __array_finalize__(self, obj: Optional[np.ndarray]) -> None:
+        self.cursor = getattr(obj, "cursor", None)
+
+
+class ReconciliationMatcher:
+    """
+    Empareja transacciones con movimientos de SIIGO usando índices precalculados.
+
+    Los movimientos se indexan una sola vez al construir el objeto:
+
+    * un índice hash sobre (fecha, monto, tercero) para las coincidencias exactas,
+      con los movimientos de cada clave agrupados y un cursor por grupo;
+    * un arreglo ordenado por monto para las coincidencias aproximadas, donde
+      ``searchsorted`` ubica en O(log n) los candidatos dentro de la tolerancia
+      y, dentro de cada monto, los de la ventana de fechas.
+
+    Cada movimiento se asigna a lo sumo a una transacción por llamada a ``match``.
+    """
+
+    def __init__(
+        self,
+        movements: pd.DataFrame,
+        date_window: int = 3,
+        amount_tolerance: float = 0.0,
+        max_candidates: int = 256,
+        columns: Optional[MovementColumns] = None
+    ):
+        """
+        Inicializa el emparejador e indexa los movimientos.
+
+        Args:
+            movements: Movimientos de SIIGO con id, fecha, monto con signo y tercero
+            date_window: Diferencia máxima en días para una coincidencia aproximada
+            amount_tolerance: Diferencia máxima de monto para una coincidencia aproximada
+            max_candidates: Máximo de candidatos evaluados por transacción en la etapa aproximada
+            columns: Nombres de columnas de ``movements``
+        """
+        if date_window < 0 or amount_tolerance < 0:
+            raise ValueError("La ventana de fechas y la tolerancia no pueden ser negativas")
+        self.columns = columns or MovementColumns()
+        self.date_window = int(date_window)
+        self.tolerance_cents = int(round(amount_tolerance * 100))
+        self.max_candidates = max_candidates
+
+        self.movement_ids = movements[self.columns.id].to_numpy()
+        self._days = _days(movements[self.columns.date])
+        self._cents = _cents(movements[self.columns.amount])
+        self._party = _party(movements[self.columns.counterparty])
+        # Los movimientos sin fecha o monto se marcan como usados para excluirlos
+        self._invalid_movements = (self._days == np.iinfo(np.int64).min) | (self._cents == np.iinfo(np.int64).min)
+
+        # Índice hash para coincidencias exactas: cada clave (fecha, monto, tercero)
+        # es un grupo, y los movimientos de cada grupo quedan contiguos en
+        # ``_members`` (en su orden original) para asignar duplicados uno a uno
+        party_codes, parties = pd.factorize(self._party)
+        self._party_index = pd.Index(parties)
+        keys = pd.DataFrame({"day": self._days, "cents": self._cents, "party": party_codes})
+        groups = keys.groupby(["day", "cents", "party"], sort=False).ngroup().to_numpy()
+        self._groups = pd.MultiIndex.from_frame(keys.drop_duplicates())
+        self._members = np.argsort(groups, kind="stable")
+        self._group_starts = np.concatenate([[0], np.cumsum(np.bincount(groups, minlength=len(self._groups)))])
+        self._movement_group = groups
+        self._member_rank = np.empty(len(groups), dtype="int64")
+        self._member_rank[self._members] = np.arange(len(groups))
+
+        # Índice ordenado por (monto, fecha) para coincidencias aproximadas
+        self._order = np.lexsort((self._days, self._cents))
+        self._sorted_cents = self._cents[self._order]
+        self._sorted_days = self._days[self._order]
+        # Inicio de cada tramo de igual monto en el índice ordenado; dentro de
+        # un tramo las fechas están ordenadas y se buscan con ``searchsorted``
+        self._run_starts = np.concatenate(
+            [[0], np.flatnonzero(np.diff(self._sorted_cents)) + 1, [len(self._sorted_cents)]]
+        ).astype("int64")
+        # Posición de cada id de movimiento; se construye al primer ``reserve`` o ``claim``
+        self._id_positions: Optional[Dict[str, int]] = None
+
+    def new_session(self) -> "MatchSession":
+        """
+        Crea el registro de movimientos usados para emparejar varios lotes.
+
+        Pasar el mismo arreglo a llamadas sucesivas de ``match`` mantiene la
+        asignación uno a uno entre lotes de un mismo archivo.
+        """
+        session = self._invalid_movements.copy().view(MatchSession)
+        session.cursor = self._group_starts[:-1].copy()
+        return session
+
+    def reserve(self, used: np.ndarray, movement_ids: Iterable[Any], reserved: bool = True) -> int:
+        """
+        Marca como usados (o libera) movimientos por su id en un registro de ``new_session``.
+
+        Sirve para conservar las asignaciones de una ejecución anterior: los
+        movimientos ya conciliados no se ofrecen a otras transacciones.
+
+        Args:
+            used: Registro de movimientos usados; se actualiza en el lugar
+            movement_ids: Ids de los movimientos; los que no existen se ignoran
+            reserved: False para liberar los movimientos en lugar de reservarlos
+
+        Returns:
+            int: Cantidad de movimientos encontrados
+        """
+        id_positions = self._positions()
+        positions = [id_positions[key] for key in map(str, movement_ids) if key in id_positions]
+        if positions:
+            positions = np.asarray(positions, dtype="int64")
+            # Los movimientos sin fecha o monto siguen excluidos al liberarlos
+            used[positions] = True if reserved else self._invalid_movements[positions]
+            cursor = getattr(used, "cursor", None)
+            if not reserved and cursor is not None:
+                # El cursor del grupo vuelve atrás para ofrecer de nuevo los liberados
+                groups = self._movement_group[positions]
+                np.minimum.at(cursor, groups, self._member_rank[positions])
+        return len(positions)
+
+    def claim(self, used: np.ndarray, movement_ids: Iterable[Any]) -> np.ndarray:
+        """
+        Reserva, en orden, movimientos que otra ejecución ya había asignado.
+
+        A diferencia de ``reserve``, informa cuáles se pudieron reservar: un id
+        que ya no existe, que quedó sin fecha o monto, o que ya está usado en
+        la sesión no se reserva y su transacción debe conciliarse de nuevo.
+
+        Args:
+            used: Registro de movimientos usados; se actualiza en el lugar
+            movement_ids: Ids de los movimientos, uno por transacción
+
+        Returns:
+            np.ndarray: True para cada id que quedó reservado
+        """
+        id_positions = self._positions()
+        claimed = []
+        for key in map(str, movement_ids):
+            position = id_positions.get(key)
+            free = position is not None and not used[position]
+            if free:
+                used[position] = True
+            claimed.append(free)
+        return np.asarray(claimed, dtype=bool)
+
+    def options_hash(self) -> str:
+        """Huella de las opciones que cambian el resultado de la conciliación"""
+        return f"{self.date_window}:{self.tolerance_cents}:{self.max_candidates}"
+
+    def _positions(self) -> Dict[str, int]:
+        """Posición de cada id de movimiento, construida en la primera consulta"""
+        if self._id_positions is None:
+            self._id_positions = {}
+            for position, movement_id in enumerate(self.movement_ids):
+                self._id_positions.setdefault(str(movement_id), position)
+        return self._id_positions
+
+    def match(self, transactions: pd.DataFrame, used: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Empareja un lote de transacciones.
+
+        Args:
+            transactions: Transacciones tipadas con las columnas de la hoja "Transacciones"
+            used: Registro de movimientos ya asignados creado con ``new_session``;
+                se actualiza en el lugar
+
+        Returns:
+            pd.DataFrame: Con el mismo índice que ``transactions`` y columnas
+            ``match_type``, ``movement_id`` y ``confidence``
+        """
+        days = _days(transactions[TRANSACTION_COLUMNS["date"]])
+        entro = pd.to_numeric(transactions[TRANSACTION_COLUMNS["entro"]], errors="coerce")
+        salio = pd.to_numeric(transactions[TRANSACTION_COLUMNS["salio"]], errors="coerce")
+        cents = _cents(entro.fillna(0.0) + salio.fillna(0.0))
+        party = _party(transactions[TRANSACTION_COLUMNS["counterparty"]])
+        # Sin fecha o sin ningún monto no hay con qué emparejar
+        invalid = (days == np.iinfo(np.int64).min) | (entro.isna() & salio.isna()).to_numpy()
+
+        count = len(transactions)
+        movement = np.full(count, -1, dtype="int64")
+        confidence = np.zeros(count, dtype="float64")
+        match_type = np.full(count, MATCH_NONE, dtype=object)
+        if used is None:
+            used = self.new_session()
+
+        self._match_exact(days, cents, party, invalid, movement, confidence, match_type, used)
+        self._match_fuzzy(days, cents, party, invalid, movement, confidence, match_type, used)
+
+        movement_ids = np.full(count, None, dtype=object)
+        matched = movement >= 0
+        movement_ids[matched] = self.movement_ids[movement[matched]]
+        return pd.DataFrame(
+            {"match_type": match_type, "movement_id": movement_ids, "confidence": confidence},
+            index=transactions.index
+        )
+
+    def _match_exact(self, days, cents, party, invalid, movement, confidence, match_type, used) -> None:
+        """
+        Resuelve las coincidencias exactas buscando el grupo de cada transacción.
+
+        Cada grupo guarda en ``used.cursor`` hasta dónde se consumieron sus
+        movimientos, así que el trabajo es proporcional al lote y no al total
+        de movimientos.
+        """
+        party_codes = self._party_index.get_indexer(party)
+        candidates = np.flatnonzero(~invalid & (party_codes >= 0))
+        if not len(candidates) or not len(self._groups):
+            return
+        lookup = pd.MultiIndex.from_arrays([days[candidates], cents[candidates], party_codes[candidates]])
+        groups = self._groups.get_indexer(lookup)
+        found = groups >= 0
+        candidates, groups = candidates[found], groups[found]
+
+        cursor = getattr(used, "cursor", None)
+        if cursor is None:
+            cursor = self._group_starts[:-1].copy()
+        members, ends = self._members, self._group_starts[1:]
+        for position, group in zip(candidates.tolist(), groups.tolist()):
+            index, end = cursor[group], ends[group]
+            while index < end and used[members[index]]:
+                index += 1
+            if index < end:
+                chosen = members[index]
+                used[chosen] = True
+                movement[position] = chosen
+                confidence[position] = 1.0
+                match_type[position] = MATCH_EXACT
+                index += 1
+            cursor[group] = index
+
+    def _match_fuzzy(self, days, cents, party, invalid, movement, confidence, match_type, used) -> None:
+        """Busca por rango de monto en el índice ordenado y filtra por ventana de fechas"""
+        pending = np.flatnonzero((movement < 0) & ~invalid)
+        if not len(pending) or not len(self._order):
+            return
+
+        low = np.searchsorted(self._sorted_cents, cents[pending] - self.tolerance_cents, side="left")
+        high = np.searchsorted(self._sorted_cents, cents[pending] + self.tolerance_cents, side="right")
+        first_runs = np.searchsorted(self._run_starts, low, side="right") - 1
+        last_runs = np.searchsorted(self._run_starts, high, side="left")
+        window = max(self.date_window, 1)
+        tolerance = max(self.tolerance_cents, 1)
+
+        for position, lo, hi, first_run, last_run in zip(pending, low, high, first_runs, last_runs):
+            if lo >= hi:
+                continue
+            candidates = self._fuzzy_candidates(days[position], cents[position], first_run, last_run)
+            if not len(candidates):
+                continue
+
+            chosen_movements = self._order[candidates]
+            eligible = ~used[chosen_movements]
+            if not eligible.any():
+                continue
+
+            day_gap = np.abs(self._sorted_days[candidates] - days[position])
+            amount_gap = np.abs(self._sorted_cents[candidates] - cents[position])
+            same_party = self._party[chosen_movements] == party[position]
+            score = (
+                0.5
+                + 0.2 * (1 - day_gap / window)
+                + 0.2 * (1 - amount_gap / tolerance)
+                + 0.09 * same_party
+            )
+            score[~eligible] = -1.0
+            best = int(np.argmax(score))
+            chosen = chosen_movements[best]
+
+            used[chosen] = True
+            movement[position] = chosen
+            confidence[position] = round(float(min(score[best], 0.99)), 4)
+            match_type[position] = MATCH_FUZZY
+
+    def _fuzzy_candidates(self, day: int, cent: int, first_run: int, last_run: int) -> np.ndarray:
+        """
+        Posiciones del índice ordenado dentro de la ventana de fechas, para los tramos de monto indicados.
+
+        En cada tramo de igual monto se ubica la ventana con ``searchsorted``
+        sobre las fechas, así un monto muy repetido no deja fuera a los
+        movimientos de la fecha buscada. Si hay más de ``max_candidates``, se
+        prefieren los montos más cercanos y, dentro de un tramo, las fechas
+        más cercanas.
+        """
+        slices = []
+        for run in range(first_run, last_run):
+            start, end = self._run_starts[run], self._run_starts[run + 1]
+            run_days = self._sorted_days[start:end]
+            a = start + np.searchsorted(run_days, day - self.date_window, side="left")
+            b = start + np.searchsorted(run_days, day + self.date_window, side="right")
+            if a < b:
+                slices.append((abs(int(self._sorted_cents[start]) - cent), a, b))
+        if len(slices) == 1 and slices[0][2] - slices[0][1] <= self.max_candidates:
+            return np.arange(slices[0][1], slices[0][2])
+
+        parts = []
+        remaining = self.max_candidates
+        for _, a, b in sorted(slices):
+            if remaining <= 0:
+                break
+            part = np.arange(a, b)
+            if len(part) > remaining:
+                nearest = np.argsort(np.abs(self._sorted_days[part] - day), kind="stable")[:remaining]
+                part = np.sort(part[nearest])
+            parts.append(part)
+            remaining -= len(part)
+        return np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+
+    @staticmethod
+    def summarize(matches: pd.DataFrame) -> Dict[str, int]:
+        """Cuenta las transacciones por tipo de coincidencia"""
+        counts = matches["match_type"].value_counts()
+        return {kind: int(counts.get(kind, 0)) for kind in (MATCH_EXACT, MATCH_FUZZY, MATCH_NONE)}
+
+    @staticmethod
+    def conciliado(matches: pd.DataFrame) -> pd.Series:
+        """Valor para la columna "Conciliado en SIIGO" según el resultado del emparejamiento"""
+        return pd.Series(
+            np.where(matches["match_type"].to_numpy() == MATCH_NONE, "No", "Sí"),
+            index=matches.index,
+            name="Conciliado en SIIGO"
+        )
@@ -0,0 +1,336 @@
+"""
+Estado persistente (SQLite) de las filas ya procesadas de cada archivo.
+
+Los operadores agregan filas todos los días al mismo libro. Con este estado,
+cada ejecución compara la huella de cada fila (por su ID) con la de la
+ejecución anterior: solo las filas nuevas o modificadas se validan y se
+concilian, y las filas sin cambios ya conciliadas reutilizan su resultado.
+
+Uso:
+    state = ReconciliationState("cache/reconciliation_state.sqlite3")
+    session = state.session("cuenta.xlsx", config.content_hash())
+    for raw, typed in chunks:
+        delta = session.diff(typed, raw)
+        ...
+        session.record(typed, delta, bitmap, matches)
+    session.commit()
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .matcher import MATCH_NONE
+
+# Cambia cuando cambia la forma de calcular las huellas; invalida el estado guardado
+STATE_VERSION = 2
+
+# Columna con el identificador de cada transacción
+ID_COLUMN = "ID"
+
+# Columna que escribe la conciliación; no forma parte de la huella de la fila
+CONCILIADO_COLUMN = "Conciliado en SIIGO"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT PRIMARY KEY,
+    config_hash TEXT NOT NULL,
+    rows INTEGER NOT NULL,
+    processed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    file TEXT NOT NULL,
+    id TEXT NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    errors INTEGER NOT NULL,
+    match_type TEXT,
+    movement_id TEXT,
+    confidence REAL,
+    PRIMARY KEY (file, id)
+);
+"""
+
+
+def row_fingerprints(frame: pd.DataFrame, raw: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """
+    Calcula una huella de 64 bits por fila sobre los valores tipados.
+
+    Se usa el lote tipado para que la huella no dependa de cómo se leyó el
+    archivo (openpyxl, la caché de columnas o un extracto CSV). La columna
+    "Conciliado en SIIGO" se excluye porque la escribe el propio proceso.
+
+    Una celda con texto que no se pudo convertir queda vacía en el lote
+    tipado; con ``raw`` su texto original también entra en la huella, para
+    que cambiar ese texto, o borrarlo, cuente como una modificación.
+
+    Args:
+        frame: Lote tipado con las columnas de ``headers_transacciones``
+        raw: Lote sin convertir del que se obtuvo ``frame``
+
+    Returns:
+        np.ndarray: Huellas como int64, en el orden de las filas
+    """
+    columns = [column for column in frame.columns if column != CONCILIADO_COLUMN]
+    hashed = pd.util.hash_pandas_object(frame[columns], index=False).to_numpy(dtype="uint64", copy=True)
+    if raw is not None:
+        for position, column in enumerate(columns):
+            if column not in raw.columns:
+                continue
+            text = raw[column].astype("object").to_numpy()
+            failed = frame[column].isna().to_numpy() & ~pd.isna(text)
+            if not failed.any():
+                continue
+            values = np.array([f"{position}\x1f{value}" for value in text[failed]], dtype=object)
+            hashed[failed] ^= pd.util.hash_array(values)
+    return hashed.view("int64")
+
+
+@dataclass
+class RowDelta:
+    """Comparación de un lote con el estado de la ejecución anterior"""
+    # Huella de cada fila del lote
+    fingerprints: np.ndarray
+    # Filas nuevas, modificadas o sin ID: hay que validarlas
+    changed: np.ndarray
+    # Filas que hay que conciliar: las modificadas y las que aún no están conciliadas
+    pending: np.ndarray
+    # Filas cuyo resultado se guarda al terminar (ID único en el archivo)
+    storable: np.ndarray
+    # Resultado guardado de cada fila; vacío para las filas nuevas
+    errors: np.ndarray
+    match_type: np.ndarray
+    movement_id: np.ndarray
+    confidence: np.ndarray
+
+    @property
+    def skipped(self) -> int:
+        """Filas que no se validan ni se concilian"""
+        return int(np.count_nonzero(~self.changed & ~self.pending))
+
+
+class StateSession:
+    """
+    Comparación de un archivo con su estado anterior durante una ejecución.
+
+    Las filas guardadas se cargan una vez al abrir la sesión; los resultados
+    nuevos se acumulan en memoria y se escriben en una sola transacción con
+    ``commit``. Si el procesamiento falla antes, el estado anterior se conserva.
+    """
+
+    def __init__(self, state: "ReconciliationState", file: str, config_hash: str, previous: pd.DataFrame):
+        """
+        Args:
+            state: Almacén al que pertenece la sesión
+            file: Ruta absoluta del archivo
+            config_hash: Huella de la configuración y de la versión del estado
+            previous: Filas guardadas, indexadas por ID
+        """
+        self.state = state
+        self.file = file
+        self.config_hash = config_hash
+        self.previous = previous
+        self.rows = 0
+        self._seen: Set[str] = set()
+        self._updates: List[Tuple] = []
+
+    def diff(self, typed: pd.DataFrame, raw: Optional[pd.DataFrame] = None) -> RowDelta:
+        """
+        Compara un lote tipado con el estado anterior.
+
+        Una fila sin cambios se concilia de nuevo solo si su resultado anterior
+        no tiene coincidencia y en la hoja no está marcada como conciliada,
+        porque pueden haber llegado movimientos nuevos de SIIGO.
+
+        Args:
+            typed: Lote tipado con las columnas de ``headers_transacciones``
+            raw: Lote sin convertir, para distinguir en la huella el texto
+                inválido de una celda vacía
+
+        Returns:
+            RowDelta: Filas a validar y a conciliar, y el resultado guardado de las demás
+        """
+        fingerprints = row_fingerprints(typed, raw)
+        ids = typed[ID_COLUMN].astype("object")
+        missing_id = ids.isna().to_numpy()
+        keys = ids.where(~missing_id, "").astype(str).to_numpy(dtype=object)
+        seen = self._seen
+        duplicated = pd.Index(keys).duplicated() | np.fromiter((key in seen for key in keys), bool, len(keys))
+        storable = ~missing_id & ~duplicated
+        seen.update(keys[storable])
+
+        stored = self.previous.reindex(keys)
+        known = stored["fingerprint"].notna().to_numpy() & storable
+        unchanged = known & (stored["fingerprint"].fillna(0).to_numpy(dtype="int64") == fingerprints)
+        match_type = stored["match_type"].to_numpy(dtype=object)
+        reconciled = stored["match_type"].notna().to_numpy() & (match_type != MATCH_NONE)
+        if CONCILIADO_COLUMN in typed.columns:
+            reconciled |= (typed[CONCILIADO_COLUMN].astype("object") == "Sí").to_numpy()
+
+        changed = ~unchanged
+        return RowDelta(
+            fingerprints=fingerprints,
+            changed=changed,
+            pending=changed | ~reconciled,
+            storable=storable,
+            errors=stored["errors"].fillna(0).to_numpy(dtype="int64"),
+            match_type=match_type,
+            movement_id=stored["movement_id"].to_numpy(dtype=object),
+            confidence=stored["confidence"].fillna(0.0).to_numpy(dtype="float64"),
+        )
+
+    def record(
+        self,
+        typed: pd.DataFrame,
+        delta: RowDelta,
+        bitmap: np.ndarray,
+        matches: Optional[pd.DataFrame] = None
+    ) -> None:
+        """
+        Registra el resultado de las filas validadas o conciliadas en este lote.
+
+        Args:
+            typed: Lote tipado comparado con ``diff``
+            delta: Resultado de ``diff`` para el lote
+            bitmap: Mapa de errores de todas las filas del lote
+            matches: Resultado de la conciliación de todas las filas del lote;
+                None si no se concilió
+        """
+        self.rows += len(typed)
+        write = delta.changed.copy()
+        if matches is not None:
+            # De las filas conciliadas de nuevo solo se guardan las que cambiaron de resultado
+            rematched = matches["match_type"].to_numpy(dtype=object) != delta.match_type
+            rematched |= matches["movement_id"].astype("string").to_numpy(dtype=object, na_value=None) != \
+                pd.Series(delta.movement_id, dtype="string").to_numpy(dtype=object, na_value=None)
+            write |= delta.pending & rematched
+        write &= delta.storable
+        if not write.any():
+            return
+        ids = typed[ID_COLUMN].astype(str).to_numpy()[write]
+        if matches is not None:
+            match_type = matches["match_type"].to_numpy(dtype=object)[write]
+            movement_id = matches["movement_id"].to_numpy(dtype=object)[write]
+            confidence = matches["confidence"].to_numpy(dtype="float64")[write]
+        else:
+            match_type = movement_id = np.full(len(ids), None, dtype=object)
+            confidence = np.zeros(len(ids))
+        self._updates.extend(zip(
+            [self.file] * len(ids),
+            ids,
+            delta.fingerprints[write].tolist(),
+            np.asarray(bitmap, dtype="int64")[write].tolist(),
+            [None if pd.isna(value) else value for value in match_type],
+            [None if pd.isna(value) else str(value) for value in movement_id],
+            confidence.tolist(),
+        ))
+
+    def commit(self) -> None:
+        """Guarda los resultados y descarta las filas que ya no están en el archivo"""
+        seen = self._seen
+        removed = [(self.file, key) for key in self.previous.index.to_numpy(dtype=object) if key not in seen]
+        with self.state._lock, self.state._connect() as conn:
+            conn.executemany("DELETE FROM rows WHERE file = ? AND id = ?", removed)
+            conn.executemany(
+                "INSERT OR REPLACE INTO rows (file, id, fingerprint, errors, match_type, movement_id, confidence) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._updates
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO files (file, config_hash, rows, processed_at) VALUES (?, ?, ?, ?)",
+                (self.file, self.config_hash, self.rows, time.time())
+            )
+        self._updates = []
+
+
+class ReconciliationState:
+    """Almacén SQLite de las huellas y resultados por fila de cada archivo procesado"""
+
+    def __init__(self, path: Union[str, Path, None] = None):
+        """
+        Inicializa el almacén, creando el archivo y las tablas si no existen.
+
+        Args:
+            path: Ruta al archivo SQLite; por defecto ``cache/reconciliation_state.sqlite3``
+        """
+        if path is None:
+            from ..config.settings import get_settings
+            path = get_settings().base_dir / "cache" / "reconciliation_state.sqlite3"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre una conexión con commit automático al salir sin errores"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def file_key(path: Union[str, Path]) -> str:
+        """Clave con que se guarda un archivo: su ruta absoluta"""
+        return str(Path(path).resolve())
+
+    def session(self, path: Union[str, Path], config_hash: str) -> StateSession:
+        """
+        Abre la comparación de un archivo con su estado anterior.
+
+        Si la configuración cambió desde la última ejecución, el estado del
+        archivo no se usa y todas las filas se procesan de nuevo.
+
+        Args:
+            path: Archivo a procesar
+            config_hash: Huella de la configuración (``ExcelConfigProvider.content_hash``)
+
+        Returns:
+            StateSession: Sesión para comparar y registrar los lotes del archivo
+        """
+        file = self.file_key(path)
+        config_hash = f"{config_hash}:{STATE_VERSION}"
+        with self._connect() as conn:
+            row = conn.execute("SELECT config_hash FROM files WHERE file = ?", (file,)).fetchone()
+            if row is not None and row[0] == config_hash:
+                records = conn.execute(
+                    "SELECT id, fingerprint, errors, match_type, movement_id, confidence FROM rows WHERE file = ?",
+                    (file,)
+                ).fetchall()
+            else:
+                conn.execute("DELETE FROM rows WHERE file = ?", (file,))
+                records = []
+        previous = pd.DataFrame.from_records(
+            records, columns=["id", "fingerprint", "errors", "match_type", "movement_id", "confidence"]
+        ).set_index("id")
+        # Tipos con nulos para que ``reindex`` no convierta las huellas a float y pierda bits
+        previous = previous.astype({
+            "fingerprint": "Int64", "errors": "Int64", "match_type": "object", "movement_id": "object",
+            "confidence": "float64"
+        })
+        return StateSession(self, file, config_hash, previous)
+
+    def rows(self, path: Union[str, Path]) -> int:
+        """Filas guardadas de un archivo"""
+        with self._connect() as conn:
+            (count,) = conn.execute("SELECT COUNT(*) FROM rows WHERE file = ?", (self.file_key(path),)).fetchone()
+        return count
+
+    def clear(self, path: Optional[Union[str, Path]] = None) -> None:
+        """Borra el estado de un archivo, o de todos si no se indica ninguno"""
+        with self._lock, self._connect() as conn:
+            if path is None:
+                conn.execute("DELETE FROM rows")
+                conn.execute("DELETE FROM files")
+            else:
+                file = self.file_key(path)
+                conn.execute("DELETE FROM rows WHERE file = ?", (file,))
+                conn.execute("DELETE FROM files WHERE file = ?", (file,))
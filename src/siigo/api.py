@@ -0,0 +1,397 @@
+"""
+Cliente HTTP para la API de SIIGO con conexiones persistentes y token en caché.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config.settings import SiigoConfig
+from ..utils.instrumentation import metrics
+from .rate_limiter import AdaptiveRateLimiter, backoff_delay, parse_retry_after
+
+# Margen para renovar el token antes de que SIIGO lo considere vencido
+TOKEN_EXPIRY_MARGIN = 60.0
+
+VOUCHERS_PATH = "/vouchers"
+
+# Métodos que se pueden reintentar ante errores transitorios sin duplicar efectos
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS = frozenset({502, 503, 504})
+
+
+class SiigoAPIError(Exception):
+    """Error retornado por la API de SIIGO"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, payload: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.payload = payload
+
+
+@dataclass
+class AccessToken:
+    """Token de acceso y momento (reloj monotónico) en que deja de ser válido"""
+    value: str
+    expires_at: float
+
+    def is_valid(self, margin: float = TOKEN_EXPIRY_MARGIN) -> bool:
+        """True si el token sigue vigente considerando el margen de renovación"""
+        return time.monotonic() < self.expires_at - margin
+
+
+class SiigoClient:
+    """
+    Cliente síncrono de la API de SIIGO.
+
+    Todas las llamadas comparten una única ``requests.Session`` con un pool de
+    conexiones keep-alive, de modo que el handshake TCP/TLS se paga una vez por
+    conexión y no una vez por llamada. El token de autenticación se reutiliza
+    hasta poco antes de su vencimiento.
+
+    Cada petición pasa por un ``AdaptiveRateLimiter``. Las respuestas 429 se
+    reintentan respetando Retry-After; los errores transitorios (5xx de
+    gateway y fallos de conexión) solo se reintentan en métodos idempotentes.
+    """
+
+    def __init__(
+        self,
+        config: Optional[SiigoConfig] = None,
+        pool_maxsize: Optional[int] = None,
+        timeout: Optional[float] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        logger: Any = None
+    ):
+        """
+        Inicializa el cliente.
+
+        Args:
+            config: Configuración de SIIGO; por defecto la de ``get_settings().siigo``
+            pool_maxsize: Conexiones simultáneas por host; por defecto la configurada
+            timeout: Tiempo máximo en segundos por petición; por defecto el configurado
+            rate_limiter: Limitador de tasa; por defecto uno construido con la configuración
+            logger: Logger para registrar eventos; por defecto ``log.siigo``
+        """
+        if config is None:
+            from ..config.settings import get_settings
+            config = get_settings().siigo
+        if logger is None:
+            from ..config import log
+            logger = log.siigo
+        self.config = config
+        self.logger = logger
+        self.base_url = config.api_url.rstrip("/")
+        self.pool_maxsize = pool_maxsize or config.pool_maxsize
+        self.timeout = timeout if timeout is not None else config.timeout
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(
+            config.rate_limit,
+            burst=config.rate_burst,
+            min_rate=config.min_rate
+        )
+        self._sleep = time.sleep
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json", "Accept": "application/json"})
+
+        self._token: Optional[AccessToken] = None
+        self._token_lock = threading.Lock()
+
+    def __enter__(self) -> "SiigoClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Cierra las conexiones del pool"""
+        self.session.close()
+
+    def authenticate(self, force: bool = False) -> str:
+        """
+        Retorna un token de acceso válido, solicitándolo solo si es necesario.
+
+        Args:
+            force: Solicitar un token nuevo aunque el actual siga vigente
+
+        Returns:
+            str: Token de acceso
+        """
+        token = self._token
+        if token is not None and not force and token.is_valid():
+            return token.value
+
+        with self._token_lock:
+            # Otro hilo pudo renovar el token mientras se esperaba el lock
+            if self._token is not None and self._token is not token and self._token.is_valid():
+                return self._token.value
+
+            response = self.session.post(
+                self.config.auth_url,
+                json={"username": self.config.tenant_id, "access_key": self.config.api_key},
+                timeout=self.timeout
+            )
+            if response.status_code >= 400:
+                raise SiigoAPIError("Error de autenticación con SIIGO", response.status_code, _payload(response))
+
+            data = response.json()
+            expires_in = float(data.get("expires_in", 3600))
+            self._token = AccessToken(data["access_token"], time.monotonic() + expires_in)
+            self.logger.debug("Token de SIIGO renovado", expires_in=expires_in)
+            return self._token.value
+
+    def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """
+        Ejecuta una petición autenticada.
+
+        Si SIIGO responde 401 se renueva el token y se reintenta una vez. Los
+        429 y errores transitorios se reintentan hasta ``max_retries`` veces.
+
+        Args:
+            method: Método HTTP
+            path: Ruta relativa a ``api_url`` o URL absoluta
+            **kwargs: Argumentos adicionales para ``requests.Session.request``
+
+        Returns:
+            requests.Response: Respuesta de la API
+
+        Raises:
+            SiigoAPIError: Si la respuesta tiene un código de error
+        """
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+        extra_headers = kwargs.pop("headers", None) or {}
+
+        method = method.upper()
+        idempotent = method in IDEMPOTENT_METHODS
+        retries = 0
+        refresh_token = False
+        while True:
+            headers = {"Authorization": f"Bearer {self.authenticate(force=refresh_token)}", **extra_headers}
+            self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.observe_http(method, "error", time.perf_counter() - started)
+                if not idempotent or retries >= self.config.max_retries:
+                    raise
+                self._wait_retry(retries, None, url, str(e))
+                retries += 1
+                continue
+            metrics.observe_http(method, response.status_code, time.perf_counter() - started)
+
+            if response.status_code == 401 and not refresh_token:
+                self.logger.warning("Token de SIIGO rechazado, se solicitará uno nuevo", url=url)
+                refresh_token = True
+                continue
+            refresh_token = False
+
+            if response.status_code == 429:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.rate_limiter.on_throttle(retry_after)
+                if retries < self.config.max_retries:
+                    self._wait_retry(retries, retry_after, url, "429")
+                    retries += 1
+                    continue
+            elif response.status_code in RETRYABLE_STATUS and idempotent and retries < self.config.max_retries:
+                self._wait_retry(retries, None, url, str(response.status_code))
+                retries += 1
+                continue
+            elif response.status_code < 400:
+                self.rate_limiter.on_success()
+            break
+
+        if response.status_code >= 400:
+            self.logger.error(
+                "Error en petición a SIIGO",
+                method=method,
+                url=url,
+                status_code=response.status_code
+            )
+            raise SiigoAPIError(f"SIIGO respondió {response.status_code} para {method} {url}",
+                                response.status_code, _payload(response))
+        return response
+
+    def _wait_retry(self, attempt: int, retry_after: Optional[float], url: str, reason: str) -> None:
+        """Espera antes de reintentar, respetando Retry-After si SIIGO lo indicó"""
+        delay = backoff_delay(attempt, self.config.backoff_base, self.config.backoff_max)
+        if retry_after is not None:
+            # El limitador ya pausa a los demás hilos; el jitter evita que todos reintenten a la vez
+            delay = retry_after + delay / 2
+        self.logger.warning(
+            "Reintentando petición a SIIGO",
+            url=url,
+            reason=reason,
+            attempt=attempt + 1,
+            delay=round(delay, 3),
+            rate=round(self.rate_limiter.rate, 3)
+        )
+        self._sleep(delay)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        """Ejecuta un GET y retorna el cuerpo JSON"""
+        return _json(self.request("GET", path, params=params, **kwargs))
+
+    def post(self, path: str, json: Any = None, **kwargs: Any) -> Any:
+        """Ejecuta un POST y retorna el cuerpo JSON"""
+        return _json(self.request("POST", path, json=json, **kwargs))
+
+    def post_vouchers(
+        self,
+        vouchers: Sequence[Any],
+        max_in_flight: Optional[int] = None,
+        request_timeout: Optional[float] = None
+    ) -> List["PostResult"]:
+        """
+        Publica un lote de comprobantes de forma concurrente.
+
+        Args:
+            vouchers: Cuerpos JSON de los comprobantes, en orden de fila
+            max_in_flight: Peticiones simultáneas; por defecto el tamaño del pool
+            request_timeout: Tiempo máximo por petición; por defecto el configurado
+
+        Returns:
+            List[PostResult]: Un resultado por comprobante, en el mismo orden
+        """
+        poster = AsyncBulkPoster(self, max_in_flight=max_in_flight, request_timeout=request_timeout)
+        with metrics.stage("siigo.post", rows=len(vouchers)):
+            return poster.run(VOUCHERS_PATH, vouchers)
+
+
+@dataclass
+class PostResult:
+    """Resultado de publicar un elemento de un lote"""
+    index: int
+    ok: bool
+    status_code: Optional[int] = None
+    data: Any = None
+    error: Optional[str] = None
+
+
+class AsyncBulkPoster:
+    """
+    Publica lotes en SIIGO con asyncio y un límite de peticiones en vuelo.
+
+    Las peticiones se ejecutan sobre la sesión del ``SiigoClient`` en un pool
+    de hilos del mismo tamaño que el límite, por lo que se reutilizan las
+    conexiones keep-alive y el token en caché. Los errores de un elemento no
+    detienen el lote: quedan registrados en su ``PostResult``.
+    """
+
+    def __init__(
+        self,
+        client: SiigoClient,
+        max_in_flight: Optional[int] = None,
+        request_timeout: Optional[float] = None
+    ):
+        """
+        Inicializa el publicador.
+
+        Args:
+            client: Cliente síncrono a utilizar
+            max_in_flight: Peticiones simultáneas; por defecto el tamaño del pool del cliente
+            request_timeout: Tiempo máximo de cada intento HTTP; por defecto el del cliente
+        """
+        self.client = client
+        self.max_in_flight = max_in_flight or client.pool_maxsize
+        if self.max_in_flight <= 0:
+            raise ValueError("max_in_flight debe ser mayor que cero")
+        self.request_timeout = request_timeout if request_timeout is not None else client.timeout
+        if self.max_in_flight > client.pool_maxsize:
+            client.logger.warning(
+                "El límite de peticiones supera el pool de conexiones; algunas esperarán una conexión libre",
+                max_in_flight=self.max_in_flight,
+                pool_maxsize=client.pool_maxsize
+            )
+
+    def run(self, path: str, payloads: Sequence[Any]) -> List[PostResult]:
+        """Ejecuta ``post_all`` en un nuevo event loop y retorna sus resultados"""
+        return asyncio.run(self.post_all(path, payloads))
+
+    async def post_all(self, path: str, payloads: Sequence[Any]) -> List[PostResult]:
+        """
+        Publica todos los elementos respetando el límite de concurrencia.
+
+        Args:
+            path: Ruta del recurso en la API
+            payloads: Cuerpos JSON a publicar
+
+        Returns:
+            List[PostResult]: Un resultado por elemento, en el orden original
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="siigo-post") as executor:
+            results = await asyncio.gather(*(
+                self._post_one(executor, semaphore, path, index, payload)
+                for index, payload in enumerate(payloads)
+            ))
+
+        failed = sum(1 for result in results if not result.ok)
+        self.client.logger.info(
+            "Publicación masiva en SIIGO finalizada",
+            path=path,
+            total=len(results),
+            failed=failed,
+            max_in_flight=self.max_in_flight,
+            elapsed=round(time.monotonic() - started, 3)
+        )
+        return list(results)
+
+    async def _post_one(
+        self,
+        executor: ThreadPoolExecutor,
+        semaphore: asyncio.Semaphore,
+        path: str,
+        index: int,
+        payload: Any
+    ) -> PostResult:
+        """
+        Publica un elemento y convierte el resultado o el error en ``PostResult``.
+
+        El límite de tiempo es el de cada intento de ``requests``, no del
+        elemento completo: las esperas del limitador y de Retry-After no
+        cuentan, y un POST solo se reporta como fallido cuando terminó, para
+        no reintentar un comprobante que SIIGO sí creó.
+        """
+        loop = asyncio.get_running_loop()
+        call = partial(self.client.request, "POST", path, json=payload, timeout=self.request_timeout)
+        async with semaphore:
+            try:
+                response = await loop.run_in_executor(executor, call)
+            except requests.Timeout:
+                return PostResult(index, False, error=f"Tiempo de espera agotado ({self.request_timeout}s)")
+            except SiigoAPIError as e:
+                return PostResult(index, False, status_code=e.status_code, data=e.payload, error=str(e))
+            except requests.RequestException as e:
+                return PostResult(index, False, error=str(e))
+            except Exception as e:
+                # Un error inesperado de un elemento no debe descartar el resto del lote
+                self.client.logger.error("Error inesperado al publicar en SIIGO", path=path, index=index, error=str(e))
+                return PostResult(index, False, error=f"{type(e).__name__}: {e}")
+        # El comprobante ya se creó: un cuerpo que no es JSON (un proxy, una
+        # página HTML) se conserva como texto en lugar de marcarlo como fallido
+        data = _payload(response) if response.content else None
+        return PostResult(index, True, status_code=response.status_code, data=data)
+
+
+def _json(response: requests.Response) -> Any:
+    """Retorna el cuerpo JSON de la respuesta o None si viene vacío"""
+    return response.json() if response.content else None
+
+
+def _payload(response: requests.Response) -> Any:
+    """Extrae el cuerpo de una respuesta de error sin fallar si no es JSON"""
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
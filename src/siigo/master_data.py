@@ -0,0 +1,365 @@
+"""
+Caché local persistente (SQLite) de los datos maestros de SIIGO.
+
+``load_counterparty_names`` entrega la lista de "Proveedor/Cliente" para
+``ExcelConfigProvider``; si SIIGO no está configurado o no responde usa lo
+que haya en la caché, o None para que se usen los proveedores por defecto.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import requests
+
+from .api import SiigoAPIError, SiigoClient
+
+# Recurso de la API y filtros fijos para cada tipo de dato maestro
+RESOURCES: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "customers": ("/customers", {"type": "Customer"}),
+    "suppliers": ("/customers", {"type": "Supplier"}),
+    "accounts": ("/account-groups", {}),
+}
+
+PAGE_SIZE = 100
+
+# Tipos cuyos nombres forman la lista de "Proveedor/Cliente"
+COUNTERPARTY_KINDS = ("suppliers", "customers")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    name TEXT,
+    active INTEGER NOT NULL DEFAULT 1,
+    updated_at TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (kind, id)
+);
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    last_updated TEXT,
+    synced_at REAL NOT NULL,
+    full_synced_at REAL
+);
+"""
+
+# Columnas agregadas después de la primera versión del esquema
+_MIGRATIONS = {
+    "records": {"active": "INTEGER NOT NULL DEFAULT 1"},
+    "sync_state": {"full_synced_at": "REAL"},
+}
+
+
+@dataclass
+class SyncState:
+    """Estado de la última sincronización de un tipo de dato maestro"""
+    kind: str
+    synced_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_updated: Optional[str] = None
+    full_synced_at: Optional[float] = None
+
+    def is_fresh(self, ttl: float) -> bool:
+        """True si la sincronización sigue dentro del TTL"""
+        return time.time() - self.synced_at < ttl
+
+    def needs_full_sync(self, interval: float) -> bool:
+        """True si pasó ``interval`` desde la última descarga completa"""
+        return self.full_synced_at is None or time.time() - self.full_synced_at >= interval
+
+
+class MasterDataCache:
+    """Almacén SQLite de registros maestros y de su estado de sincronización"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Inicializa el almacén, creando el archivo y las tablas si no existen.
+
+        Args:
+            path: Ruta al archivo SQLite
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            for table, columns in _MIGRATIONS.items():
+                existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for column, definition in columns.items():
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Abre una conexión con commit automático al salir sin errores"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def state(self, kind: str) -> Optional[SyncState]:
+        """Retorna el estado de sincronización de un tipo, o None si nunca se sincronizó"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT kind, synced_at, etag, last_modified, last_updated, full_synced_at FROM sync_state WHERE kind = ?",
+                (kind,)
+            ).fetchone()
+        return SyncState(*row) if row else None
+
+    def save(self, kind: str, records: List[Dict[str, Any]], state: SyncState, replace: bool = False) -> int:
+        """
+        Inserta o actualiza registros y guarda el estado en una sola transacción.
+
+        Args:
+            kind: Tipo de dato maestro
+            records: Registros modificados según SIIGO
+            state: Nuevo estado de sincronización
+            replace: ``records`` es el catálogo completo; se borran los registros
+                del tipo que ya no están en él
+
+        Returns:
+            int: Registros borrados
+        """
+        rows = [
+            (kind, str(record["id"]), record_name(record), int(record_active(record)),
+             record_updated(record), json.dumps(record))
+            for record in records
+        ]
+        removed = 0
+        with self._lock, self._connect() as conn:
+            if replace:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS current_ids (id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM current_ids")
+                conn.executemany("INSERT OR IGNORE INTO current_ids (id) VALUES (?)", [(row[1],) for row in rows])
+                removed = conn.execute(
+                    "DELETE FROM records WHERE kind = ? AND id NOT IN (SELECT id FROM current_ids)", (kind,)
+                ).rowcount
+            conn.executemany(
+                "INSERT INTO records (kind, id, name, active, updated_at, payload) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (kind, id) DO UPDATE SET name = excluded.name, active = excluded.active, "
+                "updated_at = excluded.updated_at, payload = excluded.payload",
+                rows
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (kind, etag, last_modified, last_updated, synced_at, full_synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, state.etag, state.last_modified, state.last_updated, state.synced_at, state.full_synced_at)
+            )
+        return removed
+
+    def records(self, kind: str) -> List[Dict[str, Any]]:
+        """Retorna todos los registros almacenados de un tipo"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT payload FROM records WHERE kind = ? ORDER BY name", (kind,)).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def names(self, *kinds: str) -> List[str]:
+        """Retorna los nombres únicos y ordenados de los registros activos de los tipos indicados"""
+        placeholders = ",".join("?" for _ in kinds)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT DISTINCT name FROM records WHERE kind IN ({placeholders}) AND active = 1 "
+                "AND name <> '' ORDER BY name",
+                kinds
+            ).fetchall()
+        return [name for (name,) in rows]
+
+
+def record_name(record: Dict[str, Any]) -> str:
+    """Obtiene el nombre legible de un registro de SIIGO"""
+    name = record.get("commercial_name") or record.get("name") or ""
+    if isinstance(name, list):
+        name = " ".join(part for part in name if part)
+    return str(name).strip()
+
+
+def record_active(record: Dict[str, Any]) -> bool:
+    """True si el registro está activo en SIIGO; sin el campo se asume activo"""
+    return record.get("active") is not False
+
+
+def record_updated(record: Dict[str, Any]) -> Optional[str]:
+    """Obtiene la fecha de última modificación de un registro de SIIGO"""
+    metadata = record.get("metadata") or {}
+    return metadata.get("last_updated") or metadata.get("created")
+
+
+class SiigoMasterData:
+    """
+    Acceso a clientes, proveedores y cuentas de SIIGO a través de la caché local.
+
+    Mientras la caché está dentro del TTL no se hacen llamadas. Al vencer, se
+    revalida con If-None-Match/If-Modified-Since; si SIIGO responde 304 solo se
+    renueva el TTL, y si hay cambios se descargan únicamente los registros
+    modificados desde la última sincronización (filtro ``updated_start``).
+
+    El filtro incremental no informa los registros eliminados en SIIGO, así
+    que cada ``full_sync_interval`` segundos la sincronización descarga el
+    catálogo completo y borra de la caché lo que ya no aparece.
+    """
+
+    def __init__(
+        self,
+        client: SiigoClient,
+        cache: Optional[MasterDataCache] = None,
+        ttl: Optional[float] = None,
+        full_sync_interval: Optional[float] = None
+    ):
+        """
+        Inicializa el acceso a datos maestros.
+
+        Args:
+            client: Cliente de la API de SIIGO
+            cache: Almacén local; por defecto ``cache/siigo_master_data.sqlite3``
+            ttl: Segundos de validez de la caché; por defecto ``master_data_ttl``
+            full_sync_interval: Segundos entre descargas completas; por defecto
+                ``master_data_full_sync``
+        """
+        if cache is None:
+            from ..config.settings import get_settings
+            cache = MasterDataCache(get_settings().base_dir / "cache" / "siigo_master_data.sqlite3")
+        self.client = client
+        self.cache = cache
+        self.ttl = ttl if ttl is not None else client.config.master_data_ttl
+        self.full_sync_interval = (
+            full_sync_interval if full_sync_interval is not None else client.config.master_data_full_sync
+        )
+
+    def get(self, kind: str, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Retorna los registros de un tipo, sincronizando solo si la caché venció.
+
+        Args:
+            kind: 'customers', 'suppliers' o 'accounts'
+            force: Revalidar aunque la caché siga vigente
+
+        Returns:
+            List[Dict[str, Any]]: Registros tal como los entrega SIIGO
+        """
+        state = self.cache.state(kind)
+        if force or state is None or not state.is_fresh(self.ttl):
+            self.sync(kind)
+        return self.cache.records(kind)
+
+    def counterparty_names(self, force: bool = False) -> List[str]:
+        """Nombres de clientes y proveedores para la lista de "Proveedor/Cliente" de la plantilla"""
+        for kind in COUNTERPARTY_KINDS:
+            self.get(kind, force=force)
+        return self.cache.names(*COUNTERPARTY_KINDS)
+
+    def sync(self, kind: str, full: Optional[bool] = None) -> int:
+        """
+        Sincroniza un tipo de dato maestro con SIIGO.
+
+        Args:
+            kind: 'customers', 'suppliers' o 'accounts'
+            full: Descargar el catálogo completo y borrar los registros que ya
+                no existen; por defecto solo si venció ``full_sync_interval``
+
+        Returns:
+            int: Número de registros nuevos o modificados
+        """
+        if kind not in RESOURCES:
+            raise ValueError(f"Tipo de dato maestro desconocido: {kind}")
+        path, filters = RESOURCES[kind]
+        previous = self.cache.state(kind)
+        if full is None:
+            full = previous is None or previous.needs_full_sync(self.full_sync_interval)
+
+        headers = {}
+        params = dict(filters, page_size=PAGE_SIZE)
+        if previous is not None and not full:
+            if previous.etag:
+                headers["If-None-Match"] = previous.etag
+            if previous.last_modified:
+                headers["If-Modified-Since"] = previous.last_modified
+            if previous.last_updated:
+                params["updated_start"] = previous.last_updated
+
+        records: List[Dict[str, Any]] = []
+        page = 1
+        first = None
+        while True:
+            response = self.client.request(
+                "GET", path, params=dict(params, page=page), headers=headers if page == 1 else None
+            )
+            if response.status_code == 304:
+                self.cache.save(kind, [], SyncState(
+                    kind, time.time(), previous.etag, previous.last_modified, previous.last_updated,
+                    previous.full_synced_at
+                ))
+                self.client.logger.debug("Datos maestros sin cambios", kind=kind)
+                return 0
+
+            first = first or response
+            body = response.json() or {}
+            results = body if isinstance(body, list) else body.get("results", [])
+            records.extend(results)
+            pagination = body.get("pagination") if isinstance(body, dict) else None
+            if not pagination or page * int(pagination.get("page_size", PAGE_SIZE)) >= int(pagination.get("total_results", 0)):
+                break
+            page += 1
+
+        updated = [value for value in (record_updated(record) for record in records) if value]
+        last_updated = max(updated + ([previous.last_updated] if previous and previous.last_updated else []), default=None)
+        now = time.time()
+        removed = self.cache.save(kind, records, SyncState(
+            kind,
+            now,
+            first.headers.get("ETag"),
+            first.headers.get("Last-Modified"),
+            last_updated,
+            now if full else previous.full_synced_at
+        ), replace=full)
+        self.client.logger.info(
+            "Datos maestros sincronizados",
+            kind=kind,
+            changed=len(records),
+            removed=removed,
+            incremental=not full
+        )
+        return len(records)
+
+
+def load_counterparty_names(master_data: Optional[SiigoMasterData] = None, logger: Any = None) -> Optional[List[str]]:
+    """
+    Nombres de clientes y proveedores de SIIGO para ``ExcelConfigProvider(proveedores=...)``.
+
+    Sin credenciales de SIIGO, o si la sincronización falla, se usan los
+    nombres que ya estén en la caché local.
+
+    Args:
+        master_data: Acceso a los datos maestros; por defecto uno con la
+            configuración y la caché del proyecto
+        logger: Logger para registrar eventos; por defecto ``log.siigo``
+
+    Returns:
+        Optional[List[str]]: Nombres activos, o None si no hay ninguno disponible
+            (el llamador usa entonces los proveedores por defecto)
+    """
+    if logger is None:
+        from ..config import log
+        logger = log.siigo
+    if master_data is None:
+        from ..config.settings import get_settings
+        settings = get_settings()
+        path = settings.base_dir / "cache" / "siigo_master_data.sqlite3"
+        if not (settings.siigo.api_key and settings.siigo.tenant_id):
+            return (MasterDataCache(path).names(*COUNTERPARTY_KINDS) or None) if path.exists() else None
+        with SiigoClient(settings.siigo, logger=logger) as client:
+            return load_counterparty_names(SiigoMasterData(client, MasterDataCache(path)), logger)
+    try:
+        return master_data.counterparty_names() or None
+    except (SiigoAPIError, requests.RequestException) as e:
+        logger.warning("SIIGO no disponible; se usan los proveedores en caché", error=str(e))
+        return master_data.cache.names(*COUNTERPARTY_KINDS) or None
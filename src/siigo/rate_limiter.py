@@ -0,0 +1,149 @@
+"""
+Control de tasa del lado del cliente para las llamadas a SIIGO.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket cuya tasa se ajusta según las respuestas 429 de SIIGO.
+
+    Cada 429 reduce la tasa a la mitad (sin bajar de ``min_rate``) y pausa a
+    todos los hilos durante el Retry-After indicado; cada respuesta exitosa la
+    recupera de forma gradual hasta ``max_rate``. Así el cliente converge a la
+    mayor tasa sostenida que no dispara la cuota.
+    """
+
+    def __init__(
+        self,
+        max_rate: float,
+        burst: Optional[int] = None,
+        min_rate: float = 1.0,
+        decrease_factor: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Inicializa el limitador.
+
+        Args:
+            max_rate: Peticiones por segundo permitidas como máximo; 0 desactiva el límite
+            burst: Peticiones que se pueden emitir seguidas; por defecto ``max_rate``
+            min_rate: Tasa mínima a la que se puede reducir tras un 429
+            decrease_factor: Factor que se aplica a la tasa en cada 429
+            clock: Reloj monotónico (inyectable para pruebas)
+            sleep: Función de espera (inyectable para pruebas)
+        """
+        self.max_rate = float(max_rate)
+        self.min_rate = min(float(min_rate), self.max_rate) if self.max_rate > 0 else 0.0
+        self.capacity = float(burst if burst else max(1.0, self.max_rate))
+        self.decrease_factor = decrease_factor
+        self.rate = self.max_rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """True si el limitador restringe la tasa"""
+        return self.max_rate > 0
+
+    def acquire(self) -> float:
+        """
+        Bloquea hasta que haya un token disponible y lo consume.
+
+        Returns:
+            float: Segundos esperados
+        """
+        if not self.enabled:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+    def on_success(self) -> None:
+        """Recupera la tasa de forma aditiva después de una respuesta aceptada"""
+        if not self.enabled or self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Reduce la tasa tras un 429 y, si se indica, pausa las peticiones.
+
+        Args:
+            retry_after: Segundos indicados por SIIGO en la cabecera Retry-After
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def _refill(self, now: float) -> None:
+        """Agrega los tokens acumulados desde la última actualización"""
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+
+def backoff_delay(attempt: int, base: float, maximum: float) -> float:
+    """
+    Calcula la espera antes de un reintento con backoff exponencial y jitter completo.
+
+    Args:
+        attempt: Número de reintento, empezando en 0
+        base: Espera base en segundos
+        maximum: Espera máxima en segundos
+
+    Returns:
+        float: Segundos a esperar
+    """
+    return random.uniform(0, min(maximum, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpreta la cabecera Retry-After, en segundos o como fecha HTTP.
+
+    Returns:
+        Optional[float]: Segundos a esperar, o None si la cabecera no es válida
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
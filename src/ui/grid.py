@@ -0,0 +1,527 @@
+"""
+Tabla virtualizada para previsualizar la hoja "Transacciones" sin importar su tamaño.
+
+Solo existen widgets para las filas visibles: al desplazarse se reutilizan
+los mismos elementos del lienzo con otros valores. Los datos se piden por
+posición a una ``RowSource`` y el orden y los filtros se guardan como arreglos
+de posiciones, así que la memoria depende de la ventana visible y no del
+archivo (más 4 u 8 bytes por fila cuando hay un orden o filtro activo).
+
+``load_preview_job`` prepara la vista previa en un ``JobRunner``: deja el
+archivo en la caché de columnas y la tabla lee de sus arreglos mapeados en
+memoria solo las filas visibles. Ordenar y filtrar también corren como
+trabajos (``sort_job`` y ``filter_job``), lote por lote sobre esos arreglos.
+"""
+import tkinter as tk
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import customtkinter as ctk
+import numpy as np
+import pandas as pd
+
+from ..excel.column_cache import CachedColumns, ColumnCache
+from ..excel.reader import DEFAULT_CHUNK_SIZE
+from ..excel.statement_reader import StatementFormat
+from .jobs import JobContext, count_rows
+
+# Filas por lote al ordenar o filtrar una fuente en disco
+SCAN_CHUNK_SIZE = 100_000
+
+
+def _positions_dtype(length: int) -> np.dtype:
+    """Entero más pequeño que alcanza para indexar ``length`` filas"""
+    return np.dtype(np.int32) if length < np.iinfo(np.int32).max else np.dtype(np.int64)
+
+
+def _order(keys: np.ndarray, missing: np.ndarray, ascending: bool) -> np.ndarray:
+    """
+    Posiciones ordenadas por ``keys`` de forma estable, con las faltantes al final.
+
+    Args:
+        keys: Clave numérica por posición
+        missing: True en las posiciones sin valor
+        ascending: Sentido del orden
+    """
+    present = np.flatnonzero(~missing)
+    values = keys[present]
+    order = np.argsort(values if ascending else -values, kind="stable")
+    return np.concatenate([present[order], np.flatnonzero(missing)]).astype(_positions_dtype(len(keys)))
+
+
+class RowSource(ABC):
+    """Fuente de filas con acceso por posición para ``GridModel``"""
+
+    @property
+    @abstractmethod
+    def columns(self) -> List[str]:
+        """Nombres de las columnas"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Cantidad de filas"""
+
+    @abstractmethod
+    def take(self, positions: np.ndarray) -> List[Tuple[int, Tuple[Any, ...]]]:
+        """
+        Retorna las filas de las posiciones indicadas.
+
+        Returns:
+            List[Tuple[int, Tuple[Any, ...]]]: (número de fila en Excel, valores) por posición existente
+        """
+
+    @abstractmethod
+    def column(self, name: str) -> pd.Series:
+        """Columna completa con índice posicional"""
+
+    def sort_index(self, name: str, ascending: bool) -> np.ndarray:
+        """
+        Posiciones ordenadas por una columna.
+
+        El texto se ordena sin distinguir mayúsculas y las celdas vacías
+        quedan al final en ambos sentidos.
+        """
+        values = self.column(name)
+        if values.dtype == object or pd.api.types.is_string_dtype(values):
+            values = values.astype("string").str.lower()
+        order = values.sort_values(ascending=ascending, kind="stable", na_position="last").index
+        return order.to_numpy(dtype=_positions_dtype(len(values)))
+
+    def filter_mask(self, name: str, text: str) -> np.ndarray:
+        """Máscara de las filas cuya columna, tal como se muestra, contiene ``text`` (ya en minúsculas)"""
+        values = self.column(name)
+        shown = values.map(format_value, na_action="ignore").fillna("").astype(str).str.lower()
+        return shown.str.contains(text, regex=False).to_numpy(dtype=bool)
+
+
+class FrameRowSource(RowSource):
+    """Fuente sobre un DataFrame ya cargado en memoria"""
+
+    def __init__(self, frame: pd.DataFrame):
+        """
+        Args:
+            frame: Filas a mostrar; su índice se muestra como número de fila
+        """
+        self.frame = frame
+
+    @property
+    def columns(self) -> List[str]:
+        return [str(column) for column in self.frame.columns]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def take(self, positions: np.ndarray) -> List[Tuple[int, Tuple[Any, ...]]]:
+        part = self.frame.iloc[positions]
+        return list(zip(part.index.tolist(), part.itertuples(index=False, name=None)))
+
+    def column(self, name: str) -> pd.Series:
+        return self.frame[name].reset_index(drop=True)
+
+
+class CachedRowSource(RowSource):
+    """
+    Fuente sobre una entrada de la caché de columnas, sin cargarla en memoria.
+
+    ``take`` lee de los arreglos mapeados solo las posiciones pedidas y
+    traduce los códigos de texto de esas filas. Ordenar y filtrar recorren
+    las columnas por lotes de ``chunk_size`` filas: el texto se compara una
+    vez por valor distinto y luego se proyecta sobre los códigos.
+    """
+
+    def __init__(self, cached: CachedColumns, chunk_size: int = SCAN_CHUNK_SIZE):
+        """
+        Args:
+            cached: Entrada abierta de la caché de columnas
+            chunk_size: Filas por lote al ordenar o filtrar
+        """
+        self.cached = cached
+        self.chunk_size = chunk_size
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.cached.columns)
+
+    def __len__(self) -> int:
+        return self.cached.rows
+
+    def _kind(self, name: str) -> str:
+        return self.cached.kinds[self.cached.columns.index(name)]
+
+    def take(self, positions: np.ndarray) -> List[Tuple[int, Tuple[Any, ...]]]:
+        positions = np.asarray(positions, dtype=np.int64)
+        positions = positions[(positions >= 0) & (positions < self.cached.rows)]
+        if not len(positions):
+            return []
+        part = self.cached.take(positions)
+        return list(zip(part.index.tolist(), part.itertuples(index=False, name=None)))
+
+    def column(self, name: str) -> pd.Series:
+        """Columna completa; solo para fuentes pequeñas, ordenar y filtrar no la usan"""
+        return self.cached.frame()[name].reset_index(drop=True)
+
+    def sort_index(self, name: str, ascending: bool) -> np.ndarray:
+        values = self.cached.array(name)
+        kind = self._kind(name)
+        if kind == "decimal":
+            return _order(values, np.isnan(values), ascending)
+        if kind == "date":
+            keys = values.view("int64")
+            return _order(keys, np.isnat(values), ascending)
+        # Texto: la clave es el puesto de cada valor distinto en orden alfabético
+        labels = pd.Series(self.cached.labels(name)[:-1], dtype="string").str.lower()
+        ranks = np.empty(len(labels) + 1, dtype=np.int64)
+        ranks[labels.sort_values(kind="stable").index.to_numpy()] = np.arange(len(labels))
+        ranks[-1] = 0
+        return _order(ranks[values], values < 0, ascending)
+
+    def filter_mask(self, name: str, text: str) -> np.ndarray:
+        values = self.cached.array(name)
+        mask = np.zeros(len(values), dtype=bool)
+        if self._kind(name) == "text":
+            labels = self.cached.labels(name)
+            hits = np.array([text in format_value(label).lower() for label in labels.tolist()], dtype=bool)
+            for start in range(0, len(values), self.chunk_size):
+                mask[start:start + self.chunk_size] = hits[values[start:start + self.chunk_size]]
+            return mask
+        for start in range(0, len(values), self.chunk_size):
+            distinct, inverse = np.unique(values[start:start + self.chunk_size], return_inverse=True)
+            shown = pd.Series(distinct).tolist()
+            hits = np.array([text in format_value(value).lower() for value in shown], dtype=bool)
+            mask[start:start + self.chunk_size] = hits[inverse.reshape(-1)]
+        return mask
+
+
+class GridModel:
+    """
+    Orden y filtro de una ``RowSource`` mediante índices de posiciones.
+
+    Sin orden ni filtro la vista es la fuente tal cual y no se reserva nada
+    por fila. Los índices de orden se calculan la primera vez que se ordena
+    por una columna y sentido, y se conservan.
+    """
+
+    def __init__(self, source: RowSource):
+        self.source = source
+        self.sort_column: Optional[str] = None
+        self.ascending = True
+        self._sort_indexes: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._filter: Optional[np.ndarray] = None
+        self._view: Optional[np.ndarray] = None
+
+    @property
+    def columns(self) -> List[str]:
+        return self.source.columns
+
+    def __len__(self) -> int:
+        return len(self._view) if self._view is not None else len(self.source)
+
+    def positions(self, first: int, count: int) -> np.ndarray:
+        """Posiciones en la fuente de las filas visibles ``first`` a ``first + count``"""
+        first = max(first, 0)
+        if self._view is not None:
+            return self._view[first:first + count]
+        return np.arange(first, min(first + count, len(self.source)), dtype=np.int64)
+
+    def rows(self, first: int, count: int) -> List[Tuple[int, Tuple[Any, ...]]]:
+        """Filas visibles como (número de fila en Excel, valores)"""
+        return self.source.take(self.positions(first, count))
+
+    def sort_index(self, column: str, ascending: bool) -> np.ndarray:
+        """Índice de orden de una columna y sentido; se calcula una sola vez"""
+        key = (column, ascending)
+        if key not in self._sort_indexes:
+            self._sort_indexes[key] = self.source.sort_index(column, ascending)
+        return self._sort_indexes[key]
+
+    def sort(self, column: Optional[str], ascending: bool = True) -> None:
+        """
+        Ordena la vista por una columna; None vuelve al orden del archivo.
+
+        El texto se ordena sin distinguir mayúsculas y las celdas vacías
+        quedan al final en ambos sentidos.
+        """
+        self.sort_column = column
+        self.ascending = ascending
+        self._rebuild()
+
+    def filter(self, column: Optional[str], text: str) -> None:
+        """
+        Deja solo las filas cuya columna contiene ``text`` (sin distinguir mayúsculas).
+
+        Args:
+            column: Columna a filtrar; None para buscar en todas
+            text: Texto a buscar; vacío quita el filtro
+        """
+        self._filter = self.filter_mask(column, text)
+        self._rebuild()
+
+    def filter_mask(self, column: Optional[str], text: str) -> Optional[np.ndarray]:
+        """
+        Calcula la máscara de ``filter`` sin aplicarla, para hacerlo fuera del hilo de Tk.
+
+        Returns:
+            Optional[np.ndarray]: Máscara booleana por posición, o None si ``text`` está vacío
+        """
+        text = text.strip().lower()
+        if not text:
+            return None
+        mask = None
+        for name in ([column] if column else self.columns):
+            found = self.source.filter_mask(name, text)
+            mask = found if mask is None else mask | found
+        return mask
+
+    def set_mask(self, mask: Optional[np.ndarray]) -> None:
+        """
+        Deja solo las filas marcadas en una máscara booleana por posición.
+
+        Sirve, por ejemplo, para mostrar solo las filas con errores de validación.
+        """
+        self._filter = None if mask is None else np.asarray(mask, dtype=bool)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        if self.sort_column is None and self._filter is None:
+            self._view = None
+            return
+        if self.sort_column is not None:
+            view = self.sort_index(self.sort_column, self.ascending)
+        else:
+            view = np.arange(len(self.source), dtype=_positions_dtype(len(self.source)))
+        if self._filter is not None:
+            view = view[self._filter[view]]
+        self._view = view
+
+
+def _reported(context: JobContext, chunks: Iterable[pd.DataFrame], total: Optional[int]) -> Iterator[pd.DataFrame]:
+    """Recorre los lotes reportando las filas leídas"""
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        context.progress(rows, total, message="Leyendo archivo")
+        yield chunk
+
+
+def load_preview_job(
+    context: JobContext,
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[ColumnCache] = None,
+    statement_format: Optional[StatementFormat] = None
+) -> GridModel:
+    """
+    Trabajo de la interfaz: deja el archivo en la caché de columnas y crea el modelo de la vista previa.
+
+    La primera vez el archivo (libro o extracto) se lee por lotes hacia la
+    caché; después se abre directamente. El modelo no carga las filas: la
+    tabla lee de la caché solo las que muestra.
+
+    Args:
+        context: Contexto del trabajo
+        path: Archivo Excel con la hoja "Transacciones" o extracto
+        chunk_size: Filas por lote de lectura
+        cache: Caché de columnas; por defecto la de la carpeta ``cache/columns``
+        statement_format: Formato del extracto, si el archivo es CSV o de ancho fijo
+
+    Returns:
+        GridModel: Modelo sobre la entrada de la caché
+    """
+    total = count_rows(path)
+    context.progress(0, total, message="Leyendo archivo", force=True)
+    cache = cache or ColumnCache()
+    cached = cache.load(path, statement_format)
+    if cached is None:
+        chunks = cache.read_chunks(path, chunk_size, statement_format)
+        cached = cache.store(path, _reported(context, chunks, total), statement_format)
+    context.progress(cached.rows, cached.rows, message="Listo", force=True)
+    return GridModel(CachedRowSource(cached))
+
+
+def sort_job(context: JobContext, model: GridModel, column: str, ascending: bool) -> Tuple[str, bool]:
+    """Trabajo de la interfaz: calcula el índice de orden de una columna con ``GridModel.sort_index``"""
+    context.check()
+    model.sort_index(column, ascending)
+    return column, ascending
+
+
+def filter_job(context: JobContext, model: GridModel, column: Optional[str], text: str) -> Optional[np.ndarray]:
+    """Trabajo de la interfaz: calcula la máscara de un filtro de texto con ``GridModel.filter_mask``"""
+    context.check()
+    return model.filter_mask(column, text)
+
+
+def format_value(value: Any) -> str:
+    """Texto con el que se muestra una celda"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return ""
+    if isinstance(value, float) and np.isnan(value):
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+class VirtualGrid(ctk.CTkFrame):
+    """
+    Tabla que dibuja solo las filas visibles de un ``GridModel``.
+
+    Los textos se dibujan en un ``tk.Canvas`` con un grupo fijo de elementos
+    que se reutiliza al desplazarse; clic en un encabezado ordena por esa
+    columna y un segundo clic invierte el sentido.
+    """
+
+    def __init__(
+        self,
+        master: Any,
+        model: GridModel,
+        column_widths: Optional[Sequence[int]] = None,
+        row_height: int = 22,
+        sort_command: Optional[Callable[[str, bool], None]] = None,
+        **kwargs: Any
+    ):
+        """
+        Args:
+            master: Contenedor de la tabla
+            model: Modelo con las filas a mostrar
+            column_widths: Ancho de cada columna en píxeles
+            row_height: Alto de cada fila en píxeles
+            sort_command: Recibe (columna, ascendente) al pulsar un encabezado, para
+                calcular el orden fuera del hilo de Tk y aplicarlo con ``apply_sort``;
+                sin él se ordena en el momento
+        """
+        super().__init__(master, **kwargs)
+        self.model = model
+        self.sort_command = sort_command
+        self.row_height = row_height
+        self.number_width = 70
+        self.column_widths = list(column_widths or [120] * len(model.columns))
+        self.first = 0
+        self._cells: List[List[int]] = []
+        self._render_pending = False
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        total_width = self.number_width + sum(self.column_widths)
+        self.header = tk.Canvas(self, height=row_height, highlightthickness=0, scrollregion=(0, 0, total_width, row_height))
+        self.header.grid(row=0, column=0, sticky="ew")
+        self.canvas = tk.Canvas(self, highlightthickness=0, background="white", scrollregion=(0, 0, total_width, 0))
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+        self.hscroll = ctk.CTkScrollbar(self, orientation="horizontal", command=self._on_hscroll)
+        self.hscroll.grid(row=2, column=0, sticky="ew")
+        self.canvas.configure(xscrollcommand=self.hscroll.set)
+
+        self._draw_header()
+        self.canvas.bind("<Configure>", lambda event: self._build_pool())
+        for widget in (self.canvas, self.header):
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", lambda event: self.scroll_rows(-3))
+            widget.bind("<Button-5>", lambda event: self.scroll_rows(3))
+
+    @property
+    def visible_rows(self) -> int:
+        """Filas que caben en el alto actual"""
+        return max(self.canvas.winfo_height() // self.row_height, 1)
+
+    def _column_x(self) -> List[int]:
+        positions, x = [], self.number_width
+        for width in self.column_widths:
+            positions.append(x)
+            x += width
+        return positions
+
+    def _draw_header(self) -> None:
+        self.header.delete("all")
+        self.header.create_text(4, self.row_height // 2, text="Fila", anchor="w", font=("TkDefaultFont", 9, "bold"))
+        for i, (x, name) in enumerate(zip(self._column_x(), self.model.columns)):
+            label = name
+            if name == self.model.sort_column:
+                label += " ▲" if self.model.ascending else " ▼"
+            item = self.header.create_text(x + 4, self.row_height // 2, text=label, anchor="w", font=("TkDefaultFont", 9, "bold"))
+            self.header.tag_bind(item, "<Button-1>", lambda event, column=name: self.toggle_sort(column))
+
+    def _build_pool(self) -> None:
+        """Crea un elemento de texto por celda visible; se reutilizan en cada desplazamiento"""
+        self.canvas.delete("all")
+        self._cells = []
+        xs = [4] + [x + 4 for x in self._column_x()]
+        for row in range(self.visible_rows + 1):
+            y = row * self.row_height + self.row_height // 2
+            self._cells.append([self.canvas.create_text(x, y, anchor="w", text="") for x in xs])
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Programa un redibujado; varios pedidos seguidos se atienden con uno solo"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+
+    def _render(self) -> None:
+        self._render_pending = False
+        total = len(self.model)
+        self.first = max(min(self.first, total - self.visible_rows), 0)
+        rows = self.model.rows(self.first, len(self._cells))
+        for i, cells in enumerate(self._cells):
+            if i < len(rows):
+                number, values = rows[i]
+                texts = [str(number)] + [format_value(value) for value in values]
+            else:
+                texts = [""] * len(cells)
+            for item, text in zip(cells, texts):
+                self.canvas.itemconfigure(item, text=text)
+        if total:
+            self.scrollbar.set(self.first / total, min((self.first + self.visible_rows) / total, 1.0))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_rows(self, delta: int) -> None:
+        """Desplaza la vista ``delta`` filas"""
+        self.first += delta
+        self.refresh()
+
+    def scroll_to(self, row: int) -> None:
+        """Lleva la fila ``row`` de la vista a la parte superior"""
+        self.first = row
+        self.refresh()
+
+    def _on_scrollbar(self, action: str, amount: Any, unit: Optional[str] = None) -> None:
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.model)))
+        elif unit == "pages":
+            self.scroll_rows(int(amount) * self.visible_rows)
+        else:
+            self.scroll_rows(int(amount))
+
+    def _on_hscroll(self, *args: Any) -> None:
+        self.canvas.xview(*args)
+        self.header.xview(*args)
+
+    def _on_wheel(self, event: Any) -> None:
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def toggle_sort(self, column: str) -> None:
+        """Ordena por ``column``; si ya estaba ordenada, invierte el sentido"""
+        ascending = not self.model.ascending if self.model.sort_column == column else True
+        if self.sort_command is not None:
+            self.sort_command(column, ascending)
+        else:
+            self.apply_sort(column, ascending)
+
+    def apply_sort(self, column: Optional[str], ascending: bool = True) -> None:
+        """Aplica un orden al modelo y vuelve al inicio"""
+        self.model.sort(column, ascending)
+        self.first = 0
+        self._draw_header()
+        self.refresh()
+
+    def set_filter(self, column: Optional[str], text: str) -> None:
+        """Aplica un filtro de texto y vuelve al inicio"""
+        self.model.filter(column, text)
+        self.first = 0
+        self.refresh()
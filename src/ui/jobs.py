@@ -0,0 +1,376 @@
+"""
+Ejecución de trabajos largos fuera del hilo principal de la interfaz.
+
+Tk solo puede usarse desde el hilo que creó la ventana, así que los trabajos
+corren en hilos o procesos aparte y publican sus eventos (progreso, resultado,
+error, cancelación) en una cola. La ventana la consulta con ``after()`` y
+``JobRunner.poll`` nunca bloquea.
+
+Uso:
+    runner = JobRunner(use_processes=True)
+    job_id = runner.submit(process_workbook_job, "cuenta.xlsx")
+    ...
+    for event in runner.poll():
+        ...
+"""
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from openpyxl import load_workbook
+
+from ..batch import WorkbookSummary, load_movements, process_workbook
+from ..excel.excel_config import ExcelConfigProvider
+from ..excel.reader import DEFAULT_CHUNK_SIZE, DEFAULT_SHEET
+from ..excel.statement_reader import StatementFormat, is_statement
+from ..reconciliation.matcher import ReconciliationMatcher
+from ..siigo.master_data import load_counterparty_names
+
+EVENT_PROGRESS = "progress"
+EVENT_DONE = "done"
+EVENT_ERROR = "error"
+EVENT_CANCELLED = "cancelled"
+
+# Intervalo mínimo (segundos) entre dos reportes de progreso de un mismo trabajo
+PROGRESS_INTERVAL = 0.05
+
+
+class JobCancelled(BaseException):
+    """
+    Se lanza dentro de un trabajo cuando se solicita su cancelación.
+
+    Deriva de ``BaseException``, como ``asyncio.CancelledError``, para que los
+    ``except Exception`` del procesamiento (por ejemplo en ``process_workbook``)
+    no la confundan con un error del archivo.
+    """
+
+
+@dataclass
+class JobEvent:
+    """Evento publicado por un trabajo para la interfaz"""
+    job_id: int
+    kind: str
+    rows: int = 0
+    total: Optional[int] = None
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        """True si el evento cierra el trabajo"""
+        return self.kind != EVENT_PROGRESS
+
+
+class JobContext:
+    """
+    Lo que recibe cada trabajo para reportar progreso y revisar si fue cancelado.
+
+    Los reportes se limitan a uno cada ``interval`` segundos, así un trabajo
+    que procesa miles de lotes no inunda la cola. En modo procesos la cola y
+    el evento de cancelación son proxies de un ``Manager``, por lo que el
+    contexto puede enviarse al proceso hijo.
+    """
+
+    def __init__(self, job_id: int, events: Any, cancel: Any, interval: float = PROGRESS_INTERVAL):
+        """
+        Inicializa el contexto.
+
+        Args:
+            job_id: Identificador del trabajo
+            events: Cola donde se publican los eventos de progreso
+            cancel: Evento que se activa al cancelar el trabajo
+            interval: Segundos mínimos entre reportes de progreso
+        """
+        self.job_id = job_id
+        self.interval = interval
+        self._events = events
+        self._cancel = cancel
+        self._last_report = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        """True si se solicitó cancelar el trabajo"""
+        return self._cancel.is_set()
+
+    def check(self) -> None:
+        """Lanza ``JobCancelled`` si se solicitó cancelar el trabajo"""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, rows: int, total: Optional[int] = None, message: str = "", force: bool = False) -> None:
+        """
+        Reporta el avance del trabajo y revisa la cancelación.
+
+        Args:
+            rows: Filas procesadas hasta el momento
+            total: Filas totales, si se conocen
+            message: Texto a mostrar junto al avance
+            force: Publicar aunque no haya pasado ``interval`` desde el último reporte
+        """
+        self.check()
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        self._events.put(JobEvent(self.job_id, EVENT_PROGRESS, rows=rows, total=total, message=message))
+
+
+def _run_job(
+    func: Callable[..., Any],
+    context: JobContext,
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any]
+) -> Tuple[str, Any]:
+    """Ejecuta un trabajo en el hilo o proceso de trabajo"""
+    try:
+        context.check()
+        return EVENT_DONE, func(context, *args, **kwargs)
+    except JobCancelled:
+        return EVENT_CANCELLED, None
+
+
+@dataclass
+class _Job:
+    """Trabajo enviado al ejecutor"""
+    name: str
+    future: Future
+    cancel: Any
+
+
+class JobRunner:
+    """
+    Cola de trabajos en segundo plano para la interfaz.
+
+    Con ``use_processes=True`` los trabajos corren en procesos iniciados con
+    ``spawn`` (no se hace fork de un proceso con Tk) y el procesamiento no
+    compite por el GIL con el hilo de la ventana; las funciones deben poder
+    importarse desde el proceso hijo. Con hilos, cualquier función sirve.
+
+    Cada trabajo recibe un ``JobContext`` como primer argumento.
+    """
+
+    def __init__(self, max_workers: int = 1, use_processes: bool = False, progress_interval: float = PROGRESS_INTERVAL):
+        """
+        Inicializa el ejecutor; los hilos o procesos se crean con el primer trabajo.
+
+        Args:
+            max_workers: Trabajos que pueden correr a la vez
+            use_processes: Ejecutar los trabajos en procesos en lugar de hilos
+            progress_interval: Segundos mínimos entre reportes de progreso de un trabajo
+        """
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.progress_interval = progress_interval
+        self._executor: Optional[Executor] = None
+        self._manager: Any = None
+        self._remote_events: Any = None
+        self._events: "queue.Queue[JobEvent]" = queue.Queue()
+        self._jobs: Dict[int, _Job] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _ensure_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                context = multiprocessing.get_context("spawn")
+                self._manager = context.Manager()
+                self._remote_events = self._manager.Queue()
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ui-job")
+        return self._executor
+
+    def submit(self, func: Callable[..., Any], *args: Any, name: str = "", **kwargs: Any) -> int:
+        """
+        Encola un trabajo.
+
+        Args:
+            func: Función a ejecutar; recibe un ``JobContext`` y luego ``args`` y ``kwargs``
+            name: Nombre descriptivo del trabajo
+            *args: Argumentos posicionales de ``func``
+            **kwargs: Argumentos con nombre de ``func``
+
+        Returns:
+            int: Identificador del trabajo
+        """
+        with self._lock:
+            executor = self._ensure_executor()
+            job_id = next(self._ids)
+            if self.use_processes:
+                cancel, events = self._manager.Event(), self._remote_events
+            else:
+                cancel, events = threading.Event(), self._events
+            context = JobContext(job_id, events, cancel, self.progress_interval)
+            future = executor.submit(_run_job, func, context, args, kwargs)
+            self._jobs[job_id] = _Job(name or getattr(func, "__name__", "job"), future, cancel)
+        future.add_done_callback(lambda done, job_id=job_id: self._finish(job_id, done))
+        return job_id
+
+    def _finish(self, job_id: int, future: Future) -> None:
+        """Publica el evento final de un trabajo (se ejecuta en el hilo del ejecutor)"""
+        if future.cancelled():
+            event = JobEvent(job_id, EVENT_CANCELLED)
+        elif future.exception() is not None:
+            error = future.exception()
+            event = JobEvent(job_id, EVENT_ERROR, error=f"{type(error).__name__}: {error}")
+        else:
+            kind, result = future.result()
+            event = JobEvent(job_id, kind, result=result)
+        self._events.put(event)
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Solicita cancelar un trabajo.
+
+        Un trabajo en cola no llega a ejecutarse; uno en curso se detiene en
+        su próximo reporte de progreso o llamada a ``JobContext.check``.
+
+        Returns:
+            bool: False si el trabajo no existe o ya terminó
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.future.done():
+            return False
+        job.cancel.set()
+        job.future.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        """Solicita cancelar todos los trabajos pendientes o en curso"""
+        for job_id in list(self._jobs):
+            self.cancel(job_id)
+
+    def active(self) -> List[int]:
+        """Identificadores de los trabajos que aún no terminan"""
+        return [job_id for job_id, job in self._jobs.items() if not job.future.done()]
+
+    def name(self, job_id: int) -> str:
+        """Nombre con que se envió un trabajo"""
+        job = self._jobs.get(job_id)
+        return job.name if job is not None else ""
+
+    def poll(self, max_events: int = 256) -> List[JobEvent]:
+        """
+        Retorna los eventos disponibles sin bloquear.
+
+        De cada trabajo solo se conserva el último progreso del lote de
+        eventos, y los eventos finales se entregan en orden. Después del
+        evento final de un trabajo no se entregan más eventos suyos.
+
+        Args:
+            max_events: Máximo de eventos a leer de cada cola en esta llamada
+
+        Returns:
+            List[JobEvent]: Eventos en orden de llegada, con el progreso combinado
+        """
+        raw: List[JobEvent] = []
+        # Primero la cola de los procesos: el progreso de un trabajo siempre
+        # se publica antes de que su evento final llegue a la cola local
+        for source in (self._remote_events, self._events):
+            if source is None:
+                continue
+            for _ in range(max_events):
+                try:
+                    raw.append(source.get_nowait())
+                except queue.Empty:
+                    break
+
+        events: List[JobEvent] = []
+        progress: Dict[int, int] = {}
+        for event in raw:
+            if event.job_id not in self._jobs:
+                continue
+            if event.kind == EVENT_PROGRESS:
+                if event.job_id in progress:
+                    events[progress[event.job_id]] = event
+                else:
+                    progress[event.job_id] = len(events)
+                    events.append(event)
+            else:
+                events.append(event)
+                del self._jobs[event.job_id]
+        return events
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancela los trabajos pendientes y libera los hilos o procesos"""
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None and wait:
+            self._manager.shutdown()
+            self._manager = None
+            self._remote_events = None
+
+
+def count_rows(path: Union[str, Path], sheet_name: str = DEFAULT_SHEET) -> Optional[int]:
+    """
+    Estima las filas de datos de una hoja a partir de su dimensión declarada.
+
+    No recorre la hoja, así que es inmediato aun para archivos grandes.
+
+    Returns:
+        Optional[int]: Filas sin contar el encabezado, o None si el archivo no
+        declara su dimensión o es un extracto CSV o de ancho fijo
+    """
+    if is_statement(path):
+        return None
+    wb = load_workbook(path, read_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            return None
+        max_row = wb[sheet_name].max_row
+        return max(max_row - 1, 0) if max_row else None
+    finally:
+        wb.close()
+
+
+def process_workbook_job(
+    context: JobContext,
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    movements_path: Optional[Union[str, Path]] = None,
+    statement_format: Optional[StatementFormat] = None
+) -> WorkbookSummary:
+    """
+    Trabajo de la interfaz: valida y concilia un archivo reportando las filas procesadas.
+
+    La lista de "Proveedor/Cliente" se toma de SIIGO dentro del trabajo, así
+    la sincronización de los datos maestros no bloquea la ventana.
+
+    Args:
+        context: Contexto del trabajo
+        path: Archivo Excel o extracto a procesar
+        chunk_size: Filas por lote de lectura
+        movements_path: CSV o Excel con los movimientos de SIIGO; opcional
+        statement_format: Formato del extracto, si el archivo es CSV o de ancho fijo
+
+    Returns:
+        WorkbookSummary: Resultado del archivo
+    """
+    total = count_rows(path)
+    context.progress(0, total, message="Leyendo archivo", force=True)
+    matcher = None
+    if movements_path:
+        matcher = ReconciliationMatcher(load_movements(movements_path))
+        context.check()
+    config = ExcelConfigProvider(proveedores=load_counterparty_names())
+    context.check()
+
+    summary = process_workbook(
+        path,
+        config=config,
+        chunk_size=chunk_size,
+        matcher=matcher,
+        statement_format=statement_format,
+        progress=lambda rows: context.progress(rows, total, message="Procesando")
+    )
+    context.progress(summary.rows, total or summary.rows, message="Terminado", force=True)
+    return summary
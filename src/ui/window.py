@@ -0,0 +1,317 @@
+"""
+Ventana principal para validar y conciliar archivos de transacciones.
+
+El procesamiento corre en un ``JobRunner``; la ventana solo consulta sus
+eventos con ``after()`` cada ``POLL_INTERVAL_MS`` milisegundos, así que el
+hilo de Tk nunca espera al procesamiento.
+
+Uso:
+    python -m src.ui.window
+"""
+import time
+from tkinter import filedialog
+from typing import Optional
+
+import customtkinter as ctk
+
+from ..excel.statement_reader import StatementFormat
+from .grid import VirtualGrid, filter_job, load_preview_job, sort_job
+from .jobs import EVENT_CANCELLED, EVENT_DONE, EVENT_ERROR, EVENT_PROGRESS, JobEvent, JobRunner, process_workbook_job
+
+# Cada cuánto se consultan los eventos de los trabajos
+POLL_INTERVAL_MS = 50
+
+# Eventos que se atienden como máximo en cada consulta; el resto espera a la siguiente
+MAX_EVENTS_PER_POLL = 64
+
+
+class MainWindow(ctk.CTk):
+    """
+    Ventana para elegir un archivo, procesarlo en segundo plano y ver el resultado.
+
+    ``max_poll_gap`` guarda el mayor retraso observado entre dos consultas,
+    que es una cota del tiempo que la ventana tardó en responder.
+    """
+
+    def __init__(self, runner: Optional[JobRunner] = None):
+        """
+        Inicializa la ventana.
+
+        Args:
+            runner: Ejecutor de trabajos; por defecto uno con un proceso aparte
+        """
+        super().__init__()
+        self.title("AutoConciliación")
+        self.geometry("720x480")
+        self.runner = runner or JobRunner(use_processes=True)
+        self.job_id: Optional[int] = None
+        self.max_poll_gap = 0.0
+        self._last_poll = time.perf_counter()
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(3, weight=1)
+
+        file_frame = ctk.CTkFrame(self)
+        file_frame.grid(row=0, column=0, padx=12, pady=(12, 6), sticky="ew")
+        file_frame.grid_columnconfigure(0, weight=1)
+        self.path_entry = ctk.CTkEntry(file_frame, placeholder_text="Archivo de transacciones (.xlsx o .csv)")
+        self.path_entry.grid(row=0, column=0, padx=(0, 6), sticky="ew")
+        self.movements_entry = ctk.CTkEntry(file_frame, placeholder_text="Movimientos de SIIGO (opcional)")
+        self.movements_entry.grid(row=1, column=0, padx=(0, 6), pady=(6, 0), sticky="ew")
+        ctk.CTkButton(file_frame, text="Seleccionar...", width=120, command=self._choose_file).grid(row=0, column=1)
+        ctk.CTkButton(file_frame, text="Seleccionar...", width=120, command=self._choose_movements).grid(
+            row=1, column=1, pady=(6, 0)
+        )
+        self.format_entry = ctk.CTkEntry(file_frame, placeholder_text="Formato del extracto CSV (JSON, opcional)")
+        self.format_entry.grid(row=2, column=0, padx=(0, 6), pady=(6, 0), sticky="ew")
+        ctk.CTkButton(file_frame, text="Seleccionar...", width=120, command=self._choose_format).grid(
+            row=2, column=1, pady=(6, 0)
+        )
+
+        actions = ctk.CTkFrame(self, fg_color="transparent")
+        actions.grid(row=1, column=0, padx=12, pady=6, sticky="ew")
+        self.start_button = ctk.CTkButton(actions, text="Procesar", command=self.start)
+        self.start_button.pack(side="left")
+        self.cancel_button = ctk.CTkButton(actions, text="Cancelar", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side="left", padx=6)
+        ctk.CTkButton(actions, text="Vista previa", command=self.preview).pack(side="left")
+
+        progress_frame = ctk.CTkFrame(self, fg_color="transparent")
+        progress_frame.grid(row=2, column=0, padx=12, pady=6, sticky="ew")
+        progress_frame.grid_columnconfigure(0, weight=1)
+        self.progress_bar = ctk.CTkProgressBar(progress_frame)
+        self.progress_bar.grid(row=0, column=0, sticky="ew")
+        self.progress_bar.set(0)
+        self.status_label = ctk.CTkLabel(progress_frame, text="Listo", anchor="w")
+        self.status_label.grid(row=1, column=0, sticky="ew")
+
+        self.output = ctk.CTkTextbox(self)
+        self.output.grid(row=3, column=0, padx=12, pady=(6, 12), sticky="nsew")
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.after(POLL_INTERVAL_MS, self._poll)
+
+    def _choose_file(self) -> None:
+        path = filedialog.askopenfilename(filetypes=[("Excel", "*.xlsx *.xlsm"), ("Extractos", "*.csv *.txt *.prn")])
+        if path:
+            self.path_entry.delete(0, "end")
+            self.path_entry.insert(0, path)
+
+    def _choose_movements(self) -> None:
+        path = filedialog.askopenfilename(filetypes=[("Movimientos", "*.csv *.xlsx")])
+        if path:
+            self.movements_entry.delete(0, "end")
+            self.movements_entry.insert(0, path)
+
+    def _choose_format(self) -> None:
+        path = filedialog.askopenfilename(filetypes=[("Formato de extracto", "*.json")])
+        if path:
+            self.format_entry.delete(0, "end")
+            self.format_entry.insert(0, path)
+
+    def _statement_format(self) -> Optional[StatementFormat]:
+        """Formato del extracto elegido, o None si no se indicó"""
+        path = self.format_entry.get().strip()
+        return StatementFormat.load(path) if path else None
+
+    def start(self) -> None:
+        """Envía el archivo seleccionado al ejecutor de trabajos"""
+        path = self.path_entry.get().strip()
+        if not path or self.job_id is not None:
+            return
+        movements = self.movements_entry.get().strip() or None
+        try:
+            statement_format = self._statement_format()
+        except (OSError, ValueError) as e:
+            self.output.insert("end", f"Formato del extracto inválido: {e}\n")
+            return
+        self.job_id = self.runner.submit(
+            process_workbook_job, path, movements_path=movements, statement_format=statement_format, name=path
+        )
+        self.start_button.configure(state="disabled")
+        self.cancel_button.configure(state="normal")
+        self.progress_bar.set(0)
+        self.status_label.configure(text="En cola")
+        self.output.insert("end", f"Procesando {path}\n")
+
+    def preview(self) -> None:
+        """Abre el archivo seleccionado en una tabla virtualizada"""
+        path = self.path_entry.get().strip()
+        if not path:
+            return
+        try:
+            statement_format = self._statement_format()
+        except (OSError, ValueError) as e:
+            self.output.insert("end", f"Formato del extracto inválido: {e}\n")
+            return
+        PreviewWindow(self, path, statement_format=statement_format)
+
+    def cancel(self) -> None:
+        """Solicita cancelar el trabajo en curso"""
+        if self.job_id is not None and self.runner.cancel(self.job_id):
+            self.cancel_button.configure(state="disabled")
+            self.status_label.configure(text="Cancelando...")
+
+    def _poll(self) -> None:
+        """Atiende los eventos pendientes y programa la siguiente consulta"""
+        now = time.perf_counter()
+        self.max_poll_gap = max(self.max_poll_gap, now - self._last_poll - POLL_INTERVAL_MS / 1000)
+        self._last_poll = now
+        for event in self.runner.poll(MAX_EVENTS_PER_POLL):
+            self.apply_event(event)
+        self.after(POLL_INTERVAL_MS, self._poll)
+
+    def apply_event(self, event: JobEvent) -> None:
+        """Refleja un evento de trabajo en los controles"""
+        if event.kind == EVENT_PROGRESS:
+            if event.total:
+                self.progress_bar.set(min(event.rows / event.total, 1.0))
+                text = f"{event.message}: {event.rows:,} de {event.total:,} filas"
+            else:
+                text = f"{event.message}: {event.rows:,} filas"
+            self.status_label.configure(text=text)
+            return
+
+        if event.kind == EVENT_DONE:
+            summary = event.result
+            self.progress_bar.set(1)
+            if summary.error:
+                self.status_label.configure(text="El archivo no se pudo procesar")
+                self.output.insert("end", f"Error: {summary.error}\n")
+            else:
+                self.status_label.configure(text=f"Terminado: {summary.rows:,} filas en {summary.elapsed:.1f} s")
+                self.output.insert("end", self._format_summary(summary))
+        elif event.kind == EVENT_ERROR:
+            self.status_label.configure(text="Error")
+            self.output.insert("end", f"Error: {event.error}\n")
+        elif event.kind == EVENT_CANCELLED:
+            self.status_label.configure(text="Cancelado")
+            self.output.insert("end", "Procesamiento cancelado\n")
+        self.job_id = None
+        self.start_button.configure(state="normal")
+        self.cancel_button.configure(state="disabled")
+
+    @staticmethod
+    def _format_summary(summary) -> str:
+        lines = [f"Filas: {summary.rows:,}", f"Filas con errores: {summary.invalid_rows:,}"]
+        for rule, count in summary.error_counts.items():
+            if count:
+                lines.append(f"  {rule}: {count:,}")
+        if summary.balance_drift_row is not None:
+            lines.append(f"El saldo deja de cuadrar en la fila {summary.balance_drift_row}")
+        for kind, count in summary.matches.items():
+            lines.append(f"Coincidencias {kind}: {count:,}")
+        return "\n".join(lines) + "\n"
+
+    def close(self) -> None:
+        """Cancela los trabajos y cierra la ventana"""
+        self.runner.shutdown(wait=False)
+        self.destroy()
+
+
+class PreviewWindow(ctk.CTkToplevel):
+    """
+    Ventana con la hoja "Transacciones" en una ``VirtualGrid`` y un filtro de texto.
+
+    La lectura del archivo (a través de la caché de columnas), los índices de
+    orden y cada filtro se calculan en un ``JobRunner`` con hilos; la ventana
+    solo consulta sus eventos y muestra la tabla cuando el modelo está listo.
+    """
+
+    def __init__(
+        self,
+        master: ctk.CTk,
+        path: str,
+        runner: Optional[JobRunner] = None,
+        statement_format: Optional[StatementFormat] = None
+    ):
+        """
+        Inicializa la ventana y encola la carga del archivo.
+
+        Args:
+            master: Ventana principal
+            path: Archivo a previsualizar
+            runner: Ejecutor de trabajos; por defecto uno propio con un hilo
+            statement_format: Formato del extracto, si el archivo es CSV o de ancho fijo
+        """
+        super().__init__(master)
+        self.title(f"Vista previa - {path}")
+        self.geometry("1000x600")
+        self.runner = runner or JobRunner()
+        self.model = None
+        self.table: Optional[VirtualGrid] = None
+        self._filter_job: Optional[int] = None
+        self._sort_job: Optional[int] = None
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.filter_entry = ctk.CTkEntry(self, placeholder_text="Filtrar (Enter para aplicar)")
+        self.filter_entry.grid(row=0, column=0, padx=12, pady=(12, 6), sticky="ew")
+        self.filter_entry.bind("<Return>", lambda event: self.apply_filter(self.filter_entry.get()))
+        self.status_label = ctk.CTkLabel(self, text="En cola", anchor="w")
+        self.status_label.grid(row=2, column=0, padx=12, pady=(0, 6), sticky="ew")
+
+        self._load_job = self.runner.submit(load_preview_job, path, statement_format=statement_format, name=path)
+        self.protocol("WM_DELETE_WINDOW", self.close)
+        self.after(POLL_INTERVAL_MS, self._poll)
+
+    def apply_filter(self, text: str) -> None:
+        """Encola el cálculo de un filtro; el anterior, si sigue en curso, se cancela"""
+        if self.model is None:
+            return
+        if self._filter_job is not None:
+            self.runner.cancel(self._filter_job)
+        self._filter_job = self.runner.submit(filter_job, self.model, None, text)
+        self.status_label.configure(text="Filtrando...")
+
+    def apply_sort(self, column: str, ascending: bool) -> None:
+        """Encola el cálculo del índice de orden; el anterior, si sigue en curso, se cancela"""
+        if self._sort_job is not None:
+            self.runner.cancel(self._sort_job)
+        self._sort_job = self.runner.submit(sort_job, self.model, column, ascending)
+        self.status_label.configure(text="Ordenando...")
+
+    def _poll(self) -> None:
+        """Atiende los eventos de la carga, de los órdenes y de los filtros"""
+        if not self.winfo_exists():
+            return
+        for event in self.runner.poll(MAX_EVENTS_PER_POLL):
+            self.apply_event(event)
+        self.after(POLL_INTERVAL_MS, self._poll)
+
+    def apply_event(self, event: JobEvent) -> None:
+        """Refleja un evento de trabajo en la ventana"""
+        if event.kind == EVENT_PROGRESS:
+            total = f" de {event.total:,}" if event.total else ""
+            self.status_label.configure(text=f"{event.message}: {event.rows:,}{total}")
+        elif event.kind == EVENT_ERROR:
+            self.status_label.configure(text=f"Error: {event.error}")
+        elif event.kind == EVENT_DONE and event.job_id == self._load_job:
+            self.model = event.result
+            self.table = VirtualGrid(self, self.model, sort_command=self.apply_sort)
+            self.table.grid(row=1, column=0, padx=12, pady=(0, 12), sticky="nsew")
+            self.status_label.configure(text=f"{len(self.model):,} filas")
+        elif event.kind == EVENT_DONE and event.job_id == self._sort_job:
+            self._sort_job = None
+            self.table.apply_sort(*event.result)
+            self.status_label.configure(text=f"{len(self.model):,} filas")
+        elif event.kind == EVENT_DONE and event.job_id == self._filter_job:
+            self._filter_job = None
+            self.model.set_mask(event.result)
+            self.table.first = 0
+            self.table.refresh()
+            self.status_label.configure(text=f"{len(self.model):,} filas")
+
+    def close(self) -> None:
+        """Cancela los trabajos pendientes y cierra la ventana"""
+        self.runner.shutdown(wait=False)
+        self.destroy()
+
+
+def main() -> None:
+    """Abre la ventana principal"""
+    MainWindow().mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Instrumentación de tiempos y volumen por etapa del procesamiento.
+
+Uso:
+    from src.utils.instrumentation import metrics, timed
+
+    metrics.enable(summary_interval=60)
+    with metrics.stage("validate", rows=len(chunk)):
+        ...
+
+    @timed("siigo.sync")
+    def sync(...): ...
+
+Mientras está deshabilitada (el estado por defecto) cada punto de medición se
+reduce a revisar un atributo booleano.
+"""
+import functools
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Límites superiores (segundos) de los buckets del histograma de latencia HTTP
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+PROMETHEUS_PREFIX = "autoconciliacion"
+
+
+class StageStats:
+    """Acumulado de una etapa: llamadas, tiempo, filas y bytes"""
+
+    __slots__ = ("calls", "seconds", "rows", "bytes", "max_seconds")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.max_seconds = 0.0
+
+    def add(self, seconds: float, rows: int = 0, bytes: int = 0, calls: int = 1) -> None:
+        self.calls += calls
+        self.seconds += seconds
+        self.rows += rows
+        self.bytes += bytes
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 6),
+            "max_seconds": round(self.max_seconds, 6),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "rows_per_second": round(self.rows / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos, al estilo de Prometheus"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = HTTP_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> List[int]:
+        """Conteos acumulados por bucket (``le``), sin incluir +Inf"""
+        total, result = 0, []
+        for count in self.counts:
+            total += count
+            result.append(total)
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0.0,
+            "buckets": {str(bound): count for bound, count in zip(self.buckets, self.cumulative())},
+        }
+
+
+class _NullTimer:
+    """Temporizador que no hace nada; se usa mientras la instrumentación está deshabilitada"""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def add(self, rows: int = 0, bytes: int = 0) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    """Mide el tiempo de pared de un bloque y lo acumula en su etapa al salir"""
+
+    __slots__ = ("metrics", "name", "rows", "bytes", "started")
+
+    def __init__(self, metrics: "Metrics", name: str, rows: int, bytes: int) -> None:
+        self.metrics = metrics
+        self.name = name
+        self.rows = rows
+        self.bytes = bytes
+        self.started = 0.0
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.metrics.record(self.name, time.perf_counter() - self.started, rows=self.rows, bytes=self.bytes)
+
+    def add(self, rows: int = 0, bytes: int = 0) -> None:
+        """Suma filas o bytes procesados dentro del bloque"""
+        self.rows += rows
+        self.bytes += bytes
+
+
+class Metrics:
+    """
+    Registro de métricas del proceso.
+
+    Acumula tiempo de pared, filas y bytes por etapa y un histograma de
+    latencia por método y código HTTP. Si se configura ``summary_interval``,
+    publica un resumen periódico en ``log.app`` como ``props``.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.summary_interval = 0.0
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+        self._http: Dict[Tuple[str, str], Histogram] = {}
+        self._last_summary = time.monotonic()
+        self._logger: Any = None
+
+    def enable(self, summary_interval: float = 0.0, logger: Any = None) -> None:
+        """
+        Habilita la instrumentación.
+
+        Args:
+            summary_interval: Segundos entre resúmenes en el log (0 = sin resúmenes periódicos)
+            logger: Logger para los resúmenes; por defecto ``log.app``
+        """
+        self.summary_interval = summary_interval
+        self._logger = logger
+        self._last_summary = time.monotonic()
+        self.enabled = True
+
+    def disable(self) -> None:
+        """Deshabilita la instrumentación conservando lo acumulado"""
+        self.enabled = False
+
+    def reset(self) -> None:
+        """Descarta todo lo acumulado"""
+        with self._lock:
+            self._stages.clear()
+            self._http.clear()
+
+    def stage(self, name: str, rows: int = 0, bytes: int = 0) -> Union[_StageTimer, _NullTimer]:
+        """
+        Context manager que mide una etapa.
+
+        Args:
+            name: Nombre de la etapa ('excel.read', 'validate', ...)
+            rows: Filas procesadas en el bloque
+            bytes: Bytes procesados en el bloque
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, name, rows, bytes)
+
+    def record(self, name: str, seconds: float, rows: int = 0, bytes: int = 0) -> None:
+        """Acumula una medición ya tomada para una etapa"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats()
+            stats.add(seconds, rows, bytes)
+        self._maybe_summarize()
+
+    def observe_http(self, method: str, status: Union[int, str], seconds: float) -> None:
+        """Registra la latencia de una petición HTTP"""
+        if not self.enabled:
+            return
+        key = (method.upper(), str(status))
+        with self._lock:
+            histogram = self._http.get(key)
+            if histogram is None:
+                histogram = self._http[key] = Histogram()
+            histogram.observe(seconds)
+        self._maybe_summarize()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copia serializable de todas las métricas"""
+        with self._lock:
+            return {
+                "stages": {name: stats.to_dict() for name, stats in sorted(self._stages.items())},
+                "http": {
+                    f"{method} {status}": histogram.to_dict()
+                    for (method, status), histogram in sorted(self._http.items())
+                },
+            }
+
+    def drain(self) -> Dict[str, Any]:
+        """Retorna lo acumulado y lo descarta, para enviarlo a otro proceso"""
+        with self._lock:
+            stages, self._stages = self._stages, {}
+            http, self._http = self._http, {}
+        return {
+            "stages": {name: [s.calls, s.seconds, s.rows, s.bytes, s.max_seconds] for name, s in stages.items()},
+            "http": [[method, status, h.counts, h.sum, h.count] for (method, status), h in http.items()],
+        }
+
+    def merge(self, drained: Dict[str, Any]) -> None:
+        """Suma lo acumulado en otro proceso (resultado de ``drain``)"""
+        with self._lock:
+            for name, (calls, seconds, rows, bytes, max_seconds) in drained.get("stages", {}).items():
+                stats = self._stages.get(name)
+                if stats is None:
+                    stats = self._stages[name] = StageStats()
+                stats.add(seconds, rows, bytes, calls=calls)
+                stats.max_seconds = max(stats.max_seconds, max_seconds)
+            for method, status, counts, total, count in drained.get("http", []):
+                histogram = self._http.get((method, status))
+                if histogram is None:
+                    histogram = self._http[(method, status)] = Histogram()
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def _maybe_summarize(self) -> None:
+        if self.summary_interval and time.monotonic() - self._last_summary >= self.summary_interval:
+            self.log_summary()
+
+    def log_summary(self) -> None:
+        """Publica el resumen actual en el log"""
+        self._last_summary = time.monotonic()
+        logger = self._logger
+        if logger is None:
+            from ..config import log
+            logger = log.app
+        snapshot = self.snapshot()
+        logger.info("Resumen de rendimiento", stages=snapshot["stages"], http=snapshot["http"])
+
+    def to_prometheus(self) -> str:
+        """Métricas en formato de texto de Prometheus"""
+        prefix = PROMETHEUS_PREFIX
+        lines: List[str] = []
+        with self._lock:
+            stages = sorted(self._stages.items())
+            http = sorted(self._http.items())
+            for metric, attribute in (
+                ("stage_calls_total", "calls"),
+                ("stage_seconds_total", "seconds"),
+                ("stage_rows_total", "rows"),
+                ("stage_bytes_total", "bytes"),
+            ):
+                lines.append(f"# TYPE {prefix}_{metric} counter")
+                for name, stats in stages:
+                    lines.append(f'{prefix}_{metric}{{stage="{name}"}} {getattr(stats, attribute)}')
+
+            metric = f"{prefix}_http_request_duration_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for (method, status), histogram in http:
+                labels = f'method="{method}",status="{status}"'
+                for bound, count in zip(histogram.buckets, histogram.cumulative()):
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{metric}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Union[str, Path]) -> Path:
+        """
+        Escribe las métricas en un archivo local.
+
+        Args:
+            path: Ruta de destino; con extensión .json se escribe JSON y con
+                cualquier otra, texto de Prometheus
+
+        Returns:
+            Path: Ruta escrita
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == ".json":
+            content = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        else:
+            content = self.to_prometheus()
+        path.write_text(content, encoding="utf-8")
+        return path
+
+
+# Registro global del proceso
+metrics = Metrics()
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """
+    Decorador que mide cada llamada a la función como una etapa.
+
+    Args:
+        name: Nombre de la etapa
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.record(name, time.perf_counter() - started)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def iter_timed(name: str, iterable: Any, rows: Callable[[Any], int] = len) -> Iterator[Any]:
+    """
+    Recorre un iterable midiendo solo el tiempo de producir cada elemento.
+
+    El tiempo que el consumidor tarda en procesar cada elemento no se cuenta
+    en la etapa.
+
+    Args:
+        name: Nombre de la etapa
+        iterable: Iterable a recorrer (por ejemplo, un lector por lotes)
+        rows: Función que cuenta las filas de cada elemento
+    """
+    if not metrics.enabled:
+        yield from iterable
+        return
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        metrics.record(name, time.perf_counter() - started, rows=rows(item))
+        yield item
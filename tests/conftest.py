@@ -0,0 +1,43 @@
+"""
+Fixtures compartidas por las pruebas
+"""
+from typing import Any, List, Optional, Tuple
+
+import pytest
+
+from src.config.interfaces.logger_interface import ILogger
+
+
+class RecordingLogger(ILogger):
+    """Logger en memoria que cumple la interfaz ILogger sin escribir archivos"""
+
+    def __init__(self):
+        self.records: List[Tuple[str, str, dict]] = []
+
+    def info(self, message: str, **kwargs: Any) -> None:
+        self.records.append(("INFO", message, kwargs))
+
+    def error(self, message: str, exc_info: Optional[bool] = None, **kwargs: Any) -> None:
+        self.records.append(("ERROR", message, kwargs))
+
+    def debug(self, message: str, **kwargs: Any) -> None:
+        self.records.append(("DEBUG", message, kwargs))
+
+    def warning(self, message: str, **kwargs: Any) -> None:
+        self.records.append(("WARNING", message, kwargs))
+
+
+@pytest.fixture
+def recording_logger():
+    """Logger en memoria para inspeccionar los eventos registrados"""
+    return RecordingLogger()
+
+
+@pytest.fixture(autouse=True)
+def template_cache(tmp_path, monkeypatch):
+    """Caché de plantillas aislada por prueba, fuera de la carpeta del proyecto"""
+    from src.excel.template import template_cache as module
+
+    cache = module.TemplateCache(tmp_path / "template-cache")
+    monkeypatch.setattr(module, "_default_cache", cache)
+    return cache
@@ -0,0 +1,265 @@
+"""
+Tests para el procesamiento por lotes en varios procesos
+"""
+import json
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from src.batch import main, process_workbook, run_batch
+from src.utils.instrumentation import metrics
+from src.excel.template.generate_template import ExcelTemplateGenerator
+
+
+class ListHandler(logging.Handler):
+    """Handler que acumula los registros recibidos"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def workbooks(tmp_path, recording_logger):
+    """Crea tres plantillas diligenciadas, una de ellas con errores"""
+    template = tmp_path / "plantilla.xlsx"
+    ExcelTemplateGenerator(logger=recording_logger).create_excel_template(str(template))
+    folder = tmp_path / "entrada"
+    folder.mkdir()
+    for number in range(3):
+        wb = load_workbook(template)
+        sheet = wb["Transacciones"]
+        saldo = 0
+        for i in range(1, 21):
+            entro = 10 * i
+            saldo += entro
+            sheet.append([f"T{i:04d}", datetime(2023, 1, i), "Detalle", "Proveedor1", entro, None,
+                          saldo, "Ventas", "No"])
+        if number == 2:
+            sheet["E3"] = -5
+        wb.save(folder / f"cuenta_{number}.xlsx")
+    (folder / "notas.txt").write_text("no es un libro")
+    return folder
+
+
+@pytest.fixture
+def movements():
+    """Movimientos de SIIGO que corresponden a las primeras diez filas"""
+    return pd.DataFrame({
+        "id": [f"M{i}" for i in range(1, 11)],
+        "date": [datetime(2023, 1, i) for i in range(1, 11)],
+        "amount": [10.0 * i for i in range(1, 11)],
+        "counterparty": ["Proveedor1"] * 10,
+    })
+
+
+def test_process_workbook_single(workbooks, movements):
+    """Verifica el procesamiento de un archivo en el proceso actual"""
+    from src.reconciliation.matcher import ReconciliationMatcher
+
+    summary = process_workbook(workbooks / "cuenta_0.xlsx", chunk_size=7, matcher=ReconciliationMatcher(movements))
+
+    assert summary.error is None
+    assert summary.rows == 20
+    assert summary.invalid_rows == 0
+    assert summary.balance_drift_row is None
+    assert summary.matches == {"exact": 10, "fuzzy": 0, "none": 10}
+
+
+def test_process_workbook_csv_statement(workbooks, movements, tmp_path):
+    """Un extracto CSV con los encabezados de la plantilla da el mismo resultado que el libro"""
+    from src.excel.reader import TransactionReader
+    from src.reconciliation.matcher import ReconciliationMatcher
+
+    frame = TransactionReader(workbooks / "cuenta_0.xlsx").read(typed=False)
+    frame["Fecha"] = pd.to_datetime(frame["Fecha"]).dt.strftime("%d/%m/%Y")
+    frame.to_csv(tmp_path / "cuenta_0.csv", index=False)
+
+    summary = process_workbook(tmp_path / "cuenta_0.csv", chunk_size=7, matcher=ReconciliationMatcher(movements))
+    expected = process_workbook(workbooks / "cuenta_0.xlsx", chunk_size=7, matcher=ReconciliationMatcher(movements))
+
+    assert summary.error is None
+    assert (summary.rows, summary.invalid_rows, summary.matches) == (expected.rows, expected.invalid_rows, expected.matches)
+
+
+def test_cli_passes_statement_format(workbooks, tmp_path):
+    """El formato del extracto indicado en la línea de comandos llega a cada proceso hijo"""
+    from src.excel.reader import TransactionReader
+
+    frame = TransactionReader(workbooks / "cuenta_0.xlsx").read(typed=False)
+    statements = tmp_path / "extractos"
+    statements.mkdir()
+    pd.DataFrame({
+        "Fecha Mov": pd.to_datetime(frame["Fecha"]).dt.strftime("%d/%m/%Y"),
+        "Descripción": frame["Detalle"],
+        "Tercero": frame["Proveedor/Cliente"],
+        "Valor": frame["Entró"].map(lambda value: f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")),
+    }).to_csv(statements / "banco.csv", sep=";", index=False)
+    format_path = tmp_path / "formato.json"
+    format_path.write_text(json.dumps({
+        "columns": {"Fecha Mov": "Fecha", "Descripción": "Detalle", "Tercero": "Proveedor/Cliente"},
+        "amount_column": "Valor", "decimal": ",", "thousands": ".", "date_format": "%d/%m/%Y"
+    }), encoding="utf-8")
+    output = tmp_path / "resumen.json"
+
+    assert main([str(statements), "--pattern", "*.csv", "--statement-format", str(format_path),
+                 "--output", str(output)]) == 0
+
+    workbook = json.loads(output.read_text(encoding="utf-8"))["workbooks"][0]
+    assert workbook["error"] is None and workbook["rows"] == 20
+    assert workbook["error_counts"]["Entró"] == 0 and workbook["error_counts"]["Fecha"] == 0
+
+
+def test_process_workbook_incremental(workbooks, movements, tmp_path):
+    """Con el estado, solo se revisan las filas nuevas o modificadas y los totales no cambian"""
+    from src.reconciliation.matcher import ReconciliationMatcher
+    from src.reconciliation.state import ReconciliationState
+
+    state = ReconciliationState(tmp_path / "estado.sqlite3")
+    path = workbooks / "cuenta_2.xlsx"
+    matcher = ReconciliationMatcher(movements)
+    first = process_workbook(path, chunk_size=7, matcher=matcher, state=state)
+    assert first.skipped_rows == 0 and first.invalid_rows == 1
+
+    # Las nueve filas conciliadas se omiten; la fila inválida y las que no tienen
+    # coincidencia se vuelven a conciliar
+    second = process_workbook(path, chunk_size=7, matcher=matcher, state=state)
+    assert second.skipped_rows == 9
+    assert (second.invalid_rows, second.error_counts, second.matches) == \
+        (first.invalid_rows, first.error_counts, first.matches)
+
+    wb = load_workbook(path)
+    sheet = wb["Transacciones"]
+    sheet["E3"] = 20
+    sheet.append(["T0021", datetime(2023, 1, 21), "Detalle", "Proveedor1", 210, None, 2310,
+                  "Ventas", "No"])
+    wb.save(path)
+    more = pd.concat([movements, pd.DataFrame({
+        "id": ["M11", "M21"], "date": [datetime(2023, 1, 11), datetime(2023, 1, 21)],
+        "amount": [110.0, 210.0], "counterparty": ["Proveedor1"] * 2
+    })], ignore_index=True)
+
+    third = process_workbook(path, chunk_size=7, matcher=ReconciliationMatcher(more), state=state)
+    expected = process_workbook(path, chunk_size=7, matcher=ReconciliationMatcher(more))
+    assert third.skipped_rows == 9
+    assert (third.rows, third.invalid_rows, third.error_counts, third.matches, third.balance_drift_row) == \
+        (expected.rows, expected.invalid_rows, expected.error_counts, expected.matches, expected.balance_drift_row)
+    assert third.invalid_rows == 0 and third.balance_drift_row is None
+    assert third.matches == {"exact": 12, "fuzzy": 0, "none": 9}
+
+
+def test_process_workbook_incremental_rechecks_stored_movements(workbooks, movements, tmp_path):
+    """Los movimientos de filas borradas quedan libres y los que ya no existen se concilian de nuevo"""
+    from src.reconciliation.matcher import ReconciliationMatcher
+    from src.reconciliation.state import ReconciliationState
+
+    state = ReconciliationState(tmp_path / "estado.sqlite3")
+    path = workbooks / "cuenta_0.xlsx"
+    process_workbook(path, chunk_size=7, matcher=ReconciliationMatcher(movements), state=state)
+
+    # T0001 tenía asignado M1; se borra y una fila nueva al final corresponde a M1
+    wb = load_workbook(path)
+    sheet = wb["Transacciones"]
+    sheet.delete_rows(2)
+    sheet.append(["T0021", datetime(2023, 1, 1), "Detalle", "Proveedor1", 10, None, 2100, "Ventas", "No"])
+    wb.save(path)
+    # M2 desapareció de SIIGO
+    current = movements[movements["id"] != "M2"]
+
+    incremental = process_workbook(path, chunk_size=7, matcher=ReconciliationMatcher(current), state=state)
+    expected = process_workbook(path, chunk_size=7, matcher=ReconciliationMatcher(current))
+    assert incremental.skipped_rows == 8
+    assert incremental.matches == expected.matches == {"exact": 9, "fuzzy": 0, "none": 11}
+
+
+def test_run_batch_incremental(workbooks, movements, tmp_path):
+    """Cada proceso hijo usa el mismo archivo de estado"""
+    state = tmp_path / "estado.sqlite3"
+
+    first = run_batch(workbooks, movements=movements, max_workers=2, state=state)
+    second = run_batch(workbooks, movements=movements, max_workers=2, state=state)
+
+    assert first.totals["skipped_rows"] == 0 and second.totals["skipped_rows"] == 10 + 10 + 9
+    assert first.totals["matches"] == second.totals["matches"]
+
+
+def test_run_batch_with_column_cache(workbooks, movements, tmp_path):
+    """Con la caché de columnas la segunda ejecución obtiene el mismo resultado sin releer los libros"""
+    cache_dir = tmp_path / "columnas"
+
+    first = run_batch(workbooks, movements=movements, max_workers=2, chunk_size=8, column_cache=cache_dir)
+    second = run_batch(workbooks, movements=movements, max_workers=2, chunk_size=8, column_cache=cache_dir)
+
+    # cuenta_0 y cuenta_1 tienen el mismo contenido y comparten entrada
+    assert len([entry for entry in cache_dir.iterdir() if entry.is_dir()]) == 2
+    assert first.totals["invalid_rows"] == second.totals["invalid_rows"] == 1
+    assert {k: v for k, v in first.totals.items() if k != "elapsed"} == \
+        {k: v for k, v in second.totals.items() if k != "elapsed"}
+
+def test_run_batch_uses_given_counterparties(workbooks):
+    """La lista de "Proveedor/Cliente" llega a todos los procesos hijos"""
+    default = run_batch(workbooks, max_workers=2, chunk_size=8)
+    siigo = run_batch(workbooks, max_workers=2, chunk_size=8, proveedores=["Acme"])
+
+    assert default.totals["invalid_rows"] == 1
+    assert siigo.totals["invalid_rows"] == siigo.totals["rows"]
+
+
+def test_run_batch_merges_results_and_logs(workbooks, movements):
+    """Verifica el resumen combinado y que los logs de los hijos lleguen al proceso principal"""
+    handler = ListHandler()
+    excel_logger = logging.getLogger("excel")
+    excel_logger.addHandler(handler)
+    try:
+        summary = run_batch(workbooks, movements=movements, max_workers=2, chunk_size=8)
+    finally:
+        excel_logger.removeHandler(handler)
+
+    totals = summary.totals
+    assert totals["files"] == 3
+    assert totals["failed_files"] == 0
+    assert totals["rows"] == 60
+    assert totals["invalid_rows"] == 1
+    assert totals["error_counts"]["Entró"] == 1
+    assert totals["balance_drifts"] == 1
+    assert totals["matches"]["exact"] == 29
+    assert [os.path.basename(w.path) for w in summary.workbooks] == ["cuenta_0.xlsx", "cuenta_1.xlsx", "cuenta_2.xlsx"]
+
+    processed = [r for r in handler.records if r.getMessage() == "Archivo procesado"]
+    assert len(processed) == 3
+    assert all(record.process != os.getpid() for record in processed)
+    assert sorted(record.props["rows"] for record in processed) == [20, 20, 20]
+
+
+def test_run_batch_merges_worker_metrics(workbooks, movements):
+    """Las métricas de los procesos hijos se suman en el proceso principal"""
+    metrics.reset()
+    metrics.enable()
+    try:
+        summary = run_batch(workbooks, movements=movements, max_workers=2, chunk_size=8)
+        stages = metrics.snapshot()["stages"]
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+    assert all(workbook.metrics is None for workbook in summary.workbooks)
+    for stage in ("excel.read", "validate", "match"):
+        assert stages[stage]["rows"] == 60
+    assert "metrics" not in summary.to_dict()["workbooks"][0]
+
+
+def test_run_batch_reports_failures(tmp_path):
+    """Verifica que un archivo dañado no detenga el lote"""
+    (tmp_path / "danado.xlsx").write_bytes(b"no es un zip")
+
+    summary = run_batch(tmp_path, max_workers=1)
+
+    assert summary.totals["failed_files"] == 1
+    assert summary.workbooks[0].error
@@ -0,0 +1,576 @@
+"""
+Tests para el procesamiento de archivos Excel
+"""
+import dataclasses
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from src.excel.balance import BalanceCheckpoint, BalanceChecker
+from src.excel.column_cache import ColumnCache
+from src.excel.excel_config import ExcelConfigProvider
+from src.excel.reader import TransactionReader
+from src.excel.statement_reader import StatementFormat, StatementReader
+from src.excel.validator import TransactionValidator
+from src.excel.template.generate_template import ExcelTemplateGenerator
+from src.excel.template.template_cache import TemplateCache
+from src.excel.writer import RESULT_COLUMNS, TransactionWorkbookWriter, rows_from_frames
+
+
+def _transaction_rows(count):
+    """Genera filas de transacciones con saldo consistente"""
+    rows = []
+    saldo = 0.0
+    for i in range(1, count + 1):
+        entro = float(i % 7 * 10)
+        salio = -float(i % 3 * 5)
+        saldo += entro + salio
+        rows.append([
+            f"T{i:04d}", datetime(2023, 1, 1 + i % 28), f"Detalle {i}", "Proveedor1",
+            entro, salio, saldo, "Gastos generales", "No"
+        ])
+    return rows
+
+
+@pytest.fixture
+def quiet_logger(recording_logger):
+    """Logger sin efectos secundarios para las pruebas"""
+    return recording_logger
+
+
+@pytest.fixture
+def workbook_factory(tmp_path, quiet_logger):
+    """Crea libros a partir de la plantilla con las filas indicadas"""
+    def _create(rows, name="transacciones.xlsx"):
+        path = tmp_path / name
+        ExcelTemplateGenerator(logger=quiet_logger).create_excel_template(str(path))
+        wb = load_workbook(path)
+        sheet = wb["Transacciones"]
+        for row in rows:
+            sheet.append(row)
+        wb.save(path)
+        return path
+    return _create
+
+
+class TestTransactionReader:
+    """Pruebas para el lector en streaming"""
+
+    def test_reads_in_chunks(self, workbook_factory, quiet_logger):
+        """Verifica que las filas se entreguen en lotes del tamaño indicado"""
+        path = workbook_factory(_transaction_rows(25))
+        reader = TransactionReader(path, chunk_size=10, logger=quiet_logger)
+
+        sizes = [len(chunk) for chunk in reader.iter_chunks()]
+
+        assert sizes == [10, 10, 5]
+
+    def test_typed_columns(self, workbook_factory, quiet_logger):
+        """Verifica que las columnas se conviertan a los tipos configurados"""
+        path = workbook_factory([["T0001", "15/02/2023", "Compra", "Proveedor1", 100, None, "100.5", "Gastos", "Sí"]])
+        frame = TransactionReader(path, logger=quiet_logger).read()
+
+        assert list(frame.columns) == ExcelConfigProvider().headers_transacciones
+        assert frame.index[0] == 2
+        assert frame["Fecha"].iloc[0] == pd.Timestamp(2023, 2, 15)
+        assert frame["Entró"].dtype == "float64"
+        assert pd.isna(frame["Salió"].iloc[0])
+        assert frame["Saldo"].iloc[0] == 100.5
+        assert frame["ID"].iloc[0] == "T0001"
+
+    def test_raw_mode_keeps_original_values(self, workbook_factory, quiet_logger):
+        """Verifica que el modo crudo no convierta los valores"""
+        path = workbook_factory([["T0001", None, None, None, "abc", None, None, None, None]])
+        frame = TransactionReader(path, logger=quiet_logger).read(typed=False)
+
+        assert frame["Entró"].iloc[0] == "abc"
+
+    def test_skips_empty_rows_and_resumes(self, workbook_factory, quiet_logger):
+        """Verifica que se ignoren filas vacías y se pueda iniciar desde una fila"""
+        rows = _transaction_rows(5)
+        rows.insert(2, [None] * 9)
+        path = workbook_factory(rows)
+        reader = TransactionReader(path, logger=quiet_logger)
+
+        assert len(reader.read()) == 5
+        resumed = pd.concat(reader.iter_chunks(start_row=5))
+        assert list(resumed.index) == [5, 6, 7]
+
+    def test_missing_headers(self, tmp_path, quiet_logger):
+        """Verifica que se rechacen hojas sin los encabezados esperados"""
+        path = tmp_path / "incompleto.xlsx"
+        wb = Workbook()
+        wb.active.title = "Transacciones"
+        wb.active.append(["ID", "Fecha"])
+        wb.save(path)
+
+        with pytest.raises(ValueError, match="Faltan columnas"):
+            list(TransactionReader(path, logger=quiet_logger).iter_chunks())
+
+
+class TestTransactionValidator:
+    """Pruebas para el validador vectorizado"""
+
+    def _frame(self, rows):
+        headers = ExcelConfigProvider().headers_transacciones
+        return pd.DataFrame(rows, columns=headers, index=pd.Index(range(2, 2 + len(rows)), name="fila"))
+
+    def test_valid_rows(self):
+        """Verifica que filas correctas no generen errores"""
+        frame = self._frame(_transaction_rows(20))
+        result = TransactionValidator().validate(frame)
+
+        assert result.is_valid
+        assert result.bitmap.dtype == np.uint8
+        assert sum(result.counts.values()) == 0
+
+    def test_detects_each_rule(self):
+        """Verifica que cada regla marque su bit correspondiente"""
+        frame = self._frame([
+            ["T1", "no es fecha", "", "Proveedor1", -5, 0, 1, "", "No"],
+            ["T2", datetime(2023, 1, 1), "", "Desconocido", 5, 3, "abc", "", "No"],
+            ["T3", None, "", None, None, None, None, "", "No"],
+        ])
+        validator = TransactionValidator()
+        result = validator.validate(frame)
+
+        assert result.counts == {"Entró": 1, "Salió": 1, "Saldo": 1, "Fecha": 1, "Proveedor/Cliente": 1}
+        assert list(result.invalid_rows()) == [2, 3]
+        assert sorted(result.errors_for(2)) == [
+            "Entró: El valor debe ser un número positivo.",
+            "Fecha: Debe ingresar una fecha válida."
+        ]
+        assert result.errors_for(4) == []
+
+    def test_validate_chunks_accumulates(self, workbook_factory, quiet_logger):
+        """Verifica la validación de los lotes del lector"""
+        rows = _transaction_rows(30)
+        rows[12][4] = -1
+        path = workbook_factory(rows)
+        reader = TransactionReader(path, chunk_size=7, logger=quiet_logger)
+
+        result = TransactionValidator().validate_chunks(reader.iter_chunks(typed=False))
+
+        assert len(result.rows) == 30
+        assert result.counts["Entró"] == 1
+        assert list(result.invalid_rows()) == [14]
+
+
+    def test_provider_catalog_from_config(self):
+        """La lista de proveedores se toma de la configuración, no de la fórmula"""
+        config = ExcelConfigProvider(proveedores=[f"Tercero {i}" for i in range(3000)])
+        rows = _transaction_rows(2)
+        rows[0][3], rows[1][3] = "Tercero 2999", "Proveedor1"
+
+        result = TransactionValidator(config).validate(self._frame(rows))
+
+        assert result.counts["Proveedor/Cliente"] == 1
+        assert list(result.invalid_rows()) == [3]
+
+
+class TestProviderCatalog:
+    """Pruebas para el catálogo de proveedores en la hoja oculta"""
+
+    def test_large_catalog_in_hidden_sheet(self, tmp_path, quiet_logger):
+        """Miles de proveedores se escriben en la hoja oculta y la validación usa el nombre definido"""
+        proveedores = [f"Tercero {i:05d}" for i in range(5000)]
+        path = tmp_path / "plantilla.xlsx"
+        ExcelTemplateGenerator(
+            logger=quiet_logger, config=ExcelConfigProvider(proveedores=proveedores)
+        ).create_excel_template(str(path))
+
+        wb = load_workbook(path)
+        lists = wb["Listas"]
+        assert lists.sheet_state == "hidden"
+        assert [row[0] for row in lists.iter_rows(values_only=True)] == proveedores
+        assert list(wb.defined_names["Proveedores"].destinations) == [("Listas", "$A$1:$A$5000")]
+        validation = next(
+            v for v in wb["Transacciones"].data_validations.dataValidation if v.type == "list"
+        )
+        assert validation.formula1 == "Proveedores"
+        assert str(validation.sqref) == "D2:D1048576"
+
+    def test_writer_includes_catalog(self, tmp_path, quiet_logger):
+        """El escritor en streaming también agrega la hoja de listas"""
+        path = tmp_path / "prellenada.xlsx"
+        TransactionWorkbookWriter(ExcelConfigProvider(proveedores=["Acme"]), quiet_logger).write(path)
+
+        wb = load_workbook(path)
+        assert wb["Listas"]["A1"].value == "Acme"
+        assert wb.defined_names["Proveedores"].attr_text == "'Listas'!$A$1:$A$1"
+
+class TestBalanceChecker:
+    """Pruebas para el recalculo del saldo"""
+
+    def _frame(self, rows):
+        headers = ExcelConfigProvider().headers_transacciones
+        return pd.DataFrame(rows, columns=headers, index=pd.Index(range(2, 2 + len(rows)), name="fila"))
+
+    def test_consistent_balance(self):
+        """Verifica que un saldo correcto no reporte desviaciones"""
+        frame = self._frame(_transaction_rows(50))
+        report = BalanceChecker().verify(frame)
+
+        assert report.is_consistent
+        assert report.rows_checked == 50
+        assert report.checkpoint == BalanceCheckpoint(51, frame["Saldo"].iloc[-1])
+
+    def test_reports_first_drift(self):
+        """Verifica que se reporte la primera fila fuera de tolerancia"""
+        rows = _transaction_rows(10)
+        rows[5][6] += 0.5
+        rows[7][6] += 3
+        frame = self._frame(rows)
+
+        report = BalanceChecker(tolerance=0.1).verify(frame)
+
+        assert report.first_drift_row == 7
+        assert report.stored_saldo == report.expected_saldo + 0.5
+        assert report.checkpoint.row == 6
+        assert BalanceChecker(tolerance=1).verify(frame).first_drift_row == 9
+
+    def test_incremental_resume(self, workbook_factory, quiet_logger):
+        """Verifica que la verificación se reanude desde el punto de control"""
+        rows = _transaction_rows(40)
+        path = workbook_factory(rows[:30])
+        reader = TransactionReader(path, chunk_size=8, logger=quiet_logger)
+        checker = BalanceChecker()
+        first = checker.verify_chunks(reader.iter_chunks())
+
+        path = workbook_factory(rows)
+        checkpoint = BalanceCheckpoint.from_dict(first.checkpoint.to_dict())
+        resumed = checker.verify_chunks(reader.iter_chunks(start_row=checkpoint.row + 1), checkpoint)
+
+        assert first.checkpoint.row == 31
+        assert resumed.is_consistent
+        assert resumed.rows_checked == 10
+        assert resumed.checkpoint.row == 41
+
+
+class TestTransactionWorkbookWriter:
+    """Pruebas para el escritor en streaming"""
+
+    def test_matches_template_structure(self, tmp_path, quiet_logger):
+        """El libro escrito conserva encabezados, anchos, validaciones e instrucciones de la plantilla"""
+        template = tmp_path / "plantilla.xlsx"
+        ExcelTemplateGenerator(logger=quiet_logger).create_excel_template(str(template))
+        written = tmp_path / "prellenada.xlsx"
+        TransactionWorkbookWriter(logger=quiet_logger).write(written, _transaction_rows(5))
+
+        expected, actual = load_workbook(template), load_workbook(written)
+        assert actual.sheetnames == expected.sheetnames
+        for name in expected.sheetnames:
+            assert [c.value for c in actual[name][1]] == [c.value for c in expected[name][1]]
+            for column, dimension in expected[name].column_dimensions.items():
+                assert actual[name].column_dimensions[column].width == dimension.width
+        assert [[c.value for c in row] for row in actual["Instrucciones"].iter_rows()] == \
+            [[c.value for c in row] for row in expected["Instrucciones"].iter_rows()]
+
+        def validations(wb):
+            return sorted(
+                (str(v.sqref), v.type, v.operator, v.formula1, v.error)
+                for v in wb["Transacciones"].data_validations.dataValidation
+            )
+        assert validations(actual) == validations(expected)
+
+        header = actual["Transacciones"]["A1"]
+        assert header.style == "encabezado" and header.font.bold and header.fill.fgColor.rgb.endswith("FFFF00")
+        assert actual["Transacciones"]["B2"].number_format == "DD/MM/YYYY"
+        assert actual["Transacciones"]["E2"].number_format == "#,##0.00"
+
+    def test_results_round_trip_through_reader(self, tmp_path, quiet_logger):
+        """Un libro de resultados escrito desde lotes se vuelve a leer igual"""
+        source = pd.DataFrame(
+            _transaction_rows(12), columns=ExcelConfigProvider().headers_transacciones
+        )
+        source["Tipo de coincidencia"] = "exact"
+        source["Movimiento SIIGO"] = [f"M{i}" for i in range(12)]
+        source["Confianza"] = 1.0
+        source.loc[3, "Salió"] = np.nan
+        path = tmp_path / "resultados.xlsx"
+        columns = ExcelConfigProvider().headers_transacciones + [name for name, _ in RESULT_COLUMNS]
+
+        written = TransactionWorkbookWriter(logger=quiet_logger).write(
+            path, rows_from_frames([source.iloc[:5], source.iloc[5:]], columns), RESULT_COLUMNS
+        )
+
+        assert written == 12
+        frame = TransactionReader(path, logger=quiet_logger).read()
+        assert frame["ID"].tolist() == source["ID"].tolist()
+        assert frame["Saldo"].tolist() == source["Saldo"].tolist()
+        assert pd.isna(frame.loc[5, "Salió"])
+        sheet = load_workbook(path, read_only=True)["Transacciones"]
+        assert next(sheet.iter_rows(min_row=2, max_row=2, min_col=10, values_only=True)) == ("exact", "M0", 1)
+
+    def test_generator_writes_prefilled_template(self, tmp_path, quiet_logger):
+        """create_excel_template con filas usa el escritor en streaming"""
+        path = tmp_path / "prellenada.xlsx"
+        ExcelTemplateGenerator(logger=quiet_logger).create_excel_template(str(path), rows=_transaction_rows(3))
+
+        assert TransactionReader(path, logger=quiet_logger).read()["ID"].tolist() == ["T0001", "T0002", "T0003"]
+
+    def test_memory_stays_flat(self, tmp_path, quiet_logger):
+        """La memoria máxima no crece con la cantidad de filas"""
+        writer = TransactionWorkbookWriter(logger=quiet_logger)
+
+        def peak(count):
+            tracemalloc.start()
+            try:
+                writer.write(tmp_path / f"{count}.xlsx", (row for row in _transaction_rows_iter(count)))
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small, large = peak(200), peak(2000)
+        assert large < small * 1.5
+
+
+def _transaction_rows_iter(count):
+    """Como ``_transaction_rows`` pero generando las filas una a una"""
+    for i in range(1, count + 1):
+        yield [f"T{i:04d}", datetime(2023, 1, 1 + i % 28), f"Detalle {i}", "Proveedor1", 10.0, None, 10.0 * i, "Ventas", "No"]
+
+
+class TestValidationSpec:
+    """Pruebas para las validaciones inmutables de la configuración"""
+
+    def test_build_does_not_mutate_config(self):
+        """Cada libro recibe validaciones nuevas y la configuración no cambia"""
+        config = ExcelConfigProvider()
+        before = dict(config.validations)
+
+        first, second = config.build_validations(), config.build_validations(last_row=10)
+
+        assert config.validations == before
+        assert all(a is not b for a, b in zip(first, second))
+        assert [str(v.sqref) for v in second] == ["E2:E10", "F2:F10", "G2:G10", "B2:B10", "D2:D10"]
+        assert first[0].errorTitle == "Valor inválido" and first[0].showErrorMessage
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            config.validations["Entró"].formula1 = "1"
+
+    def test_shared_config_across_threads(self, tmp_path, quiet_logger):
+        """Una sola configuración puede usarse para generar plantillas en paralelo"""
+        config = ExcelConfigProvider(proveedores=["Acme", "Globex"])
+
+        def generate(index):
+            path = tmp_path / f"{index}.xlsx"
+            TransactionWorkbookWriter(config, quiet_logger).write(path, _transaction_rows(index % 3))
+            return sorted(
+                (str(v.sqref), v.type, v.formula1, v.error)
+                for v in load_workbook(path)["Transacciones"].data_validations.dataValidation
+            )
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(generate, range(12)))
+
+        assert all(result == results[0] for result in results)
+        assert ("D2:D1048576", "list", "Proveedores", "Debe seleccionar un valor de la lista.") in results[0]
+
+class TestTemplateCache:
+    """Pruebas para la caché de plantillas"""
+
+    def test_reuses_bytes_without_rebuilding(self, tmp_path, quiet_logger, template_cache, monkeypatch):
+        """La segunda plantilla se copia de la caché sin volver a construir el libro"""
+        generator = ExcelTemplateGenerator(logger=quiet_logger)
+        builds = []
+        build = generator._build_template
+        monkeypatch.setattr(generator, "_build_template", lambda path: (builds.append(path), build(path)))
+
+        first, second = tmp_path / "uno.xlsx", tmp_path / "dos.xlsx"
+        generator.create_excel_template(str(first))
+        ExcelTemplateGenerator(logger=quiet_logger).create_excel_template(str(second))
+        generator.create_excel_template(str(second))
+
+        assert len(builds) == 1
+        assert first.read_bytes() == second.read_bytes()
+        assert load_workbook(second).sheetnames == ["Transacciones", "Instrucciones", "Listas"]
+
+    def test_config_change_invalidates(self, tmp_path, quiet_logger, template_cache):
+        """Cambiar la lista de proveedores produce otra plantilla"""
+        base = ExcelTemplateGenerator(logger=quiet_logger)
+        changed = ExcelTemplateGenerator(
+            logger=quiet_logger, config=ExcelConfigProvider(proveedores=["Acme", "Globex"])
+        )
+
+        assert base.config.content_hash() == ExcelConfigProvider().content_hash()
+        assert base.config.content_hash() != changed.config.content_hash()
+        assert base.template_bytes() != changed.template_bytes()
+        assert len(list(template_cache.directory.glob("*.xlsx"))) == 2
+
+    def test_disk_cache_survives_new_instance(self, tmp_path, quiet_logger, template_cache):
+        """Una caché nueva sobre la misma carpeta reutiliza la plantilla guardada"""
+        content = ExcelTemplateGenerator(logger=quiet_logger).template_bytes()
+        reopened = TemplateCache(template_cache.directory)
+
+        def fail(path):
+            raise AssertionError("no debería reconstruirse")
+
+        assert reopened.get(ExcelConfigProvider().content_hash(), fail) == content
+
+    def test_prune_skips_files_being_built(self, tmp_path):
+        """Los temporales de otra construcción no cuentan para el límite ni se borran"""
+        cache = TemplateCache(tmp_path / "plantillas", max_disk_entries=1)
+
+        def build(path):
+            assert path.name.endswith(".xlsx.tmp")
+            path.write_bytes(path.name.encode())
+
+        cache.get("aa", build)
+        other = cache.directory / "otra.xlsx.tmp"
+        other.write_bytes(b"en curso")
+        cache.get("bb", build)
+
+        assert sorted(path.name for path in cache.directory.iterdir()) == ["bb.xlsx", "otra.xlsx.tmp"]
+        cache.clear()
+        assert [path.name for path in cache.directory.iterdir()] == ["otra.xlsx.tmp"]
+
+    def test_prune_tolerates_concurrent_removal(self, tmp_path, monkeypatch):
+        """Una entrada borrada por otro proceso durante la poda se omite"""
+        cache = TemplateCache(tmp_path / "plantillas", max_disk_entries=1)
+        cache.get("aa", lambda path: path.write_bytes(b"a"))
+        stat = Path.stat
+
+        def vanished(path, *args, **kwargs):
+            if path.name == "aa.xlsx":
+                raise FileNotFoundError(path)
+            return stat(path, *args, **kwargs)
+        monkeypatch.setattr(Path, "stat", vanished)
+
+        assert cache.get("bb", lambda path: path.write_bytes(b"b")) == b"b"
+
+
+class TestColumnCache:
+    """Pruebas para la caché de columnas en disco"""
+
+    @pytest.fixture
+    def cache(self, tmp_path, quiet_logger):
+        return ColumnCache(tmp_path / "columnas", logger=quiet_logger)
+
+    def test_second_read_uses_memory_mapped_columns(self, workbook_factory, cache, quiet_logger, monkeypatch):
+        """La segunda lectura no abre el libro y los montos se leen del archivo mapeado"""
+        path = workbook_factory(_transaction_rows(25))
+        expected = TransactionReader(path, logger=quiet_logger).read()
+        first = pd.concat(cache.iter_chunks(path, chunk_size=10))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("no debería leerse el libro")
+        monkeypatch.setattr(TransactionReader, "iter_chunks", fail)
+        second = pd.concat(cache.iter_chunks(path, chunk_size=10))
+
+        pd.testing.assert_frame_equal(first, second)
+        pd.testing.assert_frame_equal(second, expected, check_dtype=False)
+        base = cache.open(path).frame()["Saldo"].to_numpy()
+        while not isinstance(base, np.memmap) and base is not None:
+            base = base.base
+        assert isinstance(base, np.memmap)
+
+    def test_raw_chunks_validate_like_the_workbook(self, workbook_factory, cache, quiet_logger):
+        """Las celdas que no se pudieron convertir siguen marcándose como inválidas"""
+        rows = _transaction_rows(12)
+        rows[3][4] = "abc"
+        rows[5][1] = "no es fecha"
+        path = workbook_factory(rows)
+        validator = TransactionValidator()
+
+        cached = validator.validate_chunks(cache.iter_chunks(path, chunk_size=5, raw=True))
+        direct = validator.validate_chunks(TransactionReader(path, chunk_size=5, logger=quiet_logger).iter_chunks(typed=False))
+
+        assert cached.counts == direct.counts == {"Entró": 1, "Salió": 0, "Saldo": 0, "Fecha": 1, "Proveedor/Cliente": 0}
+        assert list(cached.invalid_rows()) == list(direct.invalid_rows()) == [5, 7]
+
+    def test_invalidated_by_file_or_schema_change(self, workbook_factory, cache, tmp_path, quiet_logger):
+        """Cambiar el archivo o las columnas de la configuración produce otra entrada"""
+        path = workbook_factory(_transaction_rows(5))
+        key = cache.key(path)
+        cache.open(path)
+
+        wb = load_workbook(path)
+        wb["Transacciones"].append(_transaction_rows(6)[-1])
+        wb.save(path)
+        assert cache.key(path) != key
+        assert cache.open(path).rows == 6
+
+        config = ExcelConfigProvider()
+        config.column_types_transacciones["Saldo"] = "text"
+        other = ColumnCache(tmp_path / "columnas", config=config, logger=quiet_logger)
+        assert other.key(path) != cache.key(path)
+        assert other.load(path) is None
+
+
+class TestStatementReader:
+    """Pruebas para el lector de extractos en CSV y de ancho fijo"""
+
+    def test_csv_matches_workbook(self, workbook_factory, tmp_path, quiet_logger):
+        """Un CSV con los encabezados de la plantilla produce los mismos lotes que el libro"""
+        rows = _transaction_rows(23)
+        expected = TransactionReader(workbook_factory(rows), logger=quiet_logger).read()
+        path = tmp_path / "transacciones.csv"
+        frame = pd.DataFrame(rows, columns=ExcelConfigProvider().headers_transacciones)
+        frame["Fecha"] = frame["Fecha"].dt.strftime("%d/%m/%Y")
+        frame.to_csv(path, sep=";", index=False)
+
+        chunks = list(StatementReader(path, chunk_size=10, logger=quiet_logger).iter_chunks())
+
+        assert [len(chunk) for chunk in chunks] == [10, 10, 3]
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+    def test_bank_export_mapping(self, tmp_path, quiet_logger):
+        """Se omiten líneas iniciales y vacías, y el valor firmado se reparte entre Entró y Salió"""
+        path = tmp_path / "extracto.csv"
+        path.write_text(
+            "Banco de prueba\n"
+            "Fecha Mov;Descripción;Tercero;Valor;Saldo\n"
+            "01/02/2023;Consignación;Proveedor1;$ 1.234,50;1.234,50\n"
+            "\n"
+            "02/02/2023;Compra;Proveedor1;(200,00);1.034,50\n"
+            "31/02/2023;Ajuste;Proveedor1;abc;1.034,50\n",
+            encoding="utf-8"
+        )
+        statement_format = StatementFormat(
+            columns={"Fecha Mov": "Fecha", "Descripción": "Detalle", "Tercero": "Proveedor/Cliente", "Saldo": "Saldo"},
+            amount_column="Valor", decimal=",", thousands=".", date_format="%d/%m/%Y", skiprows=1
+        )
+        reader = StatementReader(path, statement_format=statement_format, logger=quiet_logger)
+
+        typed = reader.read()
+        assert list(typed.index) == [3, 5, 6]
+        assert typed["Entró"].tolist()[0] == 1234.5 and np.isnan(typed["Entró"].tolist()[1])
+        assert typed["Salió"].tolist()[1] == -200.0
+        assert typed["Fecha"].tolist()[0] == pd.Timestamp("2023-02-01")
+        validation = TransactionValidator().validate(reader.read(typed=False))
+        assert validation.counts["Entró"] == 1 and validation.counts["Fecha"] == 1
+        assert list(validation.invalid_rows()) == [6]
+
+    def test_fixed_width(self, tmp_path, quiet_logger):
+        """Los archivos de ancho fijo se leen por posición y sin encabezado"""
+        path = tmp_path / "extracto.txt"
+        path.write_text(
+            "T0001 01/02/2023 Proveedor1     100.00\n"
+            "T0002 02/02/2023 Proveedor1     -50.00\n"
+        )
+        statement_format = StatementFormat(
+            colspecs={"ID": (0, 5), "Fecha": (6, 16), "Proveedor/Cliente": (17, 27), "Valor": (27, 38)},
+            amount_column="Valor"
+        )
+
+        frame = StatementReader(path, statement_format=statement_format, logger=quiet_logger).read()
+        format_path = tmp_path / "formato.json"
+        format_path.write_text(
+            '{"colspecs": {"ID": [0, 5], "Fecha": [6, 16], "Proveedor/Cliente": [17, 27], "Valor": [27, 38]},'
+            ' "amount_column": "Valor"}'
+        )
+        assert StatementFormat.load(format_path) == statement_format
+        with pytest.raises(ValueError, match="desconocidos"):
+            StatementFormat.from_dict({"separador": ";"})
+
+        assert list(frame.index) == [1, 2]
+        assert frame["ID"].tolist() == ["T0001", "T0002"]
+        assert frame["Proveedor/Cliente"].tolist() == ["Proveedor1", "Proveedor1"]
+        assert frame["Entró"].tolist()[0] == 100.0 and frame["Salió"].tolist()[1] == -50.0
+        assert frame["Fecha"].dt.day.tolist() == [1, 2]
@@ -0,0 +1,129 @@
+"""
+Pruebas para la instrumentación de etapas y latencias HTTP
+"""
+import json
+
+import pytest
+
+from src.utils.instrumentation import HTTP_BUCKETS, Metrics, metrics, timed
+
+
+@pytest.fixture
+def instrumented():
+    """Habilita el registro global y lo deja limpio al terminar"""
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+    metrics.reset()
+
+
+class TestMetrics:
+    """Pruebas para Metrics"""
+
+    def test_disabled_records_nothing(self):
+        """Deshabilitada, las mediciones no crean objetos ni acumulan nada"""
+        registry = Metrics()
+        timer = registry.stage("read", rows=10)
+        assert timer is registry.stage("validate")
+        with timer:
+            timer.add(rows=5)
+        registry.record("read", 1.0, rows=10)
+        registry.observe_http("GET", 200, 0.1)
+        assert registry.snapshot() == {"stages": {}, "http": {}}
+
+    def test_stage_accumulates_time_rows_and_bytes(self):
+        """Las etapas acumulan llamadas, tiempo, filas y bytes"""
+        registry = Metrics()
+        registry.enable()
+        with registry.stage("read", rows=100) as timer:
+            timer.add(bytes=2048)
+        registry.record("read", 0.5, rows=50)
+
+        stats = registry.snapshot()["stages"]["read"]
+        assert stats["calls"] == 2
+        assert stats["rows"] == 150
+        assert stats["bytes"] == 2048
+        assert stats["seconds"] >= 0.5
+        assert stats["rows_per_second"] > 0
+
+    def test_http_histogram_and_prometheus_export(self, tmp_path):
+        """El histograma HTTP se exporta con buckets acumulados"""
+        registry = Metrics()
+        registry.enable()
+        for seconds in (0.001, 0.02, 0.02, 3.0, 100.0):
+            registry.observe_http("get", 200, seconds)
+        registry.observe_http("POST", "error", 0.5)
+
+        http = registry.snapshot()["http"]["GET 200"]
+        assert http["count"] == 5
+        assert http["buckets"][str(HTTP_BUCKETS[0])] == 1
+        assert http["buckets"]["0.025"] == 3
+        assert http["buckets"][str(HTTP_BUCKETS[-1])] == 4
+
+        text = registry.export(tmp_path / "metrics.prom").read_text()
+        assert 'autoconciliacion_http_request_duration_seconds_bucket{method="GET",status="200",le="+Inf"} 5' in text
+        assert 'autoconciliacion_http_request_duration_seconds_count{method="POST",status="error"} 1' in text
+
+        data = json.loads(registry.export(tmp_path / "metrics.json").read_text())
+        assert data["http"]["POST error"]["count"] == 1
+
+    def test_drain_and_merge(self):
+        """Lo acumulado en un proceso hijo se suma al registro principal"""
+        child, parent = Metrics(), Metrics()
+        child.enable()
+        parent.enable()
+        child.record("match", 0.25, rows=10)
+        child.observe_http("GET", 200, 0.01)
+        parent.record("match", 0.75, rows=30)
+
+        parent.merge(json.loads(json.dumps(child.drain())))
+
+        assert child.snapshot() == {"stages": {}, "http": {}}
+        snapshot = parent.snapshot()
+        assert snapshot["stages"]["match"]["rows"] == 40
+        assert snapshot["stages"]["match"]["calls"] == 2
+        assert snapshot["http"]["GET 200"]["count"] == 1
+
+    def test_periodic_summary_goes_to_log(self, recording_logger):
+        """Con summary_interval se publica el resumen como props del log"""
+        registry = Metrics()
+        registry.enable(summary_interval=1e-9, logger=recording_logger)
+        registry.record("validate", 0.1, rows=5)
+
+        message, props = recording_logger.records[-1][1:]
+        assert message == "Resumen de rendimiento"
+        assert props["stages"]["validate"]["rows"] == 5
+
+
+def test_timed_decorator(instrumented):
+    """El decorador mide cada llamada y respeta el estado global"""
+    @timed("work")
+    def work(value):
+        return value * 2
+
+    assert work(2) == 4
+    metrics.disable()
+    assert work(3) == 6
+    assert metrics.snapshot()["stages"]["work"]["calls"] == 1
+
+
+def test_reader_is_instrumented(instrumented, tmp_path, recording_logger):
+    """El lector de Excel registra filas y bytes leídos"""
+    from openpyxl import load_workbook
+    from src.excel.reader import TransactionReader
+    from src.excel.template.generate_template import ExcelTemplateGenerator
+
+    path = tmp_path / "transacciones.xlsx"
+    ExcelTemplateGenerator(logger=recording_logger).create_excel_template(str(path))
+    wb = load_workbook(path)
+    for i in range(1, 8):
+        wb["Transacciones"].append([f"T{i:04d}", None, "Detalle", "Proveedor1", 10, None, 10 * i, "Ventas", "No"])
+    wb.save(path)
+
+    chunks = list(TransactionReader(path, chunk_size=3, logger=recording_logger).iter_chunks())
+
+    stats = metrics.snapshot()["stages"]["excel.read"]
+    assert stats["calls"] == len(chunks) == 3
+    assert stats["rows"] == 7
+    assert stats["bytes"] == path.stat().st_size
@@ -0,0 +1,112 @@
+"""
+Pruebas para el índice y las consultas sobre los logs JSON
+"""
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+
+from src.log_query import LogQuery, main, parse_time
+
+
+def _entry(i, level="INFO", logger="siigo", **props):
+    props = {"transaction_id": f"T{i:04d}", **props}
+    return {
+        "message": f"Registro {i}",
+        "props": props,
+        "timestamp": f"2024-01-{1 + i % 28:02d}T10:00:00.000000",
+        "level": level,
+        "module": "api",
+        "logger": logger,
+        **props,
+    }
+
+
+def _write(path, entries, compress=False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+    if compress:
+        with gzip.open(path, "wb") as stream:
+            stream.write(data)
+    else:
+        path.write_bytes(data)
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    """Logs con un archivo rotado comprimido y uno actual"""
+    archived = [_entry(i, level="ERROR" if i % 10 == 0 else "INFO") for i in range(200)]
+    current = [_entry(i, level="ERROR" if i % 10 == 0 else "INFO") for i in range(200, 300)]
+    _write(tmp_path / "siigo" / "siigo.20240101-000000.log.gz", archived, compress=True)
+    _write(tmp_path / "siigo" / "siigo.log", current)
+    _write(tmp_path / "app" / "app.log", [_entry(0, logger="app", file="a.xlsx")])
+    return tmp_path
+
+
+class TestLogQuery:
+    """Pruebas para LogQuery"""
+
+    def test_finds_records_in_plain_and_compressed_files(self, log_dir):
+        """Encuentra registros por nivel y clave indexada en archivos .log y .log.gz"""
+        query = LogQuery(log_dir)
+
+        assert [e["message"] for e in query.search(level="ERROR", props={"transaction_id": "T0010"})] == ["Registro 10"]
+        assert [e["message"] for e in query.search(level="ERROR", props={"transaction_id": "T0250"})] == ["Registro 250"]
+        assert list(query.search(level="INFO", props={"transaction_id": "T0010"})) == []
+        assert len(list(query.search(level="error", logger="siigo"))) == 30
+
+    def test_time_range_and_unindexed_props(self, log_dir):
+        """Filtra por rango de timestamps y por claves de props no indexadas"""
+        query = LogQuery(log_dir)
+        found = list(query.search(since="2024-01-05", until="2024-01-06", logger="siigo"))
+        assert found and all(e["timestamp"].startswith("2024-01-05") for e in found)
+
+        assert [e["logger"] for e in query.search(props={"module_name": "x"})] == []
+        assert [e["logger"] for e in LogQuery(log_dir, keys=()).search(props={"file": "a.xlsx"})] == ["app"]
+
+    def test_incremental_update_of_current_file(self, log_dir):
+        """Solo se indexan los registros nuevos del archivo actual"""
+        query = LogQuery(log_dir)
+        assert query.update() == 301
+        assert query.update() == 0
+
+        with open(log_dir / "siigo" / "siigo.log", "a") as stream:
+            stream.write(json.dumps(_entry(999, level="ERROR")) + "\n")
+        assert query.update() == 1
+        assert [e["message"] for e in query.search(props={"transaction_id": "T0999"})] == ["Registro 999"]
+
+    def test_reindexes_replaced_file_and_prunes_stale_indexes(self, log_dir):
+        """Un archivo reemplazado por la rotación se reindexa y los índices huérfanos se eliminan"""
+        query = LogQuery(log_dir)
+        query.update()
+
+        (log_dir / "siigo" / "siigo.20240101-000000.log.gz").unlink()
+        _write(log_dir / "siigo" / "siigo.log", [_entry(5000, level="WARNING")])
+        assert query.update() == 1
+        assert len(list(query.search(logger="siigo", update=False))) == 1
+        assert len(list((log_dir / ".index").rglob("*.sqlite3"))) == 2
+
+    def test_changed_keys_rebuild_the_index(self, log_dir):
+        """Un índice creado con otras claves se reconstruye o se filtra al leer"""
+        LogQuery(log_dir, keys=("transaction_id",)).update()
+
+        query = LogQuery(log_dir, keys=("file",))
+        assert [e["logger"] for e in query.search(props={"file": "a.xlsx"}, update=False)] == ["app"]
+        assert query.update() == 301
+        assert [e["logger"] for e in query.search(props={"file": "a.xlsx"})] == ["app"]
+        assert query.update() == 0
+
+    def test_cli(self, log_dir, capsys):
+        """La línea de comandos imprime un registro JSON por línea"""
+        assert main(["--log-dir", str(log_dir), "--level", "ERROR", "--prop", "transaction_id=T0020"]) == 0
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line)["message"] for line in lines] == ["Registro 20"]
+
+
+def test_parse_time():
+    """Acepta fechas ISO y relativas"""
+    now = datetime(2024, 1, 8, 12, 0)
+    assert parse_time("7d", now=now) == "2024-01-01T12:00:00"
+    assert parse_time("30m", now=now) == "2024-01-08T11:30:00"
+    assert parse_time("2024-01-31") == "2024-01-31T00:00:00"
@@ -1,15 +1,26 @@
 """
 Tests para el sistema de logging
 """
+import dataclasses
 import json
 import logging
 import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
 from pathlib import Path
 import pytest
 import configparser
+import gzip
 from src.config.settings import settings
 from src.config.formatters.json_formatter import JsonLogFormatter
+from src.config.formatters.fast_json_formatter import FastJsonLogFormatter
 from src.config.loggers.base_logger import BaseLogger
+from src.config.handlers.compressing_handler import CompressingRotatingFileHandler
+from src.config.handlers import queue_backend
+from src.config.handlers.queue_backend import AsyncLogBackend, BoundedQueueHandler, get_async_backend
 from src.config.loggers.logger_facade import LoggerFactory, LoggerFacade, log
 
 from src.config.loggers.logger_facade import LoggerFacade
@@ -96,6 +107,50 @@ class TestJsonFormatter:
         assert log_entry["message"] == "Test message"
         assert log_entry["level"] == "INFO"
 
+class TestFastJsonFormatter:
+    """Pruebas para el formateador JSON de alto rendimiento"""
+
+    @staticmethod
+    def _record(**extra):
+        record = logging.LogRecord("excel", logging.INFO, "reader.py", 10, "Fila %s procesada", (7,), None)
+        record.__dict__.update(extra)
+        return record
+
+    @pytest.mark.parametrize("extra", [
+        {},
+        {"props": {"row": 7, "file": "transacciones.xlsx", "amount": 1.5, "proveedor": "Compañía Ñandú"}},
+        {"props": {}},
+        {"props": {"level": "custom", "row": 1}},
+        {"props": {"row": 1}, "request_id": "abc"},
+    ])
+    def test_matches_json_formatter(self, extra):
+        """Produce los mismos campos y valores que JsonLogFormatter"""
+        expected = json.loads(JsonLogFormatter().format(self._record(**extra)))
+        actual = json.loads(FastJsonLogFormatter().format(self._record(**extra)))
+
+        # El timestamp depende del momento del formateo; se compara aparte
+        expected.pop("timestamp")
+        assert actual.pop("timestamp").startswith(
+            datetime.utcfromtimestamp(self._record().created).strftime("%Y-%m-%dT%H:%M")
+        )
+        assert actual == expected
+
+    def test_timestamp_from_record_created(self):
+        """El timestamp se deriva de record.created con microsegundos"""
+        formatter = FastJsonLogFormatter()
+        assert formatter.format_timestamp(0.25) == "1970-01-01T00:00:00.250000"
+        assert formatter.format_timestamp(86400.000001) == "1970-01-02T00:00:00.000001"
+
+    def test_exception_is_serialized(self):
+        """Incluye la traza en exc_info"""
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = logging.LogRecord("error", logging.ERROR, "x.py", 1, "falló", (), sys.exc_info())
+        entry = json.loads(FastJsonLogFormatter().format(record))
+        assert "ValueError: boom" in entry["exc_info"]
+
+
 class TestBaseLogger:
     """Pruebas para el logger base"""
     
@@ -149,6 +204,50 @@ class TestLoggerFactory:
         
         assert app_logger is not error_logger
 
+    @pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="Requiere /proc/self/fd")
+    def test_repeated_lookups_do_not_leak_file_descriptors(self, temp_log_dir):
+        """Consultar el mismo logger muchas veces no abre archivos nuevos"""
+        factory = LoggerFactory()
+        logger = factory.get_logger("app")
+        handlers = list(logger.logger.handlers)
+        open_fds = len(os.listdir("/proc/self/fd"))
+
+        for _ in range(10_000):
+            assert factory.get_logger("app") is logger
+
+        assert len(os.listdir("/proc/self/fd")) == open_fds
+        assert logger.logger.handlers == handlers
+
+    def test_reconfigures_only_when_settings_change(self, temp_log_dir, monkeypatch):
+        """Los handlers se reconstruyen y los anteriores se cierran al cambiar la configuración"""
+        factory = LoggerFactory()
+        logger = factory.get_logger("app")
+        old_file_handler = logger.logger.handlers[0]
+
+        monkeypatch.setattr(settings.logging, "rotation_size", "2 MB")
+        assert factory.get_logger("app") is logger
+
+        new_file_handler = logger.logger.handlers[0]
+        assert new_file_handler is not old_file_handler
+        assert new_file_handler.max_bytes == 2 * 1024 * 1024
+        assert old_file_handler.stream is None
+
+    def test_equal_settings_keep_handlers(self, temp_log_dir, monkeypatch):
+        """Una configuración con los mismos valores, aunque sea otro objeto, no reconstruye los handlers"""
+        factory = LoggerFactory()
+        logger = factory.get_logger("excel")
+        handlers = list(logger.logger.handlers)
+        builds = []
+        monkeypatch.setattr(BaseLogger, "reconfigure", lambda self, log_file: builds.append(log_file))
+
+        for _ in range(1000):
+            assert factory.get_logger("excel") is logger
+        monkeypatch.setattr(settings, "logging", dataclasses.replace(settings.logging))
+        monkeypatch.setattr(settings.logging, "backup_count", settings.logging.backup_count)
+
+        assert factory.get_logger("excel") is logger
+        assert builds == [] and logger.logger.handlers == handlers
+
 class TestLoggerFacade:
     """Pruebas para la fachada del logger"""
     
@@ -184,6 +283,23 @@ class TestConfiguration:
         assert settings.logging.rotation_size == "1 MB"
         assert settings.logging.backup_count == 5
 
+    def test_import_has_no_side_effects(self):
+        """Importar src.config no lee la configuración ni crea loggers"""
+        code = (
+            "import logging, sys\n"
+            "import src.config\n"
+            "from src.config.settings import get_settings\n"
+            "assert get_settings.cache_info().currsize == 0\n"
+            "assert 'coloredlogs' not in sys.modules\n"
+            "assert not logging.getLogger('app').handlers\n"
+            "src.config.log.app\n"
+            "assert get_settings.cache_info().currsize == 1\n"
+            "assert logging.getLogger('app').handlers\n"
+        )
+        root = Path(__file__).resolve().parent.parent
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        assert result.returncode == 0, result.stderr
+
 def test_integration_all_log_levels(temp_log_dir):
     """Prueba de integración para todos los niveles de log"""
     test_messages = {
@@ -204,4 +320,188 @@ def test_integration_all_log_levels(temp_log_dir):
     assert len(logs) == len(test_messages)
     for log_entry, (level, message) in zip(logs, test_messages.items()):
         assert log_entry["message"] == message
-        assert log_entry["props"]["test_key"] == level
\ No newline at end of file
+        assert log_entry["props"]["test_key"] == level
+
+class TestCompressingRotatingFileHandler:
+    """Pruebas para la rotación con compresión en segundo plano"""
+
+    @staticmethod
+    def _emit(handler, count, message="x" * 100):
+        logger = logging.getLogger(f"rotation-{id(handler)}")
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        try:
+            for i in range(count):
+                logger.info(f"{i} {message}")
+        finally:
+            logger.removeHandler(handler)
+
+    def test_rotates_by_size_and_compresses(self, tmp_path):
+        """Los archivos rotados quedan comprimidos con todo su contenido"""
+        handler = CompressingRotatingFileHandler(str(tmp_path / "app.log"), max_bytes=1000, compression="gzip")
+        self._emit(handler, 50)
+        handler.wait()
+
+        archives = handler.archives()
+        handler.close()
+        assert archives and all(path.suffix == ".gz" for path in archives)
+        lines = [line for path in archives for line in gzip.open(path, "rt").read().splitlines()]
+        lines += (tmp_path / "app.log").read_text().splitlines()
+        assert sorted(int(line.split()[0]) for line in lines) == list(range(50))
+
+    def test_retention_by_count_and_total_size(self, tmp_path):
+        """Se conservan solo los archivos permitidos por backup_count y max_total_size"""
+        handler = CompressingRotatingFileHandler(
+            str(tmp_path / "app.log"), max_bytes=500, backup_count=3, compression="none"
+        )
+        self._emit(handler, 100)
+        handler.wait()
+        assert len(handler.archives()) == 3
+
+        handler.max_total_size = 1000
+        handler.apply_retention()
+        archives = handler.archives()
+        handler.close()
+        assert sum(path.stat().st_size for path in archives) <= 1000
+        assert archives == sorted(archives)
+
+    def test_rotates_by_time(self, tmp_path):
+        """Al pasar el instante de rotación se rota aunque el archivo sea pequeño"""
+        handler = CompressingRotatingFileHandler(str(tmp_path / "app.log"), when="H")
+        assert handler.rollover_at > time.time()
+        self._emit(handler, 1)
+
+        handler.rollover_at = time.time() - 1
+        self._emit(handler, 1)
+        handler.wait()
+        archives = handler.archives()
+        handler.close()
+        assert len(archives) == 1
+        assert handler.rollover_at > time.time()
+
+    def test_rejects_unknown_options(self, tmp_path):
+        """Valores de configuración inválidos fallan al crear el handler"""
+        with pytest.raises(ValueError):
+            CompressingRotatingFileHandler(str(tmp_path / "app.log"), compression="rar")
+        with pytest.raises(ValueError):
+            CompressingRotatingFileHandler(str(tmp_path / "app.log"), when="fortnight")
+
+
+class TestAsyncLogBackend:
+    """Pruebas para el backend de logging asíncrono"""
+
+    class SlowHandler(logging.Handler):
+        """Handler que se bloquea hasta que se le permita escribir"""
+
+        def __init__(self):
+            super().__init__()
+            self.gate = threading.Event()
+            self.records = []
+            self.threads = set()
+
+        def emit(self, record):
+            self.gate.wait(5)
+            self.records.append(record)
+            self.threads.add(threading.get_ident())
+
+    def _logger(self, name, handler):
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        for existing in logger.handlers[:]:
+            logger.removeHandler(existing)
+        logger.addHandler(handler)
+        return logger
+
+    def test_records_are_written_by_listener_thread(self):
+        """Verifica que el formateo y la escritura ocurran fuera del hilo que registra"""
+        handler = self.SlowHandler()
+        handler.gate.set()
+        backend = AsyncLogBackend(queue_size=100)
+        logger = self._logger("async_test_thread", handler)
+        backend.attach(logger)
+
+        logger.info("mensaje %s", 1, extra={"props": {"key": "value"}})
+        backend.stop()
+
+        assert [r.getMessage() for r in handler.records] == ["mensaje 1"]
+        assert threading.get_ident() not in handler.threads
+        assert handler.records[0].props == {"key": "value"}
+
+    def test_drop_policy_keeps_warnings(self):
+        """Verifica que con la cola llena solo se descarten registros de baja severidad"""
+        handler = self.SlowHandler()
+        backend = AsyncLogBackend(queue_size=2, policy="drop")
+        logger = self._logger("async_test_drop", handler)
+        backend.attach(logger)
+
+        for i in range(10):
+            logger.debug(f"debug {i}")
+        releaser = threading.Timer(0.2, handler.gate.set)
+        releaser.start()
+        logger.warning("importante")
+        backend.stop()
+
+        messages = [r.getMessage() for r in handler.records]
+        assert "importante" in messages
+        assert backend.dropped >= 7
+        assert len(messages) + backend.dropped == 11
+
+    def test_base_logger_async_mode(self, temp_log_dir, monkeypatch):
+        """Verifica que BaseLogger use el backend cuando está habilitado"""
+        backend = AsyncLogBackend(queue_size=100)
+        monkeypatch.setattr(settings.logging, "async_enabled", True)
+        monkeypatch.setattr("src.config.loggers.base_logger.get_async_backend", lambda *args: backend)
+        logger = BaseLogger("async_base", str(temp_log_dir / "async.log"))
+
+        logger.info("asíncrono", key="value")
+        backend.flush()
+
+        assert [type(h) for h in logger.logger.handlers] == [BoundedQueueHandler]
+        with open(temp_log_dir / "async.log") as f:
+            entry = json.loads(f.readline())
+        assert entry["message"] == "asíncrono"
+        assert entry["props"]["key"] == "value"
+        backend.stop()
+
+    def test_base_logger_detaches_when_async_disabled(self, temp_log_dir, monkeypatch):
+        """Al desactivar el modo asíncrono el logger deja el backend y se cierran sus handlers"""
+        backend = AsyncLogBackend(queue_size=100)
+        monkeypatch.setattr(settings.logging, "async_enabled", True)
+        monkeypatch.setattr("src.config.loggers.base_logger.get_async_backend", lambda *args: backend)
+        monkeypatch.setattr("src.config.loggers.base_logger.current_async_backend", lambda: backend)
+        BaseLogger("async_detach", str(temp_log_dir / "async.log")).info("antes")
+        routed = backend.routes["async_detach"]
+
+        monkeypatch.setattr(settings.logging, "async_enabled", False)
+        logger = BaseLogger("async_detach", str(temp_log_dir / "async.log"))
+        logger.info("después")
+
+        assert "async_detach" not in backend.routes
+        files = [handler for handler in routed if isinstance(handler, logging.FileHandler)]
+        assert files and all(handler.stream is None for handler in files)
+        assert not any(isinstance(h, BoundedQueueHandler) for h in logger.logger.handlers)
+        with open(temp_log_dir / "async.log") as f:
+            assert [json.loads(line)["message"] for line in f] == ["antes", "después"]
+        backend.stop()
+
+    def test_backend_is_recreated_when_settings_change(self, monkeypatch):
+        """Cambiar la capacidad o la política crea otro backend y le pasa los loggers"""
+        monkeypatch.setattr(queue_backend, "_backend", None)
+        handler = self.SlowHandler()
+        handler.gate.set()
+        logger = self._logger("async_test_resize", handler)
+        first = get_async_backend(100, "block")
+        first.attach(logger)
+        logger.info("uno")
+
+        assert get_async_backend(100, "block") is first
+        second = get_async_backend(5, "drop")
+        logger.info("dos")
+        second.stop()
+
+        assert second is not first and second.queue.maxsize == 5 and second.policy == "drop"
+        assert first._listener is None and "async_test_resize" not in first.routes
+        assert second.routes["async_test_resize"] == [handler]
+        assert [r.getMessage() for r in handler.records] == ["uno", "dos"]
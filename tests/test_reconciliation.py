@@ -0,0 +1,234 @@
+"""
+Tests para la conciliación entre transacciones y movimientos de SIIGO
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.reconciliation.matcher import MATCH_EXACT, MATCH_FUZZY, MATCH_NONE, ReconciliationMatcher
+from src.reconciliation.state import ReconciliationState, row_fingerprints
+
+
+def _transactions(rows):
+    """Construye transacciones tipadas a partir de (fecha, monto, tercero)"""
+    return pd.DataFrame(
+        {
+            "Fecha": pd.to_datetime([row[0] for row in rows]),
+            "Entró": [row[1] if row[1] is not None and row[1] >= 0 else np.nan for row in rows],
+            "Salió": [row[1] if row[1] is not None and row[1] < 0 else np.nan for row in rows],
+            "Proveedor/Cliente": [row[2] for row in rows],
+        },
+        index=pd.Index(range(2, 2 + len(rows)), name="fila")
+    )
+
+
+@pytest.fixture
+def movements():
+    """Movimientos de SIIGO de ejemplo"""
+    return pd.DataFrame({
+        "id": ["M1", "M2", "M3", "M4", "M5"],
+        "date": pd.to_datetime(["2023-01-05", "2023-01-05", "2023-01-10", "2023-01-20", None]),
+        "amount": [100.0, 100.0, -50.25, 999.0, 10.0],
+        "counterparty": ["Proveedor1", "Proveedor1", "Cliente A", "Otro", "Proveedor1"],
+    })
+
+
+class TestReconciliationMatcher:
+    """Pruebas para el emparejador indexado"""
+
+    def test_exact_matches_are_one_to_one(self, movements):
+        """Verifica que los duplicados exactos se emparejen uno a uno"""
+        transactions = _transactions([
+            (datetime(2023, 1, 5), 100.0, "proveedor1 "),
+            (datetime(2023, 1, 5), 100.0, "Proveedor1"),
+            (datetime(2023, 1, 5), 100.0, "Proveedor1"),
+        ])
+
+        matches = ReconciliationMatcher(movements, date_window=0).match(transactions)
+
+        assert list(matches["match_type"]) == [MATCH_EXACT, MATCH_EXACT, MATCH_NONE]
+        assert set(matches["movement_id"][:2]) == {"M1", "M2"}
+        assert list(matches["confidence"]) == [1.0, 1.0, 0.0]
+
+    def test_fuzzy_match_within_window_and_tolerance(self, movements):
+        """Verifica las coincidencias aproximadas por fecha y monto"""
+        transactions = _transactions([
+            (datetime(2023, 1, 12), -50.0, "Cliente A"),
+            (datetime(2023, 1, 30), 999.0, "Otro"),
+            (datetime(2023, 1, 21), 999.0, "Otro"),
+        ])
+
+        matches = ReconciliationMatcher(movements, date_window=3, amount_tolerance=0.5).match(transactions)
+
+        assert list(matches["match_type"]) == [MATCH_FUZZY, MATCH_NONE, MATCH_FUZZY]
+        assert list(matches["movement_id"].iloc[[0, 2]]) == ["M3", "M4"]
+        assert pd.isna(matches["movement_id"].iloc[1])
+        assert 0.5 < matches["confidence"].iloc[0] < matches["confidence"].iloc[2] < 1.0
+
+    def test_fuzzy_match_with_common_amount(self):
+        """Un monto muy repetido no deja fuera a los movimientos de la fecha buscada"""
+        movements = pd.DataFrame({
+            "id": [f"m{i}" for i in range(1000)],
+            "date": pd.Timestamp("2023-01-01") + pd.to_timedelta(np.arange(1000), unit="D"),
+            "amount": 100.0,
+            "counterparty": "Proveedor1",
+        })
+        matcher = ReconciliationMatcher(movements, date_window=3, amount_tolerance=0.5, max_candidates=16)
+        day = pd.Timestamp("2023-01-01") + pd.Timedelta(days=900)
+
+        matches = matcher.match(_transactions([(day, 100.0, "Otro"), (day, 100.3, "Otro")]))
+
+        assert list(matches["match_type"]) == [MATCH_FUZZY, MATCH_FUZZY]
+        assert list(matches["movement_id"]) == ["m900", "m899"]
+
+    def test_skips_invalid_rows(self, movements):
+        """Verifica que las filas sin fecha o monto no se emparejen"""
+        transactions = _transactions([(None, 10.0, "Proveedor1"), (datetime(2023, 1, 5), None, "Proveedor1")])
+
+        matches = ReconciliationMatcher(movements, date_window=30, amount_tolerance=1000).match(transactions)
+
+        assert list(matches["match_type"]) == [MATCH_NONE, MATCH_NONE]
+
+    def test_summary_and_conciliado(self, movements):
+        """Verifica el resumen y la columna "Conciliado en SIIGO" """
+        transactions = _transactions([
+            (datetime(2023, 1, 5), 100.0, "Proveedor1"),
+            (datetime(2023, 1, 10), -50.24, "Cliente A"),
+            (datetime(2023, 3, 1), 1.0, "Nadie"),
+        ])
+        matcher = ReconciliationMatcher(movements, amount_tolerance=0.01)
+        matches = matcher.match(transactions)
+
+        assert matcher.summarize(matches) == {MATCH_EXACT: 1, MATCH_FUZZY: 1, MATCH_NONE: 1}
+        assert list(matcher.conciliado(matches)) == ["Sí", "Sí", "No"]
+
+    def test_large_random_reconciliation(self):
+        """Verifica que todas las transacciones perturbadas encuentren su movimiento"""
+        rng = np.random.default_rng(7)
+        size = 20000
+        dates = pd.Timestamp(2023, 1, 1) + pd.to_timedelta(rng.integers(0, 365, size), unit="D")
+        amounts = np.round(rng.normal(0, 1000, size), 2)
+        parties = np.array([f"P{i}" for i in range(50)])[rng.integers(0, 50, size)]
+        movements = pd.DataFrame({"id": np.arange(size), "date": dates, "amount": amounts, "counterparty": parties})
+        transactions = pd.DataFrame({
+            "Fecha": dates + pd.to_timedelta(rng.integers(0, 2, size), unit="D"),
+            "Entró": np.where(amounts >= 0, amounts, np.nan),
+            "Salió": np.where(amounts < 0, amounts, np.nan),
+            "Proveedor/Cliente": parties,
+        })
+
+        matches = ReconciliationMatcher(movements, date_window=2, amount_tolerance=0.01).match(transactions)
+
+        assert (matches["match_type"] != MATCH_NONE).all()
+        assert matches["movement_id"].is_unique
+
+    def test_session_keeps_one_to_one_across_chunks(self, movements):
+        """Verifica que un movimiento no se asigne dos veces entre lotes"""
+        matcher = ReconciliationMatcher(movements, date_window=0)
+        used = matcher.new_session()
+        first = matcher.match(_transactions([(datetime(2023, 1, 5), 100.0, "Proveedor1")]), used)
+        second = matcher.match(_transactions([(datetime(2023, 1, 5), 100.0, "Proveedor1")] * 2), used)
+
+        assert first["movement_id"].iloc[0] == "M1"
+        assert list(second["match_type"]) == [MATCH_EXACT, MATCH_NONE]
+        assert second["movement_id"].iloc[0] == "M2"
+
+
+def test_reserve_excludes_previous_assignments(movements):
+    """Un movimiento reservado no se ofrece a otra transacción hasta liberarlo"""
+    matcher = ReconciliationMatcher(movements)
+    used = matcher.new_session()
+
+    assert matcher.reserve(used, ["M1", "no existe"]) == 1
+    assert matcher.match(_transactions([("2023-01-05", 100.0, "Proveedor1")]), used)["movement_id"].tolist() == ["M2"]
+    matcher.reserve(used, ["M1", "M5"], reserved=False)
+    assert not used[0] and used[4]
+    assert matcher.match(_transactions([("2023-01-05", 100.0, "Proveedor1")]), used)["movement_id"].tolist() == ["M1"]
+
+    used = matcher.new_session()
+    assert matcher.claim(used, ["M3", "no existe", "M3", "M5"]).tolist() == [True, False, False, False]
+    assert used[2]
+
+
+class TestReconciliationState:
+    """Pruebas para el estado de las filas entre ejecuciones"""
+
+    @pytest.fixture
+    def frame(self):
+        frame = _transactions([
+            ("2023-01-05", 100.0, "Proveedor1"),
+            ("2023-01-10", -50.25, "Cliente A"),
+            ("2023-01-20", 5.0, "Otro"),
+        ])
+        frame.insert(0, "ID", ["T0001", "T0002", "T0003"])
+        frame["Conciliado en SIIGO"] = ["No", "No", "Sí"]
+        return frame
+
+    def _run(self, state, frame, matches, config_hash="config"):
+        session = state.session("cuenta.xlsx", config_hash)
+        delta = session.diff(frame)
+        session.record(frame, delta, np.array([0, 4, 0]), matches)
+        session.commit()
+        return delta
+
+    def test_only_changed_or_unreconciled_rows_are_pending(self, tmp_path, frame):
+        """Las filas sin cambios ya conciliadas se omiten; las demás se revisan de nuevo"""
+        state = ReconciliationState(tmp_path / "estado.sqlite3")
+        matches = pd.DataFrame(
+            {"match_type": [MATCH_EXACT, MATCH_NONE, MATCH_NONE], "movement_id": ["M1", None, None],
+             "confidence": [1.0, 0.0, 0.0]},
+            index=frame.index
+        )
+        first = self._run(state, frame, matches)
+        assert first.changed.all() and state.rows("cuenta.xlsx") == 3
+
+        edited = frame.copy()
+        edited.loc[3, "Proveedor/Cliente"] = "Cliente B"
+        session = state.session("cuenta.xlsx", "config")
+        delta = session.diff(edited)
+
+        assert delta.changed.tolist() == [False, True, False]
+        # T0001 tiene coincidencia y T0003 está marcada como conciliada en la hoja
+        assert delta.pending.tolist() == [False, True, False]
+        assert delta.skipped == 2
+        assert delta.errors.tolist() == [0, 4, 0]
+        assert delta.movement_id[0] == "M1" and pd.isna(delta.movement_id[1:]).all()
+
+    def test_removed_rows_and_config_changes(self, tmp_path, frame):
+        """Las filas que desaparecen se borran y un cambio de configuración descarta el estado"""
+        state = ReconciliationState(tmp_path / "estado.sqlite3")
+        self._run(state, frame, None)
+
+        session = state.session("cuenta.xlsx", "config")
+        shorter = frame.iloc[:2]
+        session.record(shorter, session.diff(shorter), np.zeros(2), None)
+        session.commit()
+        assert state.rows("cuenta.xlsx") == 2
+
+        assert state.session("cuenta.xlsx", "otra").diff(frame).changed.all()
+        assert state.rows("cuenta.xlsx") == 0
+
+    def test_fingerprint_ignores_conciliado_column(self, frame):
+        """Marcar una fila como conciliada no la convierte en una fila modificada"""
+        marked = frame.copy()
+        marked["Conciliado en SIIGO"] = "Sí"
+        np.testing.assert_array_equal(row_fingerprints(frame), row_fingerprints(marked))
+        marked.loc[2, "Entró"] = 100.01
+        assert (row_fingerprints(frame) != row_fingerprints(marked)).tolist() == [True, False, False]
+
+    def test_fingerprint_keeps_unparsed_text(self, frame):
+        """Un texto que no se pudo convertir no tiene la misma huella que una celda vacía"""
+        raw = frame.astype("object")
+        typed = frame.copy()
+        typed.loc[4, "Entró"] = np.nan
+        blank, invalid, other = raw.copy(), raw.copy(), raw.copy()
+        blank.loc[4, "Entró"] = None
+        invalid.loc[4, "Entró"] = "abc"
+        other.loc[4, "Entró"] = "abd"
+
+        hashes = [row_fingerprints(typed, chunk) for chunk in (blank, invalid, other)]
+        assert hashes[0][2] != hashes[1][2] != hashes[2][2] != hashes[0][2]
+        np.testing.assert_array_equal(hashes[0][:2], hashes[1][:2])
+        np.testing.assert_array_equal(hashes[0], row_fingerprints(typed))
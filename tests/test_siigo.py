@@ -0,0 +1,543 @@
+"""
+Tests para el cliente de la API de SIIGO
+"""
+import json
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.config.settings import SiigoConfig
+from src.siigo.api import AsyncBulkPoster, SiigoAPIError, SiigoClient
+from src.siigo.master_data import MasterDataCache, SiigoMasterData, load_counterparty_names
+from src.siigo.rate_limiter import AdaptiveRateLimiter, backoff_delay, parse_retry_after
+from src.utils.instrumentation import metrics
+
+
+class StubSiigoHandler(BaseHTTPRequestHandler):
+    """Servidor falso de SIIGO que registra las peticiones recibidas"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        if isinstance(body, bytes):
+            data = body
+        else:
+            data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _record(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length)) if length else None
+        state = self.server.state
+        with state["lock"]:
+            state["requests"].append((self.command, self.path, dict(self.headers), body))
+            state["ports"].add(self.client_address[1])
+        return body
+
+    def do_POST(self):
+        body = self._record()
+        state = self.server.state
+        if self.path == "/auth":
+            state["tokens"] += 1
+            self._send(200, {"access_token": f"token-{state['tokens']}", "expires_in": state["expires_in"]})
+            return
+        handler = state["routes"].get(("POST", self.path.split("?")[0]))
+        if handler:
+            self._send(*handler(self, body))
+        else:
+            self._send(201, {"id": len(state["requests"]), "echo": body})
+
+    def do_GET(self):
+        self._record()
+        state = self.server.state
+        handler = state["routes"].get(("GET", self.path.split("?")[0]))
+        if handler:
+            self._send(*handler(self, None))
+        elif self.headers.get("Authorization") == f"Bearer token-{state['tokens']}":
+            self._send(200, {"path": self.path})
+        else:
+            self._send(401, {"error": "invalid token"})
+
+
+@pytest.fixture
+def stub_server():
+    """Levanta un servidor HTTP local que simula la API de SIIGO"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSiigoHandler)
+    server.daemon_threads = True
+    server.state = {
+        "lock": threading.Lock(),
+        "requests": [],
+        "ports": set(),
+        "tokens": 0,
+        "expires_in": 3600,
+        "routes": {}
+    }
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def siigo_config(stub_server):
+    """Configuración de SIIGO que apunta al servidor local"""
+    host, port = stub_server.server_address
+    return SiigoConfig(
+        api_url=f"http://{host}:{port}/v1",
+        api_key="key",
+        tenant_id="tenant",
+        auth_url=f"http://{host}:{port}/auth",
+        pool_maxsize=4,
+        timeout=5,
+        rate_limit=0,
+        backoff_base=0.01,
+        backoff_max=0.05
+    )
+
+
+@pytest.fixture
+def client(siigo_config, recording_logger):
+    """Cliente de SIIGO contra el servidor local"""
+    with SiigoClient(siigo_config, logger=recording_logger) as siigo_client:
+        yield siigo_client
+
+
+class TestSiigoClient:
+    """Pruebas para el cliente síncrono"""
+
+    def test_reuses_token_and_connection(self, client, stub_server):
+        """Verifica que el token y la conexión se reutilicen entre llamadas"""
+        for i in range(20):
+            assert client.get(f"/customers/{i}") == {"path": f"/v1/customers/{i}"}
+
+        assert stub_server.state["tokens"] == 1
+        assert len(stub_server.state["ports"]) == 1
+
+    def test_sends_credentials(self, client, stub_server):
+        """Verifica las credenciales enviadas en la autenticación"""
+        client.get("/customers")
+
+        method, path, _, body = stub_server.state["requests"][0]
+        assert (method, path) == ("POST", "/auth")
+        assert body == {"username": "tenant", "access_key": "key"}
+
+    def test_refreshes_expired_token(self, client, stub_server):
+        """Verifica que se solicite un token nuevo cuando el actual vence"""
+        stub_server.state["expires_in"] = 30
+        client.get("/customers")
+        client.get("/customers")
+
+        assert stub_server.state["tokens"] == 2
+
+    def test_retries_once_on_401(self, client, stub_server):
+        """Verifica que un 401 fuerce la renovación del token"""
+        client.authenticate()
+        stub_server.state["tokens"] += 1
+
+        assert client.get("/customers") == {"path": "/v1/customers"}
+        assert stub_server.state["tokens"] == 3
+
+    def test_raises_on_error(self, client, stub_server):
+        """Verifica que los errores de la API se conviertan en SiigoAPIError"""
+        stub_server.state["routes"][("GET", "/v1/fail")] = lambda handler, body: (422, {"Errors": ["bad"]})
+
+        with pytest.raises(SiigoAPIError) as error:
+            client.get("/fail")
+
+        assert error.value.status_code == 422
+        assert error.value.payload == {"Errors": ["bad"]}
+
+    def test_records_http_latency(self, client, stub_server):
+        """Con la instrumentación habilitada cada petición queda en el histograma"""
+        stub_server.state["routes"][("GET", "/v1/fail")] = lambda handler, body: (422, {"Errors": ["bad"]})
+        metrics.reset()
+        metrics.enable()
+        try:
+            client.get("/customers")
+            with pytest.raises(SiigoAPIError):
+                client.get("/fail")
+            http = metrics.snapshot()["http"]
+        finally:
+            metrics.disable()
+            metrics.reset()
+
+        assert http["GET 200"]["count"] == 1
+        assert http["GET 422"]["count"] == 1
+
+
+class TestAsyncBulkPoster:
+    """Pruebas para la publicación concurrente"""
+
+    def _track_concurrency(self, stub_server, delay, fail_on=None):
+        """Registra una ruta lenta que mide las peticiones simultáneas"""
+        stats = {"active": 0, "peak": 0}
+        lock = threading.Lock()
+
+        def handler(request, body):
+            with lock:
+                stats["active"] += 1
+                stats["peak"] = max(stats["peak"], stats["active"])
+            time.sleep(delay(body) if callable(delay) else delay)
+            with lock:
+                stats["active"] -= 1
+            if fail_on is not None and body["n"] == fail_on:
+                return 400, {"Errors": ["duplicado"]}
+            return 201, {"id": body["n"]}
+
+        stub_server.state["routes"][("POST", "/v1/vouchers")] = handler
+        return stats
+
+    def test_preserves_order_and_bounds_concurrency(self, client, stub_server):
+        """Verifica el orden de los resultados y el límite de peticiones en vuelo"""
+        stats = self._track_concurrency(stub_server, lambda body: 0.02 * (body["n"] % 3))
+        vouchers = [{"n": n} for n in range(24)]
+
+        results = client.post_vouchers(vouchers, max_in_flight=4)
+
+        assert [result.data["id"] for result in results] == list(range(24))
+        assert all(result.ok for result in results)
+        assert 1 < stats["peak"] <= 4
+        assert stub_server.state["tokens"] == 1
+
+    def test_errors_do_not_stop_batch(self, client, stub_server):
+        """Verifica que un error quede registrado sin detener el lote"""
+        self._track_concurrency(stub_server, 0, fail_on=2)
+
+        results = client.post_vouchers([{"n": n} for n in range(5)], max_in_flight=2)
+
+        assert [result.ok for result in results] == [True, True, False, True, True]
+        assert results[2].status_code == 400
+        assert results[2].data == {"Errors": ["duplicado"]}
+
+    def test_request_timeout(self, client, stub_server):
+        """Verifica que una petición lenta se marque como fallida por tiempo"""
+        self._track_concurrency(stub_server, lambda body: 1.0 if body["n"] == 1 else 0)
+
+        results = AsyncBulkPoster(client, max_in_flight=2, request_timeout=0.3).run(
+            "/vouchers", [{"n": n} for n in range(3)]
+        )
+
+        assert [result.ok for result in results] == [True, False, True]
+        assert results[1].index == 1
+        assert results[1].error.startswith("Tiempo de espera agotado")
+
+    def test_retry_wait_does_not_count_as_timeout(self, client, stub_server):
+        """Un 429 con Retry-After seguido de un 201 se reporta como publicado"""
+        calls = []
+
+        def handler(request, body):
+            calls.append(body)
+            if len(calls) == 1:
+                return 429, {"Errors": ["quota"]}, {"Retry-After": "1"}
+            return 201, {"id": body["n"]}
+
+        stub_server.state["routes"][("POST", "/v1/vouchers")] = handler
+
+        results = AsyncBulkPoster(client, max_in_flight=1, request_timeout=0.5).run("/vouchers", [{"n": 7}])
+
+        assert results[0].ok and results[0].data == {"id": 7}
+        assert len(calls) == 2
+
+
+    def test_non_json_body_does_not_discard_batch(self, client, stub_server, monkeypatch):
+        """Un 2xx con cuerpo HTML o un error inesperado afectan solo a su elemento"""
+        def handler(request, body):
+            if body["n"] == 1:
+                return 201, b"<html>Creado</html>"
+            return 201, {"id": body["n"]}
+
+        stub_server.state["routes"][("POST", "/v1/vouchers")] = handler
+        original = client.request
+
+        def request(method, path, json=None, **kwargs):
+            if json["n"] == 2:
+                raise KeyError("inesperado")
+            return original(method, path, json=json, **kwargs)
+
+        monkeypatch.setattr(client, "request", request)
+
+        results = AsyncBulkPoster(client, max_in_flight=2).run("/vouchers", [{"n": n} for n in range(3)])
+
+        assert [result.ok for result in results] == [True, True, False]
+        assert results[1].data == "<html>Creado</html>"
+        assert results[0].data == {"id": 0}
+        assert results[2].error == "KeyError: 'inesperado'"
+
+
+class FakeClock:
+    """Reloj controlado manualmente para probar el limitador"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestRateLimiting:
+    """Pruebas para el limitador de tasa y los reintentos"""
+
+    def test_token_bucket_paces_requests(self):
+        """Verifica que después de la ráfaga las peticiones se espacien según la tasa"""
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(5, burst=2, clock=clock, sleep=clock.sleep)
+
+        for _ in range(6):
+            limiter.acquire()
+
+        assert clock.now == pytest.approx(0.8)
+
+    def test_throttle_reduces_rate_and_pauses(self):
+        """Verifica la reducción de tasa y la pausa tras un 429"""
+        clock = FakeClock()
+        limiter = AdaptiveRateLimiter(8, burst=1, min_rate=2, clock=clock, sleep=clock.sleep)
+
+        limiter.on_throttle(retry_after=3)
+        limiter.acquire()
+        assert limiter.rate == 4
+        assert clock.now >= 3
+
+        limiter.on_throttle()
+        limiter.on_throttle()
+        assert limiter.rate == 2
+
+        for _ in range(200):
+            limiter.on_success()
+        assert limiter.rate == 8
+
+    def test_disabled_limiter(self):
+        """Verifica que una tasa de 0 desactive el limitador"""
+        limiter = AdaptiveRateLimiter(0, sleep=lambda seconds: pytest.fail("no debe esperar"))
+
+        for _ in range(100):
+            assert limiter.acquire() == 0.0
+
+    def test_parse_retry_after(self):
+        """Verifica la interpretación de Retry-After en segundos y como fecha"""
+        assert parse_retry_after("7") == 7.0
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+        assert parse_retry_after("basura") is None
+        assert parse_retry_after(None) is None
+
+    def test_backoff_delay_is_bounded(self):
+        """Verifica que el backoff crezca exponencialmente sin superar el máximo"""
+        delays = [backoff_delay(attempt, 0.5, 4) for attempt in range(10) for _ in range(20)]
+
+        assert all(0 <= delay <= 4 for delay in delays)
+        assert max(backoff_delay(0, 0.5, 4) for _ in range(50)) <= 0.5
+
+    def test_client_retries_429_with_retry_after(self, client, stub_server):
+        """Verifica que el cliente reintente un 429 respetando Retry-After"""
+        calls = []
+
+        def handler(request, body):
+            calls.append(body)
+            if len(calls) < 3:
+                return 429, {"Errors": ["quota"]}, {"Retry-After": "2"}
+            return 201, {"ok": True}
+
+        stub_server.state["routes"][("POST", "/v1/vouchers")] = handler
+        clock = FakeClock()
+        sleeps = []
+        client._sleep = sleeps.append
+        client.rate_limiter = AdaptiveRateLimiter(10, clock=clock, sleep=clock.sleep)
+
+        assert client.post("/vouchers", json={"n": 1}) == {"ok": True}
+        assert len(calls) == 3
+        assert len(sleeps) == 2 and all(delay >= 2 for delay in sleeps)
+        assert clock.now >= 2
+        assert client.rate_limiter.rate < 10
+
+    def test_client_gives_up_after_max_retries(self, client, stub_server):
+        """Verifica que se propague el error al agotar los reintentos"""
+        stub_server.state["routes"][("GET", "/v1/busy")] = lambda request, body: (503, {"Errors": ["busy"]})
+        client._sleep = lambda seconds: None
+
+        with pytest.raises(SiigoAPIError) as error:
+            client.get("/busy")
+
+        assert error.value.status_code == 503
+        gets = [r for r in stub_server.state["requests"] if r[1] == "/v1/busy"]
+        assert len(gets) == client.config.max_retries + 1
+
+    def test_post_is_not_retried_on_server_error(self, client, stub_server):
+        """Verifica que un POST no se repita ante un 503 para evitar duplicados"""
+        stub_server.state["routes"][("POST", "/v1/vouchers")] = lambda request, body: (503, None)
+
+        with pytest.raises(SiigoAPIError):
+            client.post("/vouchers", json={})
+
+        posts = [r for r in stub_server.state["requests"] if r[1] == "/v1/vouchers"]
+        assert len(posts) == 1
+
+
+class FakeCustomerCatalog:
+    """Catálogo de terceros servido por el servidor falso con soporte de ETag"""
+
+    def __init__(self, count):
+        self.version = 1
+        self.records = {
+            str(i): {
+                "id": str(i),
+                "type": "Supplier" if i % 2 else "Customer",
+                "name": [f"Tercero {i:03d}"],
+                "metadata": {"last_updated": f"2023-01-01T{i // 60:02d}:{i % 60:02d}:00"}
+            }
+            for i in range(count)
+        }
+        self.queries = []
+
+    def update(self, record_id, name):
+        self.version += 1
+        self.records[record_id]["name"] = [name]
+        self.records[record_id]["metadata"]["last_updated"] = f"2023-02-0{self.version}T00:00:00"
+
+    def deactivate(self, record_id):
+        self.update(record_id, self.records[record_id]["name"][0])
+        self.records[record_id]["active"] = False
+
+    def remove(self, record_id):
+        self.version += 1
+        del self.records[record_id]
+
+    def __call__(self, request, body):
+        query = {key: values[0] for key, values in parse_qs(urlparse(request.path).query).items()}
+        self.queries.append(query)
+        etag = f'"v{self.version}-{query["type"]}"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        matches = sorted(
+            (r for r in self.records.values()
+             if r["type"] == query["type"] and r["metadata"]["last_updated"] >= query.get("updated_start", "")),
+            key=lambda r: int(r["id"])
+        )
+        page, size = int(query["page"]), int(query["page_size"])
+        body = {
+            "pagination": {"page": page, "page_size": size, "total_results": len(matches)},
+            "results": matches[(page - 1) * size:page * size]
+        }
+        return 200, body, {"ETag": etag}
+
+
+class TestSiigoMasterData:
+    """Pruebas para la caché local de datos maestros"""
+
+    @pytest.fixture
+    def catalog(self, stub_server):
+        catalog = FakeCustomerCatalog(250)
+        stub_server.state["routes"][("GET", "/v1/customers")] = catalog
+        return catalog
+
+    @pytest.fixture
+    def master_data(self, client, tmp_path):
+        return SiigoMasterData(client, MasterDataCache(tmp_path / "master.sqlite3"), ttl=3600)
+
+    def test_full_sync_with_pagination(self, master_data, catalog):
+        """Verifica la descarga paginada del catálogo completo"""
+        suppliers = master_data.get("suppliers")
+
+        assert len(suppliers) == 125
+        assert len(catalog.queries) == 2
+        assert "Tercero 001" in master_data.counterparty_names()
+
+    def test_cache_hit_within_ttl(self, master_data, catalog):
+        """Verifica que no se llame a SIIGO mientras la caché esté vigente"""
+        master_data.get("suppliers")
+        calls = len(catalog.queries)
+
+        master_data.get("suppliers")
+
+        assert len(catalog.queries) == calls
+
+    def test_revalidation_not_modified(self, master_data, catalog):
+        """Verifica que un 304 renueve la caché sin descargar registros"""
+        master_data.get("suppliers")
+        calls = len(catalog.queries)
+
+        assert master_data.sync("suppliers") == 0
+        assert len(catalog.queries) == calls + 1
+        assert len(master_data.get("suppliers")) == 125
+
+    def test_incremental_sync(self, master_data, catalog, tmp_path):
+        """Verifica que solo se descarguen los registros modificados"""
+        master_data.get("suppliers")
+        catalog.update("7", "Proveedor Renombrado")
+
+        # updated_start es inclusivo: también vuelve el último registro ya sincronizado
+        assert master_data.sync("suppliers") == 2
+        assert catalog.queries[-1]["updated_start"] == "2023-01-01T04:09:00"
+
+        reopened = MasterDataCache(tmp_path / "master.sqlite3")
+        names = reopened.names("suppliers")
+        assert "Proveedor Renombrado" in names
+        assert "Tercero 007" not in names
+        assert len(names) == 125
+
+    def test_plain_list_response(self, master_data, stub_server):
+        """Una respuesta que es una lista JSON, sin paginación, se acepta tal cual"""
+        accounts = [{"id": "1", "name": "Caja"}, {"id": "2", "name": "Bancos"}]
+        stub_server.state["routes"][("GET", "/v1/account-groups")] = lambda request, body: (200, accounts)
+
+        assert master_data.sync("accounts") == 2
+        assert [record["name"] for record in master_data.get("accounts")] == ["Bancos", "Caja"]
+
+    def test_inactive_records_are_not_listed(self, master_data, catalog):
+        """Los terceros inactivos se guardan pero no aparecen en la lista de la plantilla"""
+        master_data.get("suppliers")
+        catalog.deactivate("7")
+
+        master_data.sync("suppliers")
+
+        assert "Tercero 007" not in master_data.counterparty_names()
+        assert any(record["id"] == "7" for record in master_data.get("suppliers"))
+
+    def test_periodic_full_sync_removes_deleted_records(self, client, catalog, tmp_path):
+        """La descarga completa periódica borra los terceros que SIIGO ya no devuelve"""
+        master_data = SiigoMasterData(client, MasterDataCache(tmp_path / "master.sqlite3"), ttl=0, full_sync_interval=3600)
+        master_data.get("suppliers")
+        catalog.remove("7")
+
+        # La sincronización incremental no se entera del borrado
+        assert master_data.sync("suppliers") == 1
+        assert "updated_start" in catalog.queries[-1]
+        assert len(master_data.cache.names("suppliers")) == 125
+
+        master_data.full_sync_interval = 0
+        assert master_data.sync("suppliers") == 124
+        assert "updated_start" not in catalog.queries[-1]
+        assert "Tercero 007" not in master_data.cache.names("suppliers")
+        assert len(master_data.cache.names("suppliers")) == 124
+
+    def test_counterparty_names_fall_back_to_cache(self, master_data, catalog, stub_server, recording_logger):
+        """Si SIIGO falla se usan los nombres en caché, y None si la caché está vacía"""
+        def unavailable(request, body):
+            return 404, {"Errors": [{"Message": "no disponible"}]}
+
+        master_data.get("suppliers")
+        stub_server.state["routes"][("GET", "/v1/customers")] = unavailable
+        master_data.ttl = 0
+
+        names = load_counterparty_names(master_data, logger=recording_logger)
+
+        assert names is not None and len(names) == 125
+        assert recording_logger.records[-1][0] == "WARNING"
+        master_data.cache = MasterDataCache(master_data.cache.path.with_name("empty.sqlite3"))
+        assert load_counterparty_names(master_data, logger=recording_logger) is None
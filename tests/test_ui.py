@@ -0,0 +1,324 @@
+"""
+Tests para los trabajos en segundo plano de la interfaz
+"""
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from src.excel.reader import TransactionReader
+from src.excel.template.generate_template import ExcelTemplateGenerator
+from src.excel.column_cache import ColumnCache
+from src.ui.grid import (
+    CachedRowSource, FrameRowSource, GridModel, filter_job, format_value, load_preview_job, sort_job
+)
+from src.ui.jobs import (
+    EVENT_CANCELLED, EVENT_DONE, EVENT_ERROR, EVENT_PROGRESS, JobRunner, process_workbook_job
+)
+
+
+def _poll_until_finished(runner, jobs=1, timeout=30.0):
+    """Consulta el ejecutor hasta recibir el evento final de ``jobs`` trabajos"""
+    events = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        events.extend(runner.poll())
+        if sum(event.finished for event in events) == jobs:
+            return events
+        time.sleep(0.01)
+    raise AssertionError(f"Los trabajos no terminaron: {events}")
+
+
+def _count(context, rows):
+    for row in range(1, rows + 1):
+        context.progress(row, rows)
+    return rows
+
+
+def _fail(context):
+    raise ValueError("archivo dañado")
+
+
+@pytest.fixture
+def workbook(tmp_path, recording_logger):
+    """Plantilla diligenciada con 50 transacciones"""
+    path = tmp_path / "cuenta.xlsx"
+    ExcelTemplateGenerator(logger=recording_logger).create_excel_template(str(path))
+    wb = load_workbook(path)
+    sheet = wb["Transacciones"]
+    saldo = 0
+    for i in range(1, 51):
+        saldo += 10
+        sheet.append([f"T{i:04d}", datetime(2023, 1, 1 + i % 28), "Detalle", "Proveedor1", 10, None,
+                      saldo, "Ventas", "No"])
+    wb.save(path)
+    return path
+
+
+class TestJobRunner:
+    """Pruebas para el ejecutor de trabajos"""
+
+    def test_progress_is_throttled_and_coalesced(self):
+        """Miles de reportes de progreso llegan como unos pocos eventos y el último evento es el resultado"""
+        runner = JobRunner(progress_interval=0.05)
+        try:
+            job_id = runner.submit(_count, 100000)
+            events = _poll_until_finished(runner)
+        finally:
+            runner.shutdown()
+
+        progress = [event for event in events if event.kind == EVENT_PROGRESS]
+        assert events[-1].kind == EVENT_DONE and events[-1].result == 100000
+        assert all(event.job_id == job_id for event in events)
+        assert len(progress) < 100
+
+    def test_cancel_running_job(self):
+        """Un trabajo en curso se detiene en su siguiente reporte de progreso"""
+        started = threading.Event()
+
+        def endless(context):
+            started.set()
+            rows = 0
+            while True:
+                rows += 1
+                context.progress(rows)
+
+        runner = JobRunner()
+        try:
+            job_id = runner.submit(endless)
+            assert started.wait(5)
+            assert runner.cancel(job_id)
+            events = _poll_until_finished(runner)
+        finally:
+            runner.shutdown()
+
+        assert events[-1].kind == EVENT_CANCELLED
+        assert runner.active() == []
+        assert not runner.cancel(job_id)
+
+    def test_cancel_queued_job(self):
+        """Un trabajo en cola se cancela sin llegar a ejecutarse"""
+        release = threading.Event()
+        ran = []
+        runner = JobRunner(max_workers=1)
+        try:
+            first = runner.submit(lambda context: release.wait(5))
+            second = runner.submit(lambda context: ran.append(True))
+            assert runner.cancel(second)
+            release.set()
+            events = _poll_until_finished(runner, jobs=2)
+        finally:
+            runner.shutdown()
+
+        assert {(event.job_id, event.kind) for event in events if event.finished} == {
+            (first, EVENT_DONE), (second, EVENT_CANCELLED)
+        }
+        assert ran == []
+
+    def test_error_is_reported(self):
+        """Una excepción del trabajo llega como evento de error"""
+        runner = JobRunner()
+        try:
+            runner.submit(_fail)
+            events = _poll_until_finished(runner)
+        finally:
+            runner.shutdown()
+
+        assert events[-1].kind == EVENT_ERROR
+        assert events[-1].error == "ValueError: archivo dañado"
+
+    def test_process_workbook_job(self, workbook):
+        """El trabajo de la interfaz procesa el archivo en un proceso aparte"""
+        runner = JobRunner(use_processes=True)
+        try:
+            runner.submit(process_workbook_job, str(workbook), chunk_size=10)
+            events = _poll_until_finished(runner, timeout=120)
+        finally:
+            runner.shutdown()
+
+        done = events[-1]
+        assert done.kind == EVENT_DONE
+        assert done.result.rows == 50 and done.result.error is None
+        progress = [event for event in events if event.kind == EVENT_PROGRESS]
+        assert progress and progress[-1].rows <= 50
+
+
+class TestGridModel:
+    """Pruebas para el modelo de la tabla virtualizada"""
+
+    @pytest.fixture
+    def frame(self):
+        return pd.DataFrame(
+            {
+                "ID": ["T1", "T2", "T3", "T4"],
+                "Entró": [30.0, np.nan, 10.0, 20.0],
+                "Proveedor/Cliente": ["Globex", "Acme", None, "acme sas"],
+            },
+            index=pd.Index([2, 3, 5, 6], name="fila"),
+        )
+
+    def test_unsorted_view_pages_without_index(self, frame):
+        """Sin orden ni filtro la vista usa la fuente directamente"""
+        model = GridModel(FrameRowSource(frame))
+
+        assert len(model) == 4
+        assert [(number, values[0]) for number, values in model.rows(1, 2)] == [(3, "T2"), (5, "T3")]
+        assert model._view is None
+
+    def test_sort_keeps_blanks_last(self, frame):
+        """El orden es estable y las celdas vacías quedan al final en ambos sentidos"""
+        model = GridModel(FrameRowSource(frame))
+
+        model.sort("Entró")
+        assert [values[0] for _, values in model.rows(0, 4)] == ["T3", "T4", "T1", "T2"]
+        model.sort("Entró", ascending=False)
+        assert [values[0] for _, values in model.rows(0, 4)] == ["T1", "T4", "T3", "T2"]
+        model.sort("Proveedor/Cliente")
+        assert [values[0] for _, values in model.rows(0, 4)] == ["T2", "T4", "T1", "T3"]
+        assert model._view.dtype == np.int32
+        model.sort(None)
+        assert model._view is None
+
+    def test_filter_and_mask_combine_with_sort(self, frame):
+        """El filtro de texto no distingue mayúsculas y se combina con el orden"""
+        model = GridModel(FrameRowSource(frame))
+
+        model.sort("Entró", ascending=False)
+        model.filter("Proveedor/Cliente", "ACME")
+        assert [number for number, _ in model.rows(0, 10)] == [6, 3]
+        model.filter(None, "10.00")
+        assert [number for number, _ in model.rows(0, 10)] == [5]
+        model.set_mask(np.array([True, False, True, False]))
+        assert [number for number, _ in model.rows(0, 10)] == [2, 5]
+        model.filter(None, "")
+        assert len(model) == 4
+
+    def test_format_value(self):
+        """Las celdas se muestran con los formatos de la plantilla"""
+        assert format_value(pd.Timestamp("2023-01-31")) == "31/01/2023"
+        assert format_value(1234.5) == "1,234.50"
+        assert format_value(np.nan) == "" and format_value(None) == "" and format_value(pd.NaT) == ""
+
+
+class TestCachedRowSource:
+    """Pruebas para la fuente sobre la caché de columnas"""
+
+    @pytest.fixture
+    def source(self, workbook, tmp_path, recording_logger):
+        cache = ColumnCache(tmp_path / "columns", logger=recording_logger)
+        cached = cache.store(workbook, TransactionReader(workbook, chunk_size=16).iter_chunks(typed=False))
+        return CachedRowSource(cached, chunk_size=7)
+
+    def test_take_reads_only_requested_rows(self, source):
+        """Las posiciones pueden venir en cualquier orden y las que no existen se omiten"""
+        rows = source.take(np.array([30, 0, 49, 50]))
+
+        assert [(number, values[0]) for number, values in rows] == [(32, "T0031"), (2, "T0001"), (51, "T0050")]
+        assert rows[0][1][1] == pd.Timestamp("2023-01-04") and rows[0][1][4] == 10.0
+
+    def test_sort_matches_frame_source(self, source):
+        """Los índices de orden coinciden con los de la fuente en memoria"""
+        frame = FrameRowSource(source.cached.frame())
+        for column in ("ID", "Fecha", "Saldo", "Salió"):
+            for ascending in (True, False):
+                assert source.sort_index(column, ascending).tolist() == frame.sort_index(column, ascending).tolist()
+
+    def test_filter_scans_in_chunks(self, source):
+        """El filtro compara cada valor distinto una vez y recorre la columna por lotes"""
+        assert np.flatnonzero(source.filter_mask("ID", "t004")).tolist() == list(range(39, 49))
+        assert np.flatnonzero(source.filter_mask("Saldo", "110.00")).tolist() == [10]
+        assert np.flatnonzero(source.filter_mask("Fecha", "05/01/2023")).tolist() == [3, 31]
+        assert not source.filter_mask("Salió", "1").any()
+
+    def test_csv_statement_through_cache(self, workbook, tmp_path, recording_logger):
+        """Los extractos CSV pasan por la caché con su propia clave, aunque tengan líneas vacías"""
+        frame = TransactionReader(workbook).read(typed=False)
+        frame["Fecha"] = pd.to_datetime(frame["Fecha"]).dt.strftime("%d/%m/%Y")
+        path = tmp_path / "cuenta.csv"
+        lines = frame.to_csv(index=False).splitlines()
+        path.write_text("\n".join(lines[:10] + [""] + lines[10:]) + "\n", encoding="utf-8")
+        cache = ColumnCache(tmp_path / "columns", logger=recording_logger)
+        runner = JobRunner()
+        try:
+            runner.submit(load_preview_job, path, chunk_size=7, cache=cache)
+            model = _poll_until_finished(runner)[-1].result
+        finally:
+            runner.shutdown()
+
+        assert len(model) == 50
+        assert [values[0] for _, values in model.rows(8, 3)] == ["T0009", "T0010", "T0011"]
+        assert [number for number, _ in model.source.take(np.array([0, 49]))] == [2, 52]
+
+
+class TestLoadPreviewJob:
+    """Pruebas para la preparación de la vista previa en segundo plano"""
+
+    def test_builds_model_from_column_cache(self, workbook, tmp_path, recording_logger):
+        """El trabajo deja el archivo en la caché; el orden se calcula solo al pedirlo"""
+        cache = ColumnCache(tmp_path / "columns", logger=recording_logger)
+        runner = JobRunner()
+        try:
+            runner.submit(load_preview_job, workbook, chunk_size=16, cache=cache)
+            model = _poll_until_finished(runner)[-1].result
+            assert model._sort_indexes == {}
+            runner.submit(sort_job, model, "ID", False)
+            column, ascending = _poll_until_finished(runner)[-1].result
+            runner.submit(filter_job, model, None, "t0042")
+            mask = _poll_until_finished(runner)[-1].result
+        finally:
+            runner.shutdown()
+
+        assert isinstance(model.source, CachedRowSource) and len(model) == 50
+        assert cache.load(workbook) is not None
+        assert ("ID", False) in model._sort_indexes
+        model.sort(column, ascending)
+        assert model.rows(0, 1)[0][1][0] == "T0050"
+        model.set_mask(mask)
+        assert [number for number, _ in model.rows(0, 5)] == [43]
+
+
+@pytest.mark.skipif(not os.environ.get("DISPLAY"), reason="Requiere una pantalla para Tk")
+def test_window_stays_responsive(workbook):
+    """La ventana sigue atendiendo eventos mientras se procesa un archivo"""
+    from src.ui.window import MainWindow
+
+    window = MainWindow(runner=JobRunner())
+    try:
+        window.path_entry.insert(0, str(workbook))
+        window.start()
+        deadline = time.monotonic() + 30
+        while window.job_id is not None and time.monotonic() < deadline:
+            window.update()
+            time.sleep(0.005)
+        assert window.job_id is None
+        assert "Filas: 50" in window.output.get("1.0", "end")
+        assert window.max_poll_gap < 0.06
+    finally:
+        window.close()
+
+
+@pytest.mark.skipif(not os.environ.get("DISPLAY"), reason="Requiere una pantalla para Tk")
+def test_virtual_grid_reuses_cells():
+    """La tabla crea elementos solo para las filas visibles"""
+    import customtkinter as ctk
+    from src.ui.grid import VirtualGrid
+
+    frame = pd.DataFrame({"ID": [f"T{i}" for i in range(1_000_000)]})
+    root = ctk.CTk()
+    try:
+        grid = VirtualGrid(root, GridModel(FrameRowSource(frame)))
+        grid.pack(fill="both", expand=True)
+        root.geometry("400x300")
+        root.update()
+        cells = len(grid.canvas.find_all())
+        grid.scroll_to(999_000)
+        root.update()
+        assert len(grid.canvas.find_all()) == cells < 100
+        assert grid.canvas.itemcget(grid._cells[0][1], "text").startswith("T99")
+    finally:
+        root.destroy()